@@ -0,0 +1,15 @@
+"""Benchmark suite of HCA and PCA, run with `python -m benchmarks`."""
+
+from .cases import PRESETS, Case, Grid, cases
+from .harness import Measurement, Report, Result, measure
+
+__all__ = [
+    "PRESETS",
+    "Case",
+    "Grid",
+    "cases",
+    "Measurement",
+    "Report",
+    "Result",
+    "measure",
+]
@@ -0,0 +1,147 @@
+"""Command line interface of benchmark suite."""
+
+import sys
+from typing import Optional, Tuple
+
+import click
+from rich.console import Console
+from rich.markup import escape
+from rich.table import Table
+
+from .cases import DISTANCES, PRESETS, SELECTORS, Grid, cases
+from .harness import Measurement, Report, Result, measure
+
+
+def _sizes(value: Optional[str]) -> Optional[Tuple[int, ...]]:
+    if value is None:
+        return None
+    return tuple(int(item) for item in value.split(","))
+
+
+@click.command()
+@click.option(
+    "--preset",
+    type=click.Choice(sorted(PRESETS)),
+    default="quick",
+    help="Grid of data sizes, overridden by --sizes and --dims.",
+)
+@click.option("--sizes", help="Comma separated numbers of records.")
+@click.option("--dims", help="Comma separated numbers of dimensions.")
+@click.option(
+    "--method",
+    "methods",
+    multiple=True,
+    type=click.Choice(list(SELECTORS)),
+    help="Linkage method to benchmark, all by default.",
+)
+@click.option(
+    "--metric",
+    "metrics",
+    multiple=True,
+    type=click.Choice(list(DISTANCES)),
+    help="Distance to benchmark, all by default.",
+)
+@click.option("--only", type=click.Choice(["HCA", "PCA"]))
+@click.option("--repeat", default=3, show_default=True)
+@click.option(
+    "--isolate/--no-isolate",
+    default=True,
+    help="Run every measurement in fresh process, required for RSS.",
+)
+@click.option("--baseline/--no-baseline", default=True)
+@click.option(
+    "-o", "--output", type=click.Path(dir_okay=False), help="JSON report."
+)
+@click.option(
+    "--compare",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Previous JSON report, exit code is 1 on regressions.",
+)
+@click.option("--threshold", default=1.25, show_default=True)
+def benchmark(
+    preset: str,
+    sizes: Optional[str],
+    dims: Optional[str],
+    methods: Tuple[str, ...],
+    metrics: Tuple[str, ...],
+    only: Optional[str],
+    repeat: int,
+    isolate: bool,
+    baseline: bool,
+    output: Optional[str],
+    compare: Optional[str],
+    threshold: float,
+) -> None:
+    """Measure HCA and PCA against scipy and numpy baselines."""
+    grid = PRESETS[preset]
+    grid = Grid(
+        _sizes(sizes) or grid.hca_sizes,
+        _sizes(sizes) or grid.pca_sizes,
+        _sizes(dims) or grid.dimensions,
+    )
+    console = Console()
+    report = Report()
+    for case in cases(grid, list(methods), list(metrics), only):
+        console.print(f"{case.name} {case.params}", highlight=False)
+        result = measure(case.setup, case.run, repeat, isolate)
+        reference = None
+        if baseline and case.baseline is not None:
+            reference = measure(case.setup, case.baseline, repeat, isolate)
+        report.results.append(
+            Result(
+                case.name,
+                case.params,
+                result,
+                reference,
+                case.baseline_name if reference is not None else None,
+            )
+        )
+    console.print(_table(report))
+    if output is not None:
+        report.dump(output)
+    if compare is not None:
+        slower = report.regressions(Report.load(compare), threshold)
+        for result, ratio in slower:
+            console.print(
+                f"[red]{escape(result.key)} is {ratio:.2f}x slower[/red]"
+            )
+        if slower:
+            sys.exit(1)
+
+
+def _table(report: Report) -> Table:
+    table = Table()
+    for column in (
+        "case",
+        "time",
+        "peak RSS",
+        "traced",
+        "baseline",
+        "baseline RSS",
+        "speedup",
+    ):
+        table.add_column(column)
+    for result in report.results:
+        reference = result.baseline
+        table.add_row(
+            escape(result.key),
+            _seconds(result.optmath),
+            _megabytes(result.optmath.peak_rss),
+            _megabytes(result.optmath.peak_traced),
+            "-" if reference is None else _seconds(reference),
+            "-" if reference is None else _megabytes(reference.peak_rss),
+            "-" if result.speedup is None else f"{result.speedup:.2f}x",
+        )
+    return table
+
+
+def _seconds(measurement: Measurement) -> str:
+    return f"{measurement.wall_time:.4f} s"
+
+
+def _megabytes(size: Optional[int]) -> str:
+    return "-" if size is None else f"{size / 2**20:.1f} MB"
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,201 @@
+"""Benchmark cases of HCA and PCA with their scipy and numpy baselines."""
+
+from dataclasses import dataclass, make_dataclass
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+from scipy.cluster.hierarchy import linkage
+from scipy.spatial.distance import pdist
+
+from optmath import PCA, RecordBase
+from optmath.HCA import (
+    HCA,
+    AverageLinkage,
+    CentroidLinkage,
+    Chebyshev,
+    Cluster,
+    CompleteLinkage,
+    Euclidean,
+    Manhattan,
+    MedianLinkage,
+    SingleLinkage,
+    Ward,
+    WeightedLinkage,
+)
+
+# selectors by name of scipy linkage method
+SELECTORS = {
+    "single": SingleLinkage,
+    "complete": CompleteLinkage,
+    "average": AverageLinkage,
+    "weighted": WeightedLinkage,
+    "centroid": CentroidLinkage,
+    "median": MedianLinkage,
+    "ward": Ward,
+}
+# distances by name of scipy metric
+DISTANCES = {
+    "euclidean": Euclidean,
+    "cityblock": Manhattan,
+    "chebyshev": Chebyshev,
+}
+# scipy computes these methods only for euclidean distance
+EUCLIDEAN_METHODS = ("centroid", "median", "ward")
+
+
+@dataclass(frozen=True)
+class Grid:
+    """Sizes of data for which cases are generated."""
+
+    hca_sizes: Tuple[int, ...]
+    pca_sizes: Tuple[int, ...]
+    dimensions: Tuple[int, ...]
+
+
+PRESETS: Dict[str, Grid] = {
+    "quick": Grid((100, 500), (100, 1_000), (2, 10)),
+    # dense HCA takes 8 * n^2 bytes, 800 MB for 10k records
+    "full": Grid(
+        (100, 1_000, 5_000, 10_000),
+        (100, 1_000, 10_000, 50_000),
+        (2, 50, 500),
+    ),
+}
+
+
+@dataclass(frozen=True)
+class Case:
+    """Benchmark of optmath call and of its baseline on same data.
+
+    Attributes
+    ----------
+    name : str
+        name of benchmarked function.
+    params : Dict[str, Any]
+        parameters identifying case between runs.
+    setup : Callable[[], Any]
+        creates input passed to run and baseline, not measured.
+    run : Callable[[Any], Any]
+        benchmarked optmath call.
+    baseline : Optional[Callable[[Any], Any]]
+        equivalent call of other library, None when there is none.
+    baseline_name : Optional[str]
+        name of baseline reported along with its measurement.
+    """
+
+    name: str
+    params: Dict[str, Any]
+    setup: Callable[[], Any]
+    run: Callable[[Any], Any]
+    baseline: Optional[Callable[[Any], Any]] = None
+    baseline_name: Optional[str] = None
+
+
+def cases(
+    grid: Grid,
+    methods: Optional[List[str]] = None,
+    metrics: Optional[List[str]] = None,
+    only: Optional[str] = None,
+) -> Iterator[Case]:
+    """Yield HCA cases for every method and metric, then PCA cases.
+
+    Parameters
+    ----------
+    grid : Grid
+        sizes and dimensions of data.
+    methods : Optional[List[str]]
+        names of selectors (keys of SELECTORS), all when None.
+    metrics : Optional[List[str]]
+        names of distances (keys of DISTANCES), all when None.
+    only : Optional[str]
+        "HCA" or "PCA" to generate cases of one of them.
+    """
+    for method in methods or list(SELECTORS):
+        for metric in metrics or list(DISTANCES):
+            for size in grid.hca_sizes:
+                for dimensions in grid.dimensions:
+                    if only in (None, "HCA"):
+                        yield hca_case(method, metric, size, dimensions)
+    for size in grid.pca_sizes:
+        for dimensions in grid.dimensions:
+            if only in (None, "PCA"):
+                yield pca_case(size, dimensions)
+
+
+def hca_case(method: str, metric: str, size: int, dimensions: int) -> Case:
+    baseline = None
+    if metric == "euclidean" or method not in EUCLIDEAN_METHODS:
+        baseline = partial(_scipy_linkage, method, metric)
+    return Case(
+        "HCA",
+        {"method": method, "metric": metric, "n": size, "d": dimensions},
+        partial(_hca_data, size, dimensions),
+        partial(_hca, method, metric),
+        baseline,
+        None if baseline is None else "scipy.cluster.hierarchy.linkage",
+    )
+
+
+def pca_case(size: int, dimensions: int) -> Case:
+    return Case(
+        "PCA",
+        {"n": size, "d": dimensions},
+        partial(_pca_data, size, dimensions),
+        _pca,
+        _eigh,
+        "numpy.linalg.eigh",
+    )
+
+
+def random_data(size: int, dimensions: int) -> NDArray[np.float64]:
+    """Standard normal data, same for every run."""
+    return np.random.default_rng(0).standard_normal((size, dimensions))
+
+
+def record_type(dimensions: int) -> type:
+    """Record class with given number of numeric fields."""
+    return make_dataclass(
+        f"Record{dimensions}",
+        [(f"x{index}", float) for index in range(dimensions)],
+        bases=(RecordBase,),
+        frozen=True,
+    )
+
+
+def _hca_data(
+    size: int, dimensions: int
+) -> Tuple[List[Cluster], NDArray[np.float64]]:
+    data = random_data(size, dimensions)
+    batch = record_type(dimensions).from_array(data)
+    return Cluster.new(tuple(batch)), data
+
+
+def _hca(method: str, metric: str, data: Tuple[List[Cluster], Any]) -> Any:
+    selector = SELECTORS[method](DISTANCES[metric]())
+    return HCA(list(data[0]), selector).result()
+
+
+def _scipy_linkage(
+    method: str, metric: str, data: Tuple[Any, NDArray[np.float64]]
+) -> Any:
+    return linkage(pdist(data[1], metric), method)
+
+
+def _pca_data(
+    size: int, dimensions: int
+) -> Tuple[Tuple[RecordBase, ...], NDArray[np.float64]]:
+    data = random_data(size, dimensions)
+    data = (data - data.mean(axis=0)) / data.std(axis=0)
+    batch = record_type(dimensions).from_array(data)
+    return tuple(batch), data
+
+
+def _pca(data: Tuple[Tuple[RecordBase, ...], Any]) -> Any:
+    return PCA(data[0])
+
+
+def _eigh(data: Tuple[Any, NDArray[np.float64]]) -> Any:
+    array = data[1]
+    return np.linalg.eigh(array.T @ array / len(array))
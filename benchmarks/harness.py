@@ -0,0 +1,216 @@
+"""Measurement of single benchmark case and JSON reports of results."""
+
+import json
+import multiprocessing
+import platform
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from os import PathLike
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import scipy
+
+import optmath
+
+try:
+    import resource
+except ImportError:  # pragma: no cover, not available on Windows
+    resource = None  # type: ignore[assignment]
+
+# bumped whenever layout of JSON report changes
+REPORT_VERSION: int = 1
+
+PathT = Union[str, "PathLike[str]"]
+
+
+@dataclass(frozen=True)
+class Measurement:
+    """Cost of single benchmark case.
+
+    Attributes
+    ----------
+    wall_time : float
+        best wall time of all repeats, in seconds.
+    mean_time : float
+        mean wall time of all repeats, in seconds.
+    peak_rss : Optional[int]
+        peak resident set size of process running case, in bytes, None
+        where it can not be measured. Includes interpreter and imported
+        modules, so only differences between cases are meaningful.
+    peak_traced : int
+        peak size of memory allocated while case was running, traced
+        with tracemalloc (numpy arrays included), in bytes.
+    repeat : int
+        number of timed runs.
+    """
+
+    wall_time: float
+    mean_time: float
+    peak_rss: Optional[int]
+    peak_traced: int
+    repeat: int
+
+
+@dataclass(frozen=True)
+class Result:
+    """Measurements of optmath and baseline for single case."""
+
+    case: str
+    params: Dict[str, Any]
+    optmath: Measurement
+    baseline: Optional[Measurement] = None
+    baseline_name: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        params = ",".join(f"{k}={v}" for k, v in sorted(self.params.items()))
+        return f"{self.case}[{params}]"
+
+    @property
+    def speedup(self) -> Optional[float]:
+        """Baseline wall time divided by optmath wall time."""
+        if self.baseline is None:
+            return None
+        return self.baseline.wall_time / self.optmath.wall_time
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Result":
+        baseline = data.get("baseline")
+        return cls(
+            data["case"],
+            data["params"],
+            Measurement(**data["optmath"]),
+            None if baseline is None else Measurement(**baseline),
+            data.get("baseline_name"),
+        )
+
+
+@dataclass
+class Report:
+    """Results of benchmark run with description of environment."""
+
+    results: List[Result] = field(default_factory=list)
+    environment: Dict[str, str] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        if not self.environment:
+            self.environment = environment()
+
+    def dump(self, path: PathT) -> None:
+        """Write report to JSON file."""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.as_dict(), file, indent=2)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "version": REPORT_VERSION,
+            "environment": self.environment,
+            "results": [asdict(result) for result in self.results],
+        }
+
+    @classmethod
+    def load(cls, path: PathT) -> "Report":
+        """Read report written by Report.dump()."""
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+        if data.get("version") != REPORT_VERSION:
+            raise ValueError(
+                f"Unsupported report version {data.get('version')}."
+            )
+        return cls(
+            [Result.from_dict(result) for result in data["results"]],
+            data["environment"],
+        )
+
+    def regressions(
+        self, previous: "Report", threshold: float = 1.25
+    ) -> List[Tuple[Result, float]]:
+        """Cases at least threshold times slower than in previous report.
+
+        Returns
+        -------
+        List[Tuple[Result, float]]
+            Slower results with ratio of new to previous wall time.
+        """
+        before = {result.key: result for result in previous.results}
+        slower = []
+        for result in self.results:
+            old = before.get(result.key)
+            if old is None:
+                continue
+            ratio = result.optmath.wall_time / old.optmath.wall_time
+            if ratio >= threshold:
+                slower.append((result, ratio))
+        return slower
+
+
+def environment() -> Dict[str, str]:
+    """Versions of interpreter and libraries results depend on."""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "optmath": optmath.__version__,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+    }
+
+
+def measure(
+    setup: Callable[[], Any],
+    function: Callable[[Any], Any],
+    repeat: int = 3,
+    isolated: bool = True,
+) -> Measurement:
+    """Measure function(setup()), in separate process when isolated.
+
+    Only function is measured, input returned by setup is created once
+    and shared by all runs. Peak RSS of process is never lowered, so it
+    is only meaningful for separate process running single case. Both
+    callables have to be picklable to run isolated, eg. partials of
+    module level functions.
+    """
+    if not isolated:
+        return _measure(setup, function, repeat)
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        return pool.apply(_measure, (setup, function, repeat))
+
+
+def _measure(
+    setup: Callable[[], Any], function: Callable[[Any], Any], repeat: int
+) -> Measurement:
+    data = setup()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(data)
+        times.append(time.perf_counter() - start)
+    # tracing slows allocations down, so it is done in separate run
+    tracemalloc.start()
+    try:
+        function(data)
+        _, peak_traced = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return Measurement(
+        min(times),
+        sum(times) / len(times),
+        _peak_rss(),
+        peak_traced,
+        repeat,
+    )
+
+
+def _peak_rss() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    if platform.system() == "Darwin":
+        return int(peak)
+    return int(peak) * 1024
@@ -1,12 +1,72 @@
-from dataclasses import dataclass, field
-from typing import List, Optional, Tuple
+import io
+import os
+import pickle
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field, fields, replace
+from inspect import isclass
+from os import PathLike
+from pathlib import (
+    Path,
+    PosixPath,
+    PurePath,
+    PurePosixPath,
+    PureWindowsPath,
+    WindowsPath,
+)
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
 
 import numpy as np
-from numpy.typing import NDArray
+from numpy.typing import DTypeLike, NDArray
+from scipy import sparse
 
+from optmath.common.cache import ResultCache
 from optmath.HCA.cluster import Cluster
 
+from .builder import TileBuilder
+from .distance import DistanceBase
 from .distance_selector import DistanceSelectorBase
+from .engine import (
+    ConnectivityT,
+    EngineBase,
+    GraphEngine,
+    MatrixEngine,
+    MatrixState,
+)
+from .linkage import Linkage, LinkageCluster, Merge
+from .profiler import Profiler
+from .record import RecordBase, RecordBatch, RecordView, to_numpy_array
+from .storage import (
+    BackingT,
+    CondensedStorage,
+    DistanceStorageBase,
+    SquareStorage,
+    condensed_size,
+    floating_dtype,
+    square_matrix,
+)
+
+# bumped whenever layout of checkpoint files changes
+CHECKPOINT_VERSION: int = 2
+
+# Upper bound for number of items copied at once while checkpointed
+# distance storage is restored.
+RESTORE_BLOCK_ITEMS: int = 1 << 22
+
+# (minimum, column) of lower triangle part of rows of distance matrix
+RowMinimaT = Tuple[NDArray[np.float64], NDArray[np.int64]]
 
 
 @dataclass
@@ -15,9 +75,21 @@ class HCAStep:
     data: List[Cluster]
     distance_selector: DistanceSelectorBase
     distance_matrix: NDArray[np.float64]
+    profiler: Optional[Profiler] = field(
+        default=None, repr=False, compare=False
+    )
+    # first minimum of every row, carried over to next step by reduce()
+    row_minima: Optional[RowMinimaT] = field(
+        default=None, repr=False, compare=False
+    )
 
     def reduce(self) -> "HCAStep":
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.begin()
         to_reduce, height = self._indexes_to_reduce()
+        if profiler is not None:
+            profiler.lap("search")
         new_data = []
         reduced_data = []
         for i, row in enumerate(self.data):
@@ -27,6 +99,7 @@ class HCAStep:
                 new_data.append(row)
 
         new_distance_matrix = self.distance_matrix
+        row_minima = self.row_minima
         if reduced_data:
             new_cluster = Cluster(
                 max(c.ID for c in self.data) + 1, tuple(reduced_data), height
@@ -35,26 +108,55 @@ class HCAStep:
             new_distance_vector = self.distance_selector.new_distance_vector(
                 to_reduce, self.distance_matrix, new_cluster, self.data
             )
+            if profiler is not None:
+                profiler.lap("update")
             new_distance_matrix = self._new_distance_matrix(
                 to_reduce, new_distance_vector
             )
+            row_minima = self._new_row_minima(to_reduce, new_distance_matrix)
+            if profiler is not None:
+                profiler.lap("rebuild", end_step=True)
 
         return HCAStep(
             new_data,
             self.distance_selector,
             new_distance_matrix,
+            profiler,
+            row_minima,
         )
 
     def _indexes_to_reduce(self) -> Tuple[Tuple[int, int], float]:
-        min_value = np.inf
-        index_pair = None
-        for i, row in enumerate(self.distance_matrix):
-            for j in range(i):
-                if row[j] < min_value:
-                    index_pair = (i, j)
-                    min_value = row[j]
-        assert index_pair is not None
-        return index_pair, min_value
+        if self.row_minima is None:
+            self.row_minima = _row_minima(
+                self.distance_matrix, np.arange(len(self.distance_matrix))
+            )
+        minima, columns = self.row_minima
+        # first minimum in row-major order, so ties are resolved with
+        # lowest row first and lowest column second, first row has no
+        # lower triangle part
+        i = 1 + int(np.argmin(minima[1:]))
+        j = int(columns[i])
+        assert i > j, "No pair of clusters to reduce."
+        return (i, j), self.distance_matrix[i, j]
+
+    def _new_row_minima(
+        self,
+        to_reduce: Tuple[int, int],
+        new_distance_matrix: NDArray[np.float64],
+    ) -> RowMinimaT:
+        minima, columns = cast(RowMinimaT, self.row_minima)
+        kept = np.ones(len(minima), dtype=bool)
+        kept[list(to_reduce)] = False
+        minima, columns = minima[kept], columns[kept]
+        # only rows which lost their minimum and row of new cluster are
+        # rescanned, other columns move by number of removed ones before
+        lost = np.flatnonzero(np.isin(columns, to_reduce))
+        columns = columns - (columns > to_reduce[0]) - (columns > to_reduce[1])
+        minima = np.append(minima, np.inf)
+        columns = np.append(columns, 0)
+        rows = np.append(lost, len(minima) - 1)
+        minima[rows], columns[rows] = _row_minima(new_distance_matrix, rows)
+        return minima, columns
 
     def _new_distance_matrix(
         self,
@@ -89,25 +191,72 @@ class HCA:
     data: List[Cluster]
     distance_selector: DistanceSelectorBase
     initial_distance_matrix: Optional[NDArray[np.float64]] = None
-    step: HCAStep = field(init=False)
+    # when not given, result() picks engine suitable for distance_selector
+    engine: Optional[EngineBase] = None
+    # square by default, condensed for condensed initial_distance_matrix
+    storage: Optional[Type[DistanceStorageBase]] = None
+    # directory for memory mapped storage, file is removed after run
+    backing: BackingT = None
+    # computes initial distances, possibly in parallel, when vectorized
+    builder: Optional[TileBuilder] = None
+    # of distance storage, float32 halves memory at cost of precision
+    dtype: DTypeLike = np.float64
+    # file to which merges() writes checkpoints, every checkpoint_every
+    # merges and/or every checkpoint_interval seconds
+    checkpoint: Optional[Union[str, "PathLike[str]"]] = None
+    checkpoint_every: Optional[int] = None
+    checkpoint_interval: Optional[float] = None
+    # opt-in on-disk cache of linkage matrices of finished runs
+    cache: Optional[ResultCache] = None
+    # records time and allocations of phases of run, see Profiler
+    profiler: Optional[Profiler] = None
+    # only records joined by edges are merged, when engine is not given
+    # GraphEngine is used, see GraphEngine for accepted graphs
+    connectivity: Optional[ConnectivityT] = None
+    # legacy step is created on demand, engines allocate their own matrix
+    _step: Optional[HCAStep] = field(init=False, default=None, repr=False)
+    # MatrixEngine run in progress and merges it has done so far
+    _state: Optional[MatrixState] = field(
+        init=False, default=None, repr=False
+    )
+    _z: Optional[NDArray[np.float64]] = field(
+        init=False, default=None, repr=False
+    )
+    # storage file of MatrixEngine run written by last checkpoint
+    _checkpoint_base: Optional["_CheckpointBase"] = field(
+        init=False, default=None, repr=False
+    )
 
     def __post_init__(self) -> None:
+        floating_dtype(self.dtype)
+
+    def _initial_step(self) -> HCAStep:
+        if self.profiler is not None:
+            self.profiler.begin()
         if self.initial_distance_matrix is None:
-            self.initial_distance_matrix = np.array(
-                [
-                    [
-                        self.distance_selector.initial(ob1, ob2)
-                        for ob1 in self.data
-                    ]
-                    for ob2 in self.data
-                ]
+            self.initial_distance_matrix = (
+                self.distance_selector.initial_distance_matrix(self.data)
             )
-        self.step = HCAStep(
-            self.data,
-            self.distance_selector,
-            self.initial_distance_matrix,
+        matrix = self.initial_distance_matrix
+        if matrix.ndim == 1:
+            matrix = square_matrix(matrix)
+        matrix = matrix.astype(self.dtype, copy=False)
+        if self.profiler is not None:
+            self.profiler.lap("initialize")
+        return HCAStep(
+            self.data, self.distance_selector, matrix, self.profiler
         )
 
+    @property
+    def step(self) -> HCAStep:
+        if self._step is None:
+            self._step = self._initial_step()
+        return self._step
+
+    @step.setter
+    def step(self, value: HCAStep) -> None:
+        self._step = value
+
     def reduce(self) -> HCAStep:
         old_step = self.step
         self.step = old_step.reduce()
@@ -127,6 +276,508 @@ class HCA:
         return self.step
 
     def result(self) -> Cluster:
-        for _ in self:
+        for _ in self.merges():
             pass
         return self.step.data[0]
+
+    def merges(self) -> Iterator[Merge]:
+        """Merge remaining clusters, yielding lightweight merge records.
+
+        Unlike iteration over HCA, no HCAStep snapshots are kept, unless
+        selector requires legacy HCAStep path. Engines which find merges
+        out of order (NNChainEngine, MSTEngine) yield them all at once
+        after last merge is found.
+        """
+        engine = self.engine or self._default_engine()
+        if engine is None or self._step is not None:
+            yield from self._step_merges()
+            return
+        if self.cache is None or self._state is not None:
+            yield from self._engine_merges(engine)
+            return
+        key = self._cache_key(engine)
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield from self._cached_merges(cached["z"])
+            return
+        yield from self._engine_merges(engine)
+        self.cache.put(key, {"z": self.linkage().Z()})
+
+    def _engine_merges(self, engine: EngineBase) -> Iterator[Merge]:
+        leaves = tuple(self.data)
+        leaf_ids = [c.ID for c in leaves]
+        first_id = max(leaf_ids) + 1
+
+        def cluster_id(index: int) -> int:
+            if index < len(leaves):
+                return leaf_ids[index]
+            return first_id + index - len(leaves)
+
+        if self._z is None:
+            self._z = np.empty((len(leaves) - 1, 4))
+        z = self._z
+        first_step = 0
+        storage: Optional[DistanceStorageBase] = None
+        if isinstance(engine, MatrixEngine):
+            if self._state is None:
+                self._state = engine.start(
+                    self.data,
+                    self.distance_selector,
+                    self._storage(),
+                    self.profiler,
+                )
+            storage = self._state.storage
+            first_step = self._state.step
+            rows = engine.resume(
+                self._state, self.distance_selector, self.profiler
+            )
+        elif self._checkpointing():
+            raise ValueError("Only MatrixEngine runs can be checkpointed.")
+        else:
+            if (
+                engine.requires_storage
+                or self.initial_distance_matrix is not None
+            ):
+                storage = self._storage()
+            rows = engine.run(
+                self.data, self.distance_selector, storage, self.profiler
+            )
+        last_checkpoint = (first_step, time.monotonic())
+        try:
+            for step, (left, right, height, size) in enumerate(
+                rows, first_step
+            ):
+                merge = Merge(
+                    step,
+                    first_id + step,
+                    cluster_id(left),
+                    cluster_id(right),
+                    float(height),
+                    size,
+                )
+                z[step] = (merge.left, merge.right, merge.height, size)
+                if self._checkpoint_due(step + 1, last_checkpoint):
+                    self.save_checkpoint(cast(str, self.checkpoint))
+                    last_checkpoint = (step + 1, time.monotonic())
+                yield merge
+            self._state = None
+            self._z = None
+        finally:
+            # abandoned MatrixEngine run can be continued or saved later
+            if storage is not None and self._state is None:
+                storage.close()
+        self.step = HCAStep(
+            [Linkage(leaves, z).root],
+            self.distance_selector,
+            np.zeros((1, 1)),
+        )
+        if self._checkpoint_base is not None:
+            # final result replaces checkpoint and its base file
+            self.save_checkpoint(self._checkpoint_base.checkpoint)
+
+    def _cached_merges(self, z: NDArray[np.float64]) -> Iterator[Merge]:
+        linkage = Linkage(tuple(self.data), z)
+        for step, (left, right, height, size) in enumerate(z):
+            yield Merge(
+                step,
+                linkage.first_id + step,
+                int(left),
+                int(right),
+                float(height),
+                int(size),
+            )
+        self.step = HCAStep(
+            [linkage.root], self.distance_selector, np.zeros((1, 1))
+        )
+
+    def _cache_key(self, engine: EngineBase) -> str:
+        if self.initial_distance_matrix is not None:
+            values = self.initial_distance_matrix
+        else:
+            values = to_numpy_array(
+                tuple(cast(RecordBase, c[0]) for c in self.data)
+            )
+        return ResultCache.key(
+            "HCA",
+            values,
+            np.array([c.ID for c in self.data]),
+            np.array([len(c) for c in self.data]),
+            self.distance_selector,
+            engine,
+            np.dtype(self.dtype),
+        )
+
+    def _checkpointing(self) -> bool:
+        return self.checkpoint is not None and (
+            self.checkpoint_every is not None
+            or self.checkpoint_interval is not None
+        )
+
+    def _checkpoint_due(self, step: int, last: Tuple[int, float]) -> bool:
+        if not self._checkpointing():
+            return False
+        last_step, last_time = last
+        if self.checkpoint_every is not None:
+            if step - last_step >= self.checkpoint_every:
+                return True
+        if self.checkpoint_interval is not None:
+            if time.monotonic() - last_time >= self.checkpoint_interval:
+                return True
+        return False
+
+    def save_checkpoint(self, path: Union[str, "PathLike[str]"]) -> None:
+        """Save progress to npz file, file is replaced atomically.
+
+        Progress of MatrixEngine run and of legacy HCAStep iteration is
+        saved, other engines are restarted by resume(). Distance storage
+        of MatrixEngine run is written to separate base file once, later
+        checkpoints to same path only save rows changed since, until
+        they grow too large and new base is written.
+
+        Finished run replaces its checkpoint with final result, which
+        removes base file.
+
+        Checkpoint holds pickled records and options, which resume()
+        restores only from exact numpy, scipy and pathlib classes and
+        already imported optmath classes (or their subclasses, eg.
+        records), still only trusted checkpoints should be resumed.
+        """
+        path = os.fspath(path)
+        options = {
+            f.name: getattr(self, f.name)
+            for f in fields(self)
+            if f.init and f.name not in ("initial_distance_matrix", "profiler")
+        }
+        arrays: Dict[str, Any] = {"version": np.array(CHECKPOINT_VERSION)}
+        arrays.update(_pickled_options("options", options))
+        base = self._checkpoint_base
+        if base is not None and base.checkpoint != path:
+            base = None
+        if self._state is not None and self._z is not None:
+            state = self._state
+            if base is None or _base_outdated(state, base):
+                base = _write_base(path, state)
+            arrays["z"] = self._z[: state.step]
+            arrays["step"] = np.array(state.step)
+            arrays["storage_type"] = _pickled(type(state.storage))
+            arrays["storage_base"] = np.array(os.path.basename(base.file))
+            arrays["base_step"] = np.array(base.step)
+            arrays["base_active"] = base.active
+            changed = _changed_rows(state, base)
+            arrays["changed_rows"] = changed
+            arrays["changed_values"] = state.storage.rows(changed)
+            for name in MatrixState.ARRAYS:
+                arrays[name] = getattr(state, name)
+        else:
+            base = None
+            if self._step is not None:
+                arrays["hca_step"] = _pickled(
+                    replace(self._step, profiler=None)
+                )
+            elif self.initial_distance_matrix is not None:
+                arrays["initial_distance_matrix"] = (
+                    self.initial_distance_matrix
+                )
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as file:
+            np.savez(file, **arrays)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+        # base of previous checkpoint is removed only when it is replaced
+        previous = self._checkpoint_base
+        if (
+            previous is not None
+            and previous.checkpoint == path
+            and (base is None or previous.file != base.file)
+        ):
+            os.remove(previous.file)
+        if base is not None or previous is not None:
+            self._checkpoint_base = base
+
+    @classmethod
+    def resume(cls, path: Union[str, "PathLike[str]"]) -> "HCA":
+        """Restore HCA saved with save_checkpoint().
+
+        Only resume trusted checkpoints, see save_checkpoint().
+        """
+        path = os.fspath(path)
+        with np.load(path) as file:
+            if int(file["version"]) != CHECKPOINT_VERSION:
+                raise ValueError(
+                    f"Unsupported checkpoint version {int(file['version'])}."
+                )
+            algorithm = cls(**_unpickled_options("options", file))
+            if "initial_distance_matrix" in file:
+                algorithm.initial_distance_matrix = file[
+                    "initial_distance_matrix"
+                ]
+            if "hca_step" in file:
+                algorithm.step = _unpickled(file["hca_step"])
+            if "storage_base" in file:
+                base = _CheckpointBase(
+                    path,
+                    os.path.join(
+                        os.path.dirname(path), str(file["storage_base"])
+                    ),
+                    int(file["base_step"]),
+                    file["base_active"],
+                )
+                active = file["active"]
+                storage = _restore_storage(
+                    _unpickled(file["storage_type"]),
+                    base.file,
+                    algorithm.backing,
+                )
+                for row in np.flatnonzero(base.active & ~active):
+                    storage.set_row(int(row), np.inf)
+                for row, values in zip(
+                    file["changed_rows"], file["changed_values"]
+                ):
+                    storage.set_row(int(row), values)
+                algorithm._state = MatrixState(
+                    storage,
+                    active=active,
+                    index=file["index"],
+                    sizes=file["sizes"],
+                    nearest=file["nearest"],
+                    nearest_distance=file["nearest_distance"],
+                    step=int(file["step"]),
+                )
+                algorithm._z = np.empty((len(algorithm.data) - 1, 4))
+                algorithm._z[: len(file["z"])] = file["z"]
+                algorithm._checkpoint_base = base
+        return algorithm
+
+    def _step_merges(self) -> Iterator[Merge]:
+        step = len(self.data) - len(self.step.data)
+        last_checkpoint = (step, time.monotonic())
+        for _ in self:
+            new_cluster = self.step.data[-1]
+            merge = Merge(
+                step,
+                new_cluster.ID,
+                new_cluster.left.ID,
+                new_cluster.right.ID,
+                new_cluster.height,
+                len(new_cluster),
+            )
+            step += 1
+            if self._checkpoint_due(step, last_checkpoint):
+                self.save_checkpoint(cast(str, self.checkpoint))
+                last_checkpoint = (step, time.monotonic())
+            yield merge
+
+    def _default_engine(self) -> Optional[EngineBase]:
+        if self.connectivity is not None:
+            return GraphEngine(self.connectivity)
+        if not self.distance_selector.vectorized:
+            return None
+        # NNChainEngine and MSTEngine resolve equal distances differently
+        # than legacy HCAStep, so they are only used when requested
+        return MatrixEngine()
+
+    def _storage(self) -> DistanceStorageBase:
+        if self.profiler is not None:
+            self.profiler.begin()
+        storage_type = self.storage
+        if storage_type is None:
+            condensed = (
+                self.initial_distance_matrix is not None
+                and self.initial_distance_matrix.ndim == 1
+            )
+            storage_type = CondensedStorage if condensed else SquareStorage
+        if self.initial_distance_matrix is not None:
+            storage = storage_type.from_matrix(
+                self.initial_distance_matrix, self.backing, self.dtype
+            )
+        else:
+            storage = storage_type.from_data(
+                self.data,
+                self.distance_selector,
+                self.backing,
+                self.builder,
+                self.dtype,
+            )
+        if self.profiler is not None:
+            self.profiler.lap("initialize")
+        return storage
+
+    def linkage(self) -> Linkage:
+        root = self.result()
+        if isinstance(root, LinkageCluster):
+            return root.linkage
+        return Linkage.from_cluster(root, tuple(self.data))
+
+
+def _row_minima(
+    matrix: NDArray[np.float64], rows: NDArray[np.int64]
+) -> RowMinimaT:
+    # first minimum of lower triangle part of given rows and its column
+    minima = np.full(len(rows), np.inf, dtype=matrix.dtype)
+    columns = np.zeros(len(rows), dtype=np.int64)
+    for position, row in enumerate(rows):
+        if row > 0:
+            column = int(np.argmin(matrix[row, :row]))
+            columns[position] = column
+            minima[position] = matrix[row, column]
+    return minima, columns
+
+
+@dataclass
+class _CheckpointBase:
+    # distance storage of MatrixEngine run after given merge step, saved
+    # to file next to checkpoint, which holds rows changed since
+    checkpoint: str
+    file: str
+    step: int
+    active: NDArray[np.bool_]
+
+
+def _changed_rows(
+    state: MatrixState, base: _CheckpointBase
+) -> NDArray[np.int64]:
+    # rows of clusters merged since base was written, rows merged into
+    # them are inactive, so they are restored as infinite
+    return np.flatnonzero(
+        state.active & (state.index >= state.storage.size + base.step)
+    )
+
+
+def _base_outdated(state: MatrixState, base: _CheckpointBase) -> bool:
+    # changed rows are saved in checkpoint while they take less than
+    # quarter of square matrix, then new base is written
+    return 4 * len(_changed_rows(state, base)) > state.storage.size
+
+
+def _write_base(path: str, state: MatrixState) -> _CheckpointBase:
+    # new name for every base, so checkpoint which refers to previous
+    # one stays valid until it is replaced
+    file = f"{path}.{uuid.uuid4().hex}.npy"
+    with open(file, "wb") as stream:
+        np.save(stream, state.storage.values)
+        stream.flush()
+        os.fsync(stream.fileno())
+    return _CheckpointBase(path, file, state.step, state.active.copy())
+
+
+def _restore_storage(
+    storage_type: Type[DistanceStorageBase], file: str, backing: BackingT
+) -> DistanceStorageBase:
+    # base is memory mapped and copied in blocks, so it is never loaded
+    # into memory as whole next to restored storage
+    values = np.load(file, mmap_mode="r")
+    if values.ndim == 2:
+        size = len(values)
+    else:
+        size = condensed_size(len(values))
+    storage = storage_type.allocate(size, backing, values.dtype)
+    source = values.reshape(-1)
+    target = storage.values.reshape(-1)
+    for start in range(0, len(source), RESTORE_BLOCK_ITEMS):
+        stop = start + RESTORE_BLOCK_ITEMS
+        target[start:stop] = source[start:stop]
+    del values, source
+    return storage
+
+
+def _pickled(value: Any) -> NDArray[np.uint8]:
+    return np.frombuffer(pickle.dumps(value), dtype=np.uint8)
+
+
+def _unpickled(array: NDArray[np.uint8]) -> Any:
+    return _RestrictedUnpickler(io.BytesIO(array.tobytes())).load()
+
+
+def _pickled_options(name: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    # result cache is saved as plain arrays, its constructor creates
+    # directories, so unpickler does not accept it
+    options = dict(options)
+    cache = options.pop("cache", None)
+    arrays = {name: _pickled(options)}
+    if cache is not None:
+        arrays[f"{name}_cache_directory"] = np.array(str(cache.directory))
+        arrays[f"{name}_cache_max_bytes"] = np.array(cache.max_bytes)
+    return arrays
+
+
+def _unpickled_options(name: str, file: Any) -> Dict[str, Any]:
+    options: Dict[str, Any] = _unpickled(file[name])
+    if f"{name}_cache_directory" in file:
+        options["cache"] = ResultCache(
+            str(file[f"{name}_cache_directory"]),
+            int(file[f"{name}_cache_max_bytes"]),
+        )
+    return options
+
+
+# optmath classes which are extended by users (records, selectors,
+# distances), their subclasses are restored too
+_SAFE_BASES: Tuple[type, ...] = (
+    Cluster,
+    RecordBase,
+    DistanceBase,
+    DistanceSelectorBase,
+    DistanceStorageBase,
+    EngineBase,
+)
+# other classes are restored only when exactly matching, eg. subclasses
+# of ndarray, like memmap, could touch files when called by pickle
+_SAFE_CLASSES: FrozenSet[type] = frozenset(
+    (
+        RecordBatch,
+        RecordView,
+        TileBuilder,
+        HCAStep,
+        Linkage,
+        Profiler,
+        np.ndarray,
+        np.dtype,
+        *set(np.sctypeDict.values()),
+        PurePath,
+        PurePosixPath,
+        PureWindowsPath,
+        Path,
+        PosixPath,
+        WindowsPath,
+        *(
+            getattr(sparse, f"{layout}_{kind}")
+            for layout in ("bsr", "coo", "csc", "csr", "dia", "dok", "lil")
+            for kind in ("matrix", "array")
+            if hasattr(sparse, f"{layout}_{kind}")
+        ),
+    )
+)
+# functions which pickle uses to restore numpy arrays and builtins
+_SAFE_FUNCTIONS: Tuple[Tuple[str, str], ...] = (
+    ("numpy.core.multiarray", "_reconstruct"),
+    ("numpy.core.multiarray", "scalar"),
+    ("numpy._core.multiarray", "_reconstruct"),
+    ("numpy._core.multiarray", "scalar"),
+    ("builtins", "complex"),
+    ("builtins", "frozenset"),
+    ("builtins", "set"),
+    ("builtins", "slice"),
+)
+
+
+class _RestrictedUnpickler(pickle.Unpickler):
+    """Unpickler which does not import modules or call arbitrary code.
+
+    Classes are looked up in modules which are already imported, so
+    classes of records have to be imported before resume().
+    """
+
+    def find_class(self, module: str, name: str) -> Any:
+        if (module, name) in _SAFE_FUNCTIONS:
+            return super().find_class(module, name)
+        value: Any = sys.modules.get(module)
+        for part in name.split("."):
+            value = getattr(value, part, None)
+        if isclass(value) and (
+            value in _SAFE_CLASSES or issubclass(value, _SAFE_BASES)
+        ):
+            return value
+        raise pickle.UnpicklingError(
+            f"{module}.{name} can not be restored from checkpoint."
+        )
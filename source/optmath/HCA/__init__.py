@@ -1,26 +1,87 @@
+from .approximate import (
+    ApproximateHCA,
+    ApproximateResult,
+    ApproximationError,
+    MicroCluster,
+    MicroClustering,
+)
+from .builder import TileBuilder
 from .cluster import Cluster
 from .distance import Chebyshev, Euclidean, Manhattan
 from .distance_selector import (
+    AverageLinkage,
+    CentroidLinkage,
     CompleteLinkage,
     DistanceSelectorBase,
+    MedianLinkage,
     SingleLinkage,
     Ward,
+    WeightedLinkage,
+)
+from .engine import (
+    EngineBase,
+    GraphEngine,
+    MatrixEngine,
+    MSTEngine,
+    NNChainEngine,
 )
 from .HCA import HCA, HCAStep
-from .record import RecordBase, autoscale, to_numpy_array
+from .incremental import IncrementalHCA
+from .knn import KNNHCA, join_components, knn_graph
+from .linkage import Linkage, LinkageCluster, Merge
+from .profiler import PhaseStats, Profiler
+from .record import (
+    Autoscaler,
+    RecordBase,
+    RecordBatch,
+    RecordView,
+    autoscale,
+    to_numpy_array,
+)
+from .storage import CondensedStorage, DistanceStorageBase, SquareStorage
 
 __all__ = [
     "Euclidean",
     "Manhattan",
     "Chebyshev",
     "HCA",
+    "Profiler",
+    "PhaseStats",
+    "ApproximateHCA",
+    "IncrementalHCA",
+    "KNNHCA",
+    "knn_graph",
+    "join_components",
+    "ApproximateResult",
+    "ApproximationError",
+    "MicroCluster",
+    "MicroClustering",
     "DistanceSelectorBase",
     "CompleteLinkage",
     "SingleLinkage",
     "Ward",
+    "AverageLinkage",
+    "WeightedLinkage",
+    "CentroidLinkage",
+    "MedianLinkage",
     "Cluster",
+    "Linkage",
+    "LinkageCluster",
+    "Merge",
     "RecordBase",
+    "RecordBatch",
+    "RecordView",
     "HCAStep",
+    "EngineBase",
+    "GraphEngine",
+    "MatrixEngine",
+    "MSTEngine",
+    "NNChainEngine",
+    "DistanceStorageBase",
+    "SquareStorage",
+    "CondensedStorage",
+    "TileBuilder",
+    "Autoscaler",
     "autoscale",
     "to_numpy_array",
 ]
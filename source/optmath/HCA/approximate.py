@@ -0,0 +1,275 @@
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    cast,
+)
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .cluster import Cluster
+from .distance import Euclidean
+from .distance_selector import DistanceSelectorBase
+from .HCA import HCA
+from .linkage import Linkage
+from .record import RecordBase, RecordBatch, _as_matrix
+
+ChunkT = Union[NDArray[np.float64], RecordBatch]
+
+
+@dataclass(frozen=True)
+class MicroCluster(Cluster):
+    """Leaf standing for weight records, engines use weight as size."""
+
+    weight: int = 1
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_size", self.weight)
+
+
+@dataclass
+class MicroClustering:
+    """Mini-batch k-means compressing data into weighted micro-clusters.
+
+    Every chunk passed to partial_fit() moves centroids towards running
+    means of records assigned to them (Sculley, 2010), so data is seen
+    once and never has to be in memory at once. Centroids are picked
+    at random from first records. Record further from its centroid than
+    two closest centroids from each other replaces one of them, other
+    one absorbs it, so regions missing from first chunks (eg. in sorted
+    data) still get centroids.
+    """
+
+    max_clusters: int
+    seed: int = 0
+    centroids: Optional[NDArray[np.float64]] = field(default=None, init=False)
+    # number of records which moved each centroid so far
+    counts: Optional[NDArray[np.int64]] = field(default=None, init=False)
+
+    def __post_init__(self) -> None:
+        if self.max_clusters < 1:
+            raise ValueError("At least one micro-cluster is required.")
+        self._random = np.random.default_rng(self.seed)
+
+    def partial_fit(self, chunk: ChunkT) -> "MicroClustering":
+        data = _as_matrix(chunk)
+        data = self._initialize(data)
+        if len(data) == 0:
+            return self
+        assert self.centroids is not None and self.counts is not None
+        nearest, distances = self.assign(data)
+        if self._reseed(data, distances):
+            nearest, _ = self.assign(data)
+        chunk_counts = np.bincount(nearest, minlength=len(self.centroids))
+        sums = np.zeros_like(self.centroids)
+        np.add.at(sums, nearest, data)
+        moved = chunk_counts > 0
+        self.counts[moved] += chunk_counts[moved]
+        self.centroids[moved] += (
+            sums[moved] - chunk_counts[moved, None] * self.centroids[moved]
+        ) / self.counts[moved, None]
+        return self
+
+    def fit(self, chunks: Sequence[ChunkT]) -> "MicroClustering":
+        for chunk in chunks:
+            self.partial_fit(chunk)
+        return self
+
+    def assign(
+        self, chunk: ChunkT
+    ) -> Tuple[NDArray[np.int64], NDArray[np.float64]]:
+        """Nearest centroid of every record and distance to it."""
+        if self.centroids is None:
+            raise ValueError("MicroClustering was not fitted.")
+        data = _as_matrix(chunk)
+        nearest = np.empty(len(data), dtype=np.int64)
+        distances = np.empty(len(data))
+        for rows, block in Euclidean().pairwise_chunks(data, self.centroids):
+            nearest[rows] = block.argmin(axis=1)
+            distances[rows] = block[np.arange(len(block)), nearest[rows]]
+        return nearest, distances
+
+    def _reseed(
+        self, data: NDArray[np.float64], distances: NDArray[np.float64]
+    ) -> bool:
+        # merges closest centroids and moves one of them to furthest
+        # record while it is further than they are, distances of
+        # records are only lowered meanwhile, returns True if anything
+        # changed
+        assert self.centroids is not None and self.counts is not None
+        centroids, counts = self.centroids, self.counts
+        if len(centroids) < 2:
+            return False
+        distance = Euclidean()
+        distances = distances.copy()
+        pairs = distance.pairwise(centroids)
+        np.fill_diagonal(pairs, np.inf)
+        changed = False
+        for _ in range(len(centroids)):
+            far = int(distances.argmax())
+            kept, moved = np.unravel_index(int(pairs.argmin()), pairs.shape)
+            if distances[far] <= pairs[kept, moved]:
+                break
+            total = counts[kept] + counts[moved]
+            if total > 0:
+                centroids[kept] = (
+                    counts[kept] * centroids[kept]
+                    + counts[moved] * centroids[moved]
+                ) / total
+            counts[kept] = total
+            # new centroid is fitted from scratch by records of chunk
+            centroids[moved] = data[far]
+            counts[moved] = 0
+            for index in (kept, moved):
+                pairs[index] = distance.pairwise(
+                    centroids[index : index + 1], centroids
+                )[0]
+                pairs[:, index] = pairs[index]
+                pairs[index, index] = np.inf
+            seeded = distance.pairwise(data, centroids[moved : moved + 1])
+            np.minimum(distances, seeded[:, 0], out=distances)
+            distances[far] = 0.0
+            changed = True
+        return changed
+
+    def _initialize(self, data: NDArray[np.float64]) -> NDArray[np.float64]:
+        # first records become centroids until there are max_clusters
+        # of them, returns records left to fit
+        have = 0 if self.centroids is None else len(self.centroids)
+        if have == self.max_clusters:
+            return data
+        taken = min(self.max_clusters - have, len(data))
+        picked = self._random.permutation(len(data))
+        new = data[np.sort(picked[:taken])]
+        if self.centroids is None or self.counts is None:
+            self.centroids = new.copy()
+            self.counts = np.ones(taken, dtype=np.int64)
+        else:
+            self.centroids = np.concatenate((self.centroids, new))
+            self.counts = np.concatenate(
+                (self.counts, np.ones(taken, dtype=np.int64))
+            )
+        return data[np.sort(picked[taken:])]
+
+
+@dataclass(frozen=True)
+class ApproximationError:
+    """Distances of records to centroids of their micro-clusters."""
+
+    micro_clusters: int
+    mean_distance: float
+    max_distance: float
+    # sum of squared distances
+    inertia: float
+
+    @classmethod
+    def from_distances(
+        cls, micro_clusters: int, distances: NDArray[np.float64]
+    ) -> "ApproximationError":
+        return cls(
+            micro_clusters,
+            float(distances.mean()),
+            float(distances.max()),
+            float((distances**2).sum()),
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "micro_clusters": self.micro_clusters,
+            "mean_distance": self.mean_distance,
+            "max_distance": self.max_distance,
+            "inertia": self.inertia,
+        }
+
+
+@dataclass(frozen=True)
+class ApproximateResult:
+    # linkage of micro-clusters, leaf IDs are micro-cluster numbers
+    linkage: Linkage
+    # micro-cluster (leaf position in linkage) of every record
+    assignment: NDArray[np.int64]
+    error: ApproximationError
+
+    def labels(
+        self,
+        k: Optional[int] = None,
+        height: Optional[float] = None,
+        size: Optional[int] = None,
+    ) -> NDArray[np.int32]:
+        """Flat cluster label of every record, see Linkage.labels()."""
+        return self.linkage.labels(k, height, size)[self.assignment]
+
+
+@dataclass
+class ApproximateHCA:
+    """HCA of weighted micro-clusters instead of records.
+
+    Data is compressed with MicroClustering (always in Euclidean space)
+    and HCA is run on centroids, with micro-cluster weights used as
+    cluster sizes by Lance-Williams updates. Records are assigned to
+    micro-clusters in second pass over chunks, which also measures
+    approximation error, so chunks have to be a sequence, iterators
+    and generators are rejected with TypeError. Micro-clusters left
+    without records are dropped.
+    """
+
+    chunks: Union[RecordBatch, Sequence[RecordBatch]]
+    distance_selector: DistanceSelectorBase
+    max_clusters: int = 1000
+    seed: int = 0
+    # passed to HCA of micro-clusters, eg. engine or dtype
+    hca_options: Dict[str, Any] = field(default_factory=dict)
+
+    def result(self) -> ApproximateResult:
+        if isinstance(self.chunks, Iterator):
+            raise TypeError(
+                "Chunks are read twice, they have to be a sequence, "
+                "not an iterator."
+            )
+        chunks = (
+            [self.chunks]
+            if isinstance(self.chunks, RecordBatch)
+            else self.chunks
+        )
+        clustering = MicroClustering(self.max_clusters, self.seed)
+        clustering.fit(chunks)
+        assignments: List[NDArray[np.int64]] = []
+        distances: List[NDArray[np.float64]] = []
+        for chunk in chunks:
+            nearest, distance = clustering.assign(chunk)
+            assignments.append(nearest)
+            distances.append(distance)
+        assignment = np.concatenate(assignments)
+        weights = np.bincount(assignment, minlength=self.max_clusters)
+        used = np.flatnonzero(weights)
+        position = np.cumsum(weights > 0) - 1
+        assert clustering.centroids is not None
+        centroids = RecordBatch(
+            chunks[0].record_type,
+            np.arange(len(used)),
+            clustering.centroids[used],
+        )
+        # views of centroids stand in for records
+        leaves: List[Cluster] = [
+            MicroCluster(
+                index,
+                (cast(RecordBase, view),),
+                weight=int(weights[used[index]]),
+            )
+            for index, view in enumerate(centroids)
+        ]
+        algorithm = HCA(leaves, self.distance_selector, **self.hca_options)
+        return ApproximateResult(
+            algorithm.linkage(),
+            position[assignment],
+            ApproximationError.from_distances(
+                len(used), np.concatenate(distances)
+            ),
+        )
@@ -0,0 +1,137 @@
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from dataclasses import dataclass
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .distance.distance import PAIRWISE_BLOCK_ITEMS, DistanceBase
+
+if TYPE_CHECKING:
+    from .storage import DistanceStorageBase
+
+TileT = Tuple[int, int, int, int]
+
+# records and distance of process pool worker, set by its initializer
+_WORKER_STATE: List[Tuple[NDArray[np.float64], DistanceBase]] = []
+
+
+@dataclass(frozen=True)
+class TileBuilder:
+    """Fills distance storage with tiles of pairwise distances.
+
+    Only tiles on and above diagonal are computed. With more than one
+    worker, tiles are computed in thread pool, or in process pool when
+    processes is True, but storage is written only by calling thread.
+    Every distance is computed exactly as in serial run, so result does
+    not depend on workers and tile_size.
+    """
+
+    workers: int = 1
+    # rows and columns of tile, by default tiles are row blocks of whole
+    # matrix width holding about PAIRWISE_BLOCK_ITEMS items of records
+    tile_size: Optional[int] = None
+    processes: bool = False
+
+    def __post_init__(self) -> None:
+        if self.workers < 1:
+            raise ValueError("At least one worker is required.")
+        if self.tile_size is not None and self.tile_size < 1:
+            raise ValueError("Tile size must be positive.")
+
+    def fill(
+        self,
+        storage: "DistanceStorageBase",
+        records: NDArray[np.float64],
+        distance: DistanceBase,
+    ) -> None:
+        tiles = self.tiles(len(records), records.shape[1])
+        if self.workers == 1:
+            for tile in tiles:
+                storage.set_tile(
+                    tile[0], tile[2], _tile(records, distance, tile)
+                )
+            return
+        with self._executor(records, distance) as executor:
+            # number of tiles in flight is bounded, so finished tiles do
+            # not pile up in memory while storage is written
+            pending: Dict[Future, TileT] = {}
+            for tile in tiles:
+                if len(pending) >= 2 * self.workers:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    self._store(storage, pending, done)
+                if self.processes:
+                    future = executor.submit(_worker_tile, tile)
+                else:
+                    future = executor.submit(_tile, records, distance, tile)
+                pending[future] = tile
+            self._store(storage, pending, as_completed(list(pending)))
+
+    def _store(
+        self,
+        storage: "DistanceStorageBase",
+        pending: Dict[Future, TileT],
+        done: Iterable[Future],
+    ) -> None:
+        for future in done:
+            tile = pending.pop(future)
+            storage.set_tile(tile[0], tile[2], future.result())
+
+    def tiles(self, size: int, dimensions: int) -> Iterator[TileT]:
+        """Yield (row start, row stop, column start, column stop)."""
+        if self.tile_size is None:
+            step = max(1, PAIRWISE_BLOCK_ITEMS // max(1, size * dimensions))
+            for start in range(0, size, step):
+                yield start, min(size, start + step), start, size
+            return
+        step = self.tile_size
+        for row in range(0, size, step):
+            for column in range(row, size, step):
+                yield row, min(size, row + step), column, min(
+                    size, column + step
+                )
+
+    def _executor(
+        self, records: NDArray[np.float64], distance: DistanceBase
+    ) -> Executor:
+        if self.processes:
+            return ProcessPoolExecutor(
+                self.workers,
+                initializer=_init_worker,
+                initargs=(records, distance),
+            )
+        return ThreadPoolExecutor(self.workers)
+
+
+def _tile(
+    records: NDArray[np.float64], distance: DistanceBase, tile: TileT
+) -> NDArray[np.float64]:
+    row, row_stop, column, column_stop = tile
+    return distance.pairwise(
+        records[row:row_stop], records[column:column_stop]
+    )
+
+
+def _init_worker(records: NDArray[np.float64], distance: DistanceBase) -> None:
+    _WORKER_STATE[:] = [(records, distance)]
+
+
+def _worker_tile(tile: TileT) -> NDArray[np.float64]:
+    records, distance = _WORKER_STATE[0]
+    return _tile(records, distance, tile)
@@ -1,11 +1,23 @@
 from dataclasses import dataclass
-from typing import Any, Iterator, List, Tuple, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
 
 import numpy as np
 from numpy.typing import NDArray
 
 from .record import RecordBase
 
+if TYPE_CHECKING:
+    from .linkage import Linkage
+
 ZMatrixRowT = Tuple[int, int, float, int]
 
 ClusterOrRecord = Union["Cluster", RecordBase]
@@ -40,28 +52,53 @@ class Cluster:
     def __str__(self) -> str:
         return f"Cluster(ID={self.ID},s={len(self)},h={self.height:.3f})"
 
+    def __post_init__(self) -> None:
+        # cached, as recursive size would make len() linear in subtree size
+        object.__setattr__(self, "_size", sum(len(o) for o in self.ob_list))
+
     def __len__(self) -> int:
-        return sum(len(o) for o in self.ob_list)
+        return cast(int, self.__dict__["_size"])
 
     def Z(self) -> NDArray[np.float64]:
         offset = len(self)
-        z_matrix = [(0, 0, 0.0, 0)] * (self.ID - offset + 1)
-        return np.array(
-            self._z_matrix(
-                z_matrix,
-                offset,
-            )
-        )
-
-    def _z_matrix(
-        self, z: List[Tuple[int, int, float, int]], offset: int
-    ) -> List[ZMatrixRowT]:
-        if not self.left._is_leaf():
-            self.left._z_matrix(z, offset)
-        if not self.right._is_leaf():
-            self.right._z_matrix(z, offset)
-        z[self.ID - offset] = self._z_matrix_row()
-        return z
+        z_matrix: List[ZMatrixRowT] = [(0, 0, 0.0, 0)] * (self.ID - offset + 1)
+        # iterative walk, deep trees would exceed recursion limit
+        stack: List[Cluster] = [self]
+        while stack:
+            cluster = stack.pop()
+            z_matrix[cluster.ID - offset] = cluster._z_matrix_row()
+            for child in (cluster.left, cluster.right):
+                if not child._is_leaf():
+                    stack.append(child)
+        return np.array(z_matrix)
+
+    def labels(
+        self,
+        k: Optional[int] = None,
+        height: Optional[float] = None,
+        size: Optional[int] = None,
+    ) -> NDArray[np.int32]:
+        """Flat cluster labels of leaves, see Linkage.labels()."""
+        return self._as_linkage().labels(k, height, size)
+
+    def labels_all_levels(self) -> NDArray[np.int32]:
+        return self._as_linkage().labels_all_levels()
+
+    def leaves(self) -> Tuple["Cluster", ...]:
+        leaves: List[Cluster] = []
+        stack: List[Cluster] = [self]
+        while stack:
+            cluster = stack.pop()
+            if cluster._is_leaf():
+                leaves.append(cluster)
+            else:
+                stack.extend((cluster.left, cluster.right))
+        return tuple(sorted(leaves, key=lambda c: c.ID))
+
+    def _as_linkage(self) -> "Linkage":
+        from .linkage import Linkage
+
+        return Linkage.from_cluster(self, self.leaves())
 
     def _is_leaf(self) -> bool:
         return len(self.ob_list) == 1
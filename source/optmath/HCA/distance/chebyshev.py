@@ -1,6 +1,7 @@
 from typing import cast
 
 import numpy as np
+from numpy.typing import NDArray
 
 from ..record import RecordBase
 from .distance import DistanceBase
@@ -9,3 +10,11 @@ from .distance import DistanceBase
 class Chebyshev(DistanceBase):
     def __call__(self, first: RecordBase, second: RecordBase) -> float:
         return cast(float, np.max(np.abs(first.numeric() - second.numeric())))
+
+    def _pairwise_block(
+        self, X: NDArray[np.float64], Y: NDArray[np.float64]
+    ) -> NDArray[np.float64]:
+        return cast(
+            NDArray[np.float64],
+            np.max(np.abs(X[:, None, :] - Y[None, :, :]), axis=-1),
+        )
@@ -1,9 +1,96 @@
 from abc import ABC, abstractmethod
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
 
 from ..record import RecordBase
 
+# Upper bound for number of float64 items in temporary arrays
+# created while computing single block of pairwise distances.
+PAIRWISE_BLOCK_ITEMS: int = 1 << 22
+
 
 class DistanceBase(ABC):
     @abstractmethod
     def __call__(self, first: RecordBase, second: RecordBase) -> float:
         ...
+
+    def pairwise(
+        self,
+        X: NDArray[np.float64],
+        Y: Optional[NDArray[np.float64]] = None,
+    ) -> NDArray[np.float64]:
+        """Compute matrix of distances between rows of X and rows of Y.
+
+        When Y is omitted, distances between rows of X are computed.
+        Subclasses opt in by implementing `_pairwise_block()`, otherwise
+        NotImplementedError is raised and callers have to fall back to
+        per-pair `__call__()`.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        Y = X if Y is None else np.asarray(Y, dtype=np.float64)
+        result = np.empty((len(X), len(Y)), dtype=np.float64)
+        step = max(1, PAIRWISE_BLOCK_ITEMS // max(1, Y.size))
+        for start in range(0, len(X), step):
+            result[start : start + step] = self._pairwise_block(
+                X[start : start + step], Y
+            )
+        return result
+
+    def pairwise_chunks(
+        self,
+        X: NDArray[np.float64],
+        Y: Optional[NDArray[np.float64]] = None,
+        block_rows: Optional[int] = None,
+        memory_limit: Optional[int] = None,
+    ) -> Iterator[Tuple[slice, NDArray[np.float64]]]:
+        """Yield (row slice of X, distances of these rows to rows of Y).
+
+        Full matrix is never materialized. Blocks have at most block_rows
+        rows and, with memory_limit given in bytes, are small enough for
+        block and temporaries created while computing it to fit in it.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        Y = X if Y is None else np.asarray(Y, dtype=np.float64)
+        for rows in self._row_slices(X, Y, block_rows, memory_limit):
+            yield rows, self.pairwise(X[rows], Y)
+
+    def _row_items(self, Y: NDArray[np.float64]) -> int:
+        """Number of float64 items allocated per row of block."""
+        # broadcast difference and its elementwise function are alive
+        # at once, reduced row, its function and returned row are not
+        return 2 * Y.size + 3 * len(Y)
+
+    def _row_slices(
+        self,
+        X: NDArray[np.float64],
+        Y: NDArray[np.float64],
+        block_rows: Optional[int],
+        memory_limit: Optional[int],
+    ) -> Iterator[slice]:
+        items = PAIRWISE_BLOCK_ITEMS
+        if memory_limit is not None:
+            items = memory_limit // np.dtype(np.float64).itemsize
+        step = max(1, items // max(1, self._row_items(Y)))
+        if block_rows is not None:
+            step = max(1, min(step, block_rows))
+        for start in range(0, len(X), step):
+            yield slice(start, min(len(X), start + step))
+
+    @property
+    def vectorized(self) -> bool:
+        # block kernel is only valid for __call__ it was written for, so
+        # subclass customizing __call__ alone falls back to per-pair path
+        block = _defining_class(type(self), "_pairwise_block")
+        call = _defining_class(type(self), "__call__")
+        return block is not DistanceBase and issubclass(block, call)
+
+    def _pairwise_block(
+        self, X: NDArray[np.float64], Y: NDArray[np.float64]
+    ) -> NDArray[np.float64]:
+        raise NotImplementedError()
+
+
+def _defining_class(cls: type, name: str) -> type:
+    return next(base for base in cls.__mro__ if name in base.__dict__)
@@ -1,6 +1,7 @@
-from typing import cast
+from typing import Iterator, Optional, Tuple, cast
 
 import numpy as np
+from numpy.typing import NDArray
 
 from ..record import RecordBase
 from .distance import DistanceBase
@@ -11,3 +12,44 @@ class Euclidean(DistanceBase):
         return cast(
             float, np.sqrt(np.sum((first.numeric() - second.numeric()) ** 2))
         )
+
+    def _pairwise_block(
+        self, X: NDArray[np.float64], Y: NDArray[np.float64]
+    ) -> NDArray[np.float64]:
+        return cast(
+            NDArray[np.float64],
+            np.sqrt(np.sum((X[:, None, :] - Y[None, :, :]) ** 2, axis=-1)),
+        )
+
+    def pairwise_chunks(
+        self,
+        X: NDArray[np.float64],
+        Y: Optional[NDArray[np.float64]] = None,
+        block_rows: Optional[int] = None,
+        memory_limit: Optional[int] = None,
+    ) -> Iterator[Tuple[slice, NDArray[np.float64]]]:
+        """Same as DistanceBase.pairwise_chunks(), using matrix product.
+
+        Distances are computed as sqrt(|x|^2 + |y|^2 - 2xy), which is
+        much faster, but not bit-identical to pairwise(), results may
+        differ by rounding errors.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        same = Y is None
+        Y = X if Y is None else np.asarray(Y, dtype=np.float64)
+        y_squared = np.einsum("ij,ij->i", Y, Y)
+        for rows in self._row_slices(X, Y, block_rows, memory_limit):
+            block = X[rows] @ Y.T
+            block *= -2.0
+            block += np.einsum("ij,ij->i", X[rows], X[rows])[:, None]
+            block += y_squared
+            np.maximum(block, 0.0, out=block)
+            np.sqrt(block, out=block)
+            if same:
+                # rounding must not move points away from themselves
+                index = np.arange(rows.start, rows.stop)
+                block[index - rows.start, index] = 0.0
+            yield rows, block
+
+    def _row_items(self, Y: NDArray[np.float64]) -> int:
+        return 2 * len(Y)
@@ -1,11 +1,19 @@
+from .average import AverageLinkage
+from .centroid import CentroidLinkage
 from .complete import CompleteLinkage
+from .median import MedianLinkage
 from .selector import DistanceSelectorBase
 from .single import SingleLinkage
 from .ward import Ward
+from .weighted import WeightedLinkage
 
 __all__ = [
+    "AverageLinkage",
+    "CentroidLinkage",
     "CompleteLinkage",
     "DistanceSelectorBase",
+    "MedianLinkage",
     "SingleLinkage",
     "Ward",
+    "WeightedLinkage",
 ]
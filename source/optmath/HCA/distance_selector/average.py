@@ -0,0 +1,23 @@
+from typing import ClassVar
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .selector import DistanceSelectorBase, LanceWilliamsT
+
+
+class AverageLinkage(DistanceSelectorBase):
+    """UPGMA, mean distance between records of both clusters."""
+
+    reducible: ClassVar[bool] = True
+
+    def lance_williams(
+        self, left_size: float, right_size: float, _: NDArray[np.float64]
+    ) -> LanceWilliamsT:
+        total_item_count = left_size + right_size
+        return (
+            left_size / total_item_count,
+            right_size / total_item_count,
+            0.0,
+            0.0,
+        )
@@ -0,0 +1,28 @@
+from typing import ClassVar
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .selector import DistanceSelectorBase, LanceWilliamsT
+
+
+class MedianLinkage(DistanceSelectorBase):
+    """WPGMC, distance between midpoints, meaningful for Euclidean."""
+
+    squared: ClassVar[bool] = True
+    height_dependent: ClassVar[bool] = True
+
+    def lance_williams(
+        self, _: float, __: float, ___: NDArray[np.float64]
+    ) -> LanceWilliamsT:
+        return 0.5, 0.5, -0.25, 0.0
+
+    def merged_centroid(
+        self,
+        first: NDArray[np.float64],
+        second: NDArray[np.float64],
+        _: float,
+        __: float,
+    ) -> NDArray[np.float64]:
+        # midpoint, regardless of sizes
+        return (first + second) / 2
@@ -1,24 +1,54 @@
 from dataclasses import dataclass
-from typing import List, Tuple, cast
+from typing import ClassVar, List, Tuple, Union, cast
 
 import numpy as np
 from numpy.typing import NDArray
 
-from optmath.HCA.record import RecordBase
+from optmath.HCA.record import RecordBase, to_numpy_array
 
 from ..cluster import Cluster
 from ..distance import DistanceBase
 
+CoefficientT = Union[float, NDArray[np.float64]]
+LanceWilliamsT = Tuple[CoefficientT, CoefficientT, CoefficientT, CoefficientT]
+
 
 @dataclass(frozen=True)
 class DistanceSelectorBase:
     distance: DistanceBase
+    # Reducible linkages never make merged cluster closer to other cluster
+    # than its parts were, so they can be computed with NNChainEngine.
+    reducible: ClassVar[bool] = False
+    # Merged distance depends on distance between merged clusters (beta
+    # of Lance-Williams formula), so distances of both of them to other
+    # cluster are needed, GraphEngine computes it from centroids instead.
+    height_dependent: ClassVar[bool] = False
+    # Lance-Williams formula is applied to squared distances.
+    squared: ClassVar[bool] = False
 
     def initial(self, first: Cluster, second: Cluster) -> float:
         return self.distance(
             cast(RecordBase, first[0]), cast(RecordBase, second[0])
         )
 
+    def initial_distance_matrix(
+        self, data: List[Cluster]
+    ) -> NDArray[np.float64]:
+        if self.batched:
+            records = tuple(cast(RecordBase, c[0]) for c in data)
+            return self.distance.pairwise(to_numpy_array(records))
+        return np.array(
+            [[self.initial(ob1, ob2) for ob1 in data] for ob2 in data]
+        )
+
+    @property
+    def batched(self) -> bool:
+        # batched path is only valid as long as initial() was not customized
+        return (
+            type(self).initial is DistanceSelectorBase.initial
+            and self.distance.vectorized
+        )
+
     def new_distance_vector(
         self,
         to_reduce: Tuple[int, int],
@@ -26,4 +56,101 @@ class DistanceSelectorBase:
         new_cluster: Cluster,
         old_data: List[Cluster],
     ) -> NDArray[np.float64]:
+        # to_reduce holds position of right cluster first
+        right, left = to_reduce
+        others = np.ones(len(distance_matrix), dtype=bool)
+        others[list(to_reduce)] = False
+        sizes = np.array(
+            [len(c) for c in old_data], dtype=distance_matrix.dtype
+        )
+        return self.update(
+            distance_matrix[left, others],
+            distance_matrix[right, others],
+            new_cluster.height,
+            sizes[left],
+            sizes[right],
+            sizes[others],
+        )
+
+    def lance_williams(
+        self,
+        left_size: float,
+        right_size: float,
+        sizes: NDArray[np.float64],
+    ) -> LanceWilliamsT:
+        """Coefficients (alpha left, alpha right, beta, gamma) of Lance-
+        Williams formula for merged cluster and clusters of given sizes.
+        """
         raise NotImplementedError()
+
+    def centroid_distances(
+        self,
+        first: NDArray[np.float64],
+        second: NDArray[np.float64],
+        first_sizes: NDArray[np.float64],
+        second_sizes: NDArray[np.float64],
+    ) -> NDArray[np.float64]:
+        """Euclidean distances of clusters given by rows of centroids.
+
+        Used by GraphEngine for height dependent selectors, which are
+        defined by cluster centroids in Euclidean space.
+        """
+        return cast(
+            NDArray[np.float64],
+            np.sqrt(np.sum((first - second) ** 2, axis=-1)),
+        )
+
+    def merged_centroid(
+        self,
+        first: NDArray[np.float64],
+        second: NDArray[np.float64],
+        first_size: float,
+        second_size: float,
+    ) -> NDArray[np.float64]:
+        """Centroid of cluster merged from two clusters, see above."""
+        return (first_size * first + second_size * second) / (
+            first_size + second_size
+        )
+
+    def update(
+        self,
+        left_distances: NDArray[np.float64],
+        right_distances: NDArray[np.float64],
+        height: float,
+        left_size: float,
+        right_size: float,
+        sizes: NDArray[np.float64],
+    ) -> NDArray[np.float64]:
+        """Compute distances from merged cluster to all other clusters.
+
+        Vectorized counterpart of new_distance_vector(), left cluster is
+        the one with lower position (index), sizes hold number of records
+        in clusters corresponding to elements of distance vectors.
+        """
+        alpha_left, alpha_right, beta, gamma = self.lance_williams(
+            left_size, right_size, sizes
+        )
+        if self.squared:
+            left_distances = left_distances**2
+            right_distances = right_distances**2
+            height = height**2
+        distances = (
+            alpha_left * left_distances
+            + alpha_right * right_distances
+            + beta * height
+        )
+        if np.any(gamma):
+            distances = distances + gamma * np.abs(
+                left_distances - right_distances
+            )
+        if self.squared:
+            return np.sqrt(distances)
+        return distances
+
+    @property
+    def vectorized(self) -> bool:
+        base = DistanceSelectorBase
+        return (
+            type(self).lance_williams is not base.lance_williams
+            or type(self).update is not base.update
+        )
@@ -1,25 +1,27 @@
-from typing import List, Tuple
+from typing import ClassVar
 
 import numpy as np
 from numpy.typing import NDArray
 
-from ..cluster import Cluster
-from .selector import DistanceSelectorBase
+from .selector import DistanceSelectorBase, LanceWilliamsT
 
 
 class SingleLinkage(DistanceSelectorBase):
-    def new_distance_vector(
+    reducible: ClassVar[bool] = True
+
+    def lance_williams(
+        self, _: float, __: float, ___: NDArray[np.float64]
+    ) -> LanceWilliamsT:
+        return 0.5, 0.5, 0.0, -0.5
+
+    def update(
         self,
-        to_reduce: Tuple[int, int],
-        distance_matrix: NDArray[np.float64],
-        _: Cluster,
-        __: List[Cluster],
+        left_distances: NDArray[np.float64],
+        right_distances: NDArray[np.float64],
+        _: float,
+        __: float,
+        ___: float,
+        ____: NDArray[np.float64],
     ) -> NDArray[np.float64]:
-        old_size = len(distance_matrix)
-        return np.array(
-            [
-                min(distance_matrix[to_reduce, i])
-                for i in range(old_size)
-                if i not in to_reduce
-            ]
-        )
+        # exact equivalent of Lance-Williams formula, free of rounding
+        return np.minimum(left_distances, right_distances)
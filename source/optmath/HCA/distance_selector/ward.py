@@ -1,50 +1,46 @@
-from typing import List, Tuple
+from typing import ClassVar
 
 import numpy as np
 from numpy.typing import NDArray
 
-from ..cluster import Cluster
-from .selector import DistanceSelectorBase
+from .selector import DistanceSelectorBase, LanceWilliamsT
 
 
 class Ward(DistanceSelectorBase):
-    def new_distance_vector(
-        self,
-        to_reduce: Tuple[int, int],
-        distance_matrix: NDArray[np.float64],
-        new_cluster: Cluster,
-        full_cluster_list: List[Cluster],
-    ) -> NDArray[np.float64]:
-        old_size = len(distance_matrix)
-        new_vector = []
-
-        for i in range(old_size):
-            if i not in to_reduce:
-                other_cluster = full_cluster_list[i]
-                total_item_count = (
-                    len(new_cluster.left)
-                    + len(new_cluster.right)
-                    + len(other_cluster)
-                )
-                a = _alpha(new_cluster, other_cluster, total_item_count)
-                b = _beta(new_cluster, other_cluster, total_item_count)
-                c = _gamma(other_cluster, total_item_count)
-                ac_distance, bc_distance = distance_matrix[to_reduce, i]
-                distance = (
-                    a * ac_distance + b * bc_distance + c * new_cluster.height
-                )
-                new_vector.append(distance)
-
-        return np.array(new_vector)
-
+    """Ward linkage with Lance-Williams formula applied to distances.
 
-def _alpha(new: Cluster, other: Cluster, total_item_count: int) -> float:
-    return (len(new.left) + len(other)) / (total_item_count)
+    scipy and sklearn apply it to squared Euclidean distances, which is
+    the same as sqrt(2 * increase of sum of squares) of merge computed
+    from centroids. GraphEngine computes Ward that way, so on graphs its
+    heights are the ones of scipy, not the ones of MatrixEngine.
+    """
 
+    reducible: ClassVar[bool] = True
+    height_dependent: ClassVar[bool] = True
 
-def _beta(new: Cluster, other: Cluster, total_item_count: int) -> float:
-    return (len(new.right) + len(other)) / (total_item_count)
-
-
-def _gamma(other: Cluster, total_item_count: int) -> float:
-    return (-len(other)) / (total_item_count)
+    def lance_williams(
+        self,
+        left_size: float,
+        right_size: float,
+        sizes: NDArray[np.float64],
+    ) -> LanceWilliamsT:
+        total_item_count = left_size + right_size + sizes
+        return (
+            (left_size + sizes) / total_item_count,
+            (right_size + sizes) / total_item_count,
+            -sizes / total_item_count,
+            0.0,
+        )
+
+    def centroid_distances(
+        self,
+        first: NDArray[np.float64],
+        second: NDArray[np.float64],
+        first_sizes: NDArray[np.float64],
+        second_sizes: NDArray[np.float64],
+    ) -> NDArray[np.float64]:
+        # sqrt(2 * increase of sum of squared distances to centroid)
+        scale = 2 * first_sizes * second_sizes / (first_sizes + second_sizes)
+        return np.sqrt(scale) * super().centroid_distances(
+            first, second, first_sizes, second_sizes
+        )
@@ -0,0 +1,17 @@
+from typing import ClassVar
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .selector import DistanceSelectorBase, LanceWilliamsT
+
+
+class WeightedLinkage(DistanceSelectorBase):
+    """WPGMA, mean of distances from both merged clusters."""
+
+    reducible: ClassVar[bool] = True
+
+    def lance_williams(
+        self, _: float, __: float, ___: NDArray[np.float64]
+    ) -> LanceWilliamsT:
+        return 0.5, 0.5, 0.0, 0.0
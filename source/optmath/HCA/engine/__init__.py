@@ -0,0 +1,15 @@
+from .engine import EngineBase
+from .graph import ConnectivityT, GraphEngine
+from .matrix import MatrixEngine, MatrixState
+from .mst import MSTEngine
+from .nn_chain import NNChainEngine
+
+__all__ = [
+    "ConnectivityT",
+    "EngineBase",
+    "GraphEngine",
+    "MatrixEngine",
+    "MatrixState",
+    "MSTEngine",
+    "NNChainEngine",
+]
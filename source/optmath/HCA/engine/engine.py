@@ -0,0 +1,31 @@
+from abc import ABC, abstractmethod
+from typing import ClassVar, Iterator, List, Optional, Tuple
+
+from ..cluster import Cluster
+from ..distance_selector import DistanceSelectorBase
+from ..profiler import Profiler
+from ..storage import DistanceStorageBase
+
+# (left, right, height, size) where left and right are cluster indexes,
+# 0..n-1 for initial clusters and n+k for cluster created in k-th merge,
+# left is always lower than right, same as in scipy linkage matrix.
+MergeRowT = Tuple[int, int, float, int]
+
+
+class EngineBase(ABC):
+    # engines which do not require storage only get one for given matrix
+    requires_storage: ClassVar[bool] = True
+
+    @abstractmethod
+    def run(
+        self,
+        data: List[Cluster],
+        distance_selector: DistanceSelectorBase,
+        storage: Optional[DistanceStorageBase] = None,
+        profiler: Optional[Profiler] = None,
+    ) -> Iterator[MergeRowT]:
+        """Merge clusters, storage is owned and modified by engine.
+
+        When profiler is given, engine reports its phases to it, see
+        Profiler.
+        """
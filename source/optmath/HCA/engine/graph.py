@@ -0,0 +1,297 @@
+import heapq
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union, cast
+
+import numpy as np
+from numpy.typing import NDArray
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from ..cluster import Cluster
+from ..distance import Euclidean
+from ..distance_selector import DistanceSelectorBase
+from ..profiler import Profiler
+from ..record import RecordBase, to_numpy_array
+from ..storage import DistanceStorageBase
+from .engine import EngineBase, MergeRowT
+
+# sparse adjacency matrix or sequence of (first, second) record indexes
+ConnectivityT = Union[
+    sparse.spmatrix, NDArray[np.int64], Sequence[Tuple[int, int]]
+]
+
+
+class GraphEngine(EngineBase):
+    """Engine merging only clusters connected by edges of graph.
+
+    Distances are kept only for pairs of clusters joined by an edge,
+    merged cluster inherits edges of both its parts, and candidate
+    merges are kept in heap, so time and memory depend on number of
+    edges instead of n^2. Lance-Williams formula is applied only along
+    edges, distance missing for one of parts is taken equal to distance
+    known for the other one, so single and complete linkage are minimum
+    and maximum of distances along edges between clusters. For complete
+    graph result is the same as the one of MatrixEngine, except for
+    order of merges of equal height.
+
+    Selectors depending on distance between merged clusters (Ward,
+    centroid and median, see DistanceSelectorBase.height_dependent) are
+    not defined by edges alone, so, same as sklearn ward_tree, centroid
+    and size of every cluster is kept and distance along edge is
+    computed from them, which requires Euclidean distance of records
+    (distance matrix given to HCA is not used).
+    Centroid and median linkage are the same as with MatrixEngine, Ward
+    is the one of scipy and sklearn, see Ward.
+    """
+
+    requires_storage = False
+
+    def __init__(self, connectivity: ConnectivityT) -> None:
+        if sparse.issparse(connectivity):
+            coo = sparse.coo_matrix(connectivity)
+            if coo.shape[0] != coo.shape[1]:
+                raise ValueError("Connectivity matrix must be square.")
+            edges = np.stack((coo.row, coo.col), axis=1)
+            self.size: Optional[int] = coo.shape[0]
+        else:
+            edges = np.asarray(connectivity, dtype=np.int64).reshape(-1, 2)
+            self.size = None
+        if (edges < 0).any():
+            raise ValueError("Record indexes must not be negative.")
+        edges = np.sort(edges, axis=1)
+        edges = edges[edges[:, 0] != edges[:, 1]]
+        # (lower, higher) pairs without duplicates, sorted by lower index
+        self.edges: NDArray[np.int64] = np.unique(edges, axis=0)
+
+    def run(
+        self,
+        data: List[Cluster],
+        distance_selector: DistanceSelectorBase,
+        storage: Optional[DistanceStorageBase] = None,
+        profiler: Optional[Profiler] = None,
+    ) -> Iterator[MergeRowT]:
+        if profiler is not None:
+            profiler.begin()
+        if not distance_selector.vectorized:
+            raise ValueError("GraphEngine requires vectorized selector.")
+        size = len(data)
+        self._check_graph(size)
+        sizes = np.array([len(c) for c in data], dtype=np.float64)
+        centroids: Optional[NDArray[np.float64]] = None
+        if distance_selector.height_dependent:
+            centroids = self._centroids(data, distance_selector)
+            first, second = self.edges[:, 0], self.edges[:, 1]
+            distances = distance_selector.centroid_distances(
+                centroids[first],
+                centroids[second],
+                sizes[first],
+                sizes[second],
+            )
+        else:
+            distances = self._edge_distances(data, distance_selector, storage)
+        adjacency: List[Dict[int, float]] = [{} for _ in range(size)]
+        heap: List[Tuple[float, int, int, int, int]] = []
+        for (first, second), distance in zip(
+            self.edges.tolist(), distances.tolist()
+        ):
+            adjacency[first][second] = distance
+            adjacency[second][first] = distance
+            heap.append((distance, first, second, 0, 0))
+        heapq.heapify(heap)
+        # heap entries are stale once version of either cluster changes,
+        # merged away clusters have version -1
+        version = [0] * size
+        label = list(range(size))
+        rows: List[MergeRowT] = []
+        if profiler is not None:
+            profiler.lap("initialize")
+
+        while len(rows) < size - 1:
+            if profiler is not None:
+                profiler.begin()
+            entry = heapq.heappop(heap)
+            height, kept, merged = entry[:3]
+            while (version[kept], version[merged]) != entry[3:]:
+                entry = heapq.heappop(heap)
+                height, kept, merged = entry[:3]
+            if profiler is not None:
+                profiler.lap("search")
+            left, right = sorted((label[kept], label[merged]))
+            rows.append(
+                (left, right, height, int(sizes[kept] + sizes[merged]))
+            )
+            neighbours = sorted(
+                (adjacency[kept].keys() | adjacency[merged].keys())
+                - {kept, merged}
+            )
+            if centroids is None:
+                vector = self._update(
+                    distance_selector,
+                    adjacency[kept],
+                    adjacency[merged],
+                    neighbours,
+                    height,
+                    sizes,
+                    (kept, merged),
+                )
+            else:
+                vector = self._centroid_update(
+                    distance_selector,
+                    centroids,
+                    sizes,
+                    neighbours,
+                    kept,
+                    merged,
+                )
+            if profiler is not None:
+                profiler.lap("update")
+            version[kept] += 1
+            version[merged] = -1
+            adjacency[kept] = dict(zip(neighbours, vector))
+            adjacency[merged] = {}
+            for neighbour, distance in adjacency[kept].items():
+                adjacency[neighbour].pop(merged, None)
+                adjacency[neighbour][kept] = distance
+                heapq.heappush(
+                    heap,
+                    (
+                        distance,
+                        kept,
+                        neighbour,
+                        version[kept],
+                        version[neighbour],
+                    ),
+                )
+            sizes[kept] += sizes[merged]
+            sizes[merged] = 0.0
+            label[kept] = size + len(rows) - 1
+            if profiler is not None:
+                profiler.lap("rebuild", end_step=True)
+
+        return iter(rows)
+
+    def _check_graph(self, size: int) -> None:
+        if self.size is not None and self.size != size:
+            raise ValueError(
+                f"Connectivity matrix is {self.size}x{self.size}, "
+                f"expected {size}x{size}."
+            )
+        if len(self.edges) and self.edges.max() >= size:
+            raise ValueError(f"Edge refers to record outside of {size}.")
+        graph = sparse.coo_matrix(
+            (np.ones(len(self.edges)), (self.edges[:, 0], self.edges[:, 1])),
+            shape=(size, size),
+        )
+        components, _ = connected_components(graph, directed=False)
+        if components > 1:
+            raise ValueError(
+                f"Connectivity graph has {components} connected "
+                "components, all records have to be connected."
+            )
+
+    def _centroids(
+        self, data: List[Cluster], distance_selector: DistanceSelectorBase
+    ) -> NDArray[np.float64]:
+        if not (
+            distance_selector.batched
+            and isinstance(distance_selector.distance, Euclidean)
+        ):
+            raise ValueError(
+                f"{type(distance_selector).__name__} is computed from "
+                "centroids by GraphEngine, it requires Euclidean distance."
+            )
+        # records of leaves are their centroids, copied as they are updated
+        return np.array(
+            to_numpy_array(tuple(cast(RecordBase, c[0]) for c in data)),
+            dtype=np.float64,
+        )
+
+    def _centroid_update(
+        self,
+        distance_selector: DistanceSelectorBase,
+        centroids: NDArray[np.float64],
+        sizes: NDArray[np.float64],
+        neighbours: List[int],
+        kept: int,
+        merged: int,
+    ) -> List[float]:
+        # centroid of merged cluster is kept in row of kept one
+        centroids[kept] = distance_selector.merged_centroid(
+            centroids[kept], centroids[merged], sizes[kept], sizes[merged]
+        )
+        if not neighbours:
+            return []
+        vector = distance_selector.centroid_distances(
+            centroids[kept],
+            centroids[neighbours],
+            sizes[kept] + sizes[merged],
+            sizes[neighbours],
+        )
+        return cast(List[float], vector.tolist())
+
+    def _edge_distances(
+        self,
+        data: List[Cluster],
+        distance_selector: DistanceSelectorBase,
+        storage: Optional[DistanceStorageBase],
+    ) -> NDArray[np.float64]:
+        first, second = self.edges[:, 0], self.edges[:, 1]
+        if storage is None and not distance_selector.batched:
+            return np.array(
+                [
+                    distance_selector.initial(data[i], data[j])
+                    for i, j in zip(first.tolist(), second.tolist())
+                ]
+            )
+        if storage is None:
+            records = to_numpy_array(
+                tuple(cast(RecordBase, c[0]) for c in data)
+            )
+
+            def row(index: int, others: NDArray[np.int64]) -> NDArray:
+                return cast(
+                    NDArray[np.float64],
+                    distance_selector.distance.pairwise(
+                        records[index : index + 1], records[others]
+                    )[0],
+                )
+
+        else:
+
+            def row(index: int, others: NDArray[np.int64]) -> NDArray:
+                return storage.row(index)[others]
+
+        # edges are sorted by lower index, so each one takes one row
+        distances = np.empty(len(self.edges))
+        starts = np.flatnonzero(np.diff(first, prepend=-1))
+        stops = np.append(starts[1:], len(first))
+        for start, stop in zip(starts.tolist(), stops.tolist()):
+            distances[start:stop] = row(first[start], second[start:stop])
+        return distances
+
+    def _update(
+        self,
+        distance_selector: DistanceSelectorBase,
+        kept: Dict[int, float],
+        merged: Dict[int, float],
+        neighbours: List[int],
+        height: float,
+        sizes: NDArray[np.float64],
+        pair: Tuple[int, int],
+    ) -> List[float]:
+        if not neighbours:
+            return []
+        nan = float("nan")
+        left = np.array([kept.get(k, nan) for k in neighbours])
+        right = np.array([merged.get(k, nan) for k in neighbours])
+        left = np.where(np.isnan(left), right, left)
+        right = np.where(np.isnan(right), left, right)
+        with np.errstate(invalid="ignore"):
+            vector = distance_selector.update(
+                left,
+                right,
+                height,
+                sizes[pair[0]],
+                sizes[pair[1]],
+                sizes[neighbours],
+            )
+        return cast(List[float], np.asarray(vector, dtype=np.float64).tolist())
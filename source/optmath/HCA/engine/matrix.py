@@ -0,0 +1,210 @@
+from dataclasses import dataclass
+from typing import ClassVar, Iterator, List, Optional, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from ..cluster import Cluster
+from ..distance_selector import DistanceSelectorBase
+from ..profiler import Profiler
+from ..storage import DistanceStorageBase, SquareStorage
+from .engine import EngineBase, MergeRowT
+
+# Upper bound for number of matrix items copied at once during rescan.
+SCAN_BLOCK_ITEMS: int = 1 << 22
+
+
+class MatrixEngine(EngineBase):
+    """Greedy engine working on single, preallocated distance storage.
+
+    Storage is allocated once, cluster created by merge overwrites row
+    and column of its left part, while row and column of right part are
+    filled with infinity and marked inactive. Nearest neighbor of every
+    row is cached, after merge only rows which lost their nearest
+    neighbor are rescanned. Merge order, including tie breaking, is the
+    same as the one of HCAStep.
+    """
+
+    def run(
+        self,
+        data: List[Cluster],
+        distance_selector: DistanceSelectorBase,
+        storage: Optional[DistanceStorageBase] = None,
+        profiler: Optional[Profiler] = None,
+    ) -> Iterator[MergeRowT]:
+        return self.resume(
+            self.start(data, distance_selector, storage, profiler),
+            distance_selector,
+            profiler,
+        )
+
+    def start(
+        self,
+        data: List[Cluster],
+        distance_selector: DistanceSelectorBase,
+        storage: Optional[DistanceStorageBase] = None,
+        profiler: Optional[Profiler] = None,
+    ) -> "MatrixState":
+        if profiler is not None:
+            profiler.begin()
+        if storage is None:
+            storage = SquareStorage.from_data(data, distance_selector)
+        size = storage.size
+        state = MatrixState(
+            storage,
+            active=np.ones(size, dtype=bool),
+            index=np.arange(size),
+            sizes=np.array([len(c) for c in data], dtype=storage.dtype),
+            nearest=np.zeros(size, dtype=np.int64),
+            nearest_distance=np.full(size, np.inf, dtype=storage.dtype),
+        )
+        self._rescan(
+            storage,
+            state.index,
+            np.arange(size),
+            state.nearest,
+            state.nearest_distance,
+        )
+        if profiler is not None:
+            profiler.lap("initialize")
+        return state
+
+    def resume(
+        self,
+        state: "MatrixState",
+        distance_selector: DistanceSelectorBase,
+        profiler: Optional[Profiler] = None,
+    ) -> Iterator[MergeRowT]:
+        """Continue merging from given state.
+
+        State is updated before each merge is yielded, so it can be saved
+        between merges and resumed later.
+        """
+        storage = state.storage
+        size = storage.size
+        active, index, sizes = state.active, state.index, state.sizes
+        nearest, nearest_distance = state.nearest, state.nearest_distance
+
+        while state.step < size - 1:
+            if profiler is not None:
+                profiler.begin()
+            step = state.step
+            left, right = self._closest_pair(
+                index, active, nearest, nearest_distance
+            )
+            if profiler is not None:
+                profiler.lap("search")
+            left_row = storage.row(left)
+            height = left_row[right]
+            with np.errstate(invalid="ignore"):
+                vector = distance_selector.update(
+                    left_row,
+                    storage.row(right),
+                    height,
+                    sizes[left],
+                    sizes[right],
+                    sizes,
+                )
+            if profiler is not None:
+                profiler.lap("update")
+            merge = (
+                int(index[left]),
+                int(index[right]),
+                height,
+                int(sizes[left] + sizes[right]),
+            )
+            active[right] = False
+            vector[~active] = np.inf
+            vector[left] = np.inf
+            storage.set_row(right, np.inf)
+            storage.set_row(left, vector)
+            sizes[left] += sizes[right]
+            sizes[right] = 0.0
+            index[left] = size + step
+            index[right] = 2 * size
+
+            nearest_distance[right] = np.inf
+            invalid = np.flatnonzero(
+                active & ((nearest == left) | (nearest == right))
+            )
+            # new cluster has highest index, so it only wins when closer
+            closer = vector < nearest_distance
+            nearest[closer] = left
+            nearest_distance[closer] = vector[closer]
+            self._rescan(
+                storage,
+                index,
+                np.append(invalid, left),
+                nearest,
+                nearest_distance,
+            )
+            state.step = step + 1
+            if profiler is not None:
+                profiler.lap("rebuild", end_step=True)
+            yield merge
+
+    def _rescan(
+        self,
+        storage: DistanceStorageBase,
+        index: NDArray[np.int64],
+        rows: NDArray[np.int64],
+        nearest: NDArray[np.int64],
+        nearest_distance: NDArray[np.float64],
+    ) -> None:
+        size = storage.size
+        step = max(1, SCAN_BLOCK_ITEMS // max(1, size))
+        for start in range(0, len(rows), step):
+            block = rows[start : start + step]
+            values = storage.rows(block)
+            minimum = values.min(axis=1)
+            # among equally distant, cluster with lowest index is nearest
+            keys = np.where(values == minimum[:, None], index, 2 * size + 1)
+            keys[np.arange(len(block)), block] = 2 * size + 1
+            nearest[block] = np.argmin(keys, axis=1)
+            nearest_distance[block] = minimum
+
+    def _closest_pair(
+        self,
+        index: NDArray[np.int64],
+        active: NDArray[np.bool_],
+        nearest: NDArray[np.int64],
+        nearest_distance: NDArray[np.float64],
+    ) -> Tuple[int, int]:
+        rows = np.flatnonzero(active)
+        distances = nearest_distance[rows]
+        rows = rows[distances == distances.min()]
+        columns = nearest[rows]
+        # HCAStep picks first minimum in lower triangle of matrix ordered
+        # by cluster index, hence lowest (higher index, lower index) pair
+        high = np.maximum(index[rows], index[columns])
+        low = np.minimum(index[rows], index[columns])
+        best = np.lexsort((low, high))[0]
+        row, column = int(rows[best]), int(columns[best])
+        if index[row] < index[column]:
+            return row, column
+        return column, row
+
+
+@dataclass
+class MatrixState:
+    """State of MatrixEngine between merges."""
+
+    storage: DistanceStorageBase
+    active: NDArray[np.bool_]
+    # cluster index of cluster held in given row, inactive rows get
+    # index higher than any real one, so they lose all ties
+    index: NDArray[np.int64]
+    sizes: NDArray[np.float64]
+    # nearest neighbor cache of every row
+    nearest: NDArray[np.int64]
+    nearest_distance: NDArray[np.float64]
+    # number of merges done
+    step: int = 0
+
+    ARRAYS: ClassVar[Tuple[str, ...]] = (
+        "active",
+        "index",
+        "sizes",
+        "nearest",
+        "nearest_distance",
+    )
@@ -0,0 +1,128 @@
+from typing import ClassVar, Iterator, List, Optional, Tuple, cast
+
+import numpy as np
+from numpy.typing import NDArray
+
+from ..cluster import Cluster
+from ..distance_selector import DistanceSelectorBase
+from ..profiler import Profiler
+from ..record import RecordBase, to_numpy_array
+from ..storage import DistanceStorageBase
+from .engine import EngineBase, MergeRowT
+
+# (from, to, weight) arrays of edges of spanning tree
+TreeT = Tuple[NDArray[np.int64], NDArray[np.int64], NDArray[np.float64]]
+
+
+class MSTEngine(EngineBase):
+    """Single linkage computed from minimum spanning tree.
+
+    Tree is built with Prim algorithm, distances from newly attached
+    record are computed row by row with distance.pairwise(), so apart
+    from record array only O(n) memory is used. When storage is given,
+    its rows are used instead. Steps reported to profiler are steps of
+    Prim algorithm, merges are made from tree in final rebuild phase.
+    When there are no ties, result is the same as the one of
+    MatrixEngine. Equal distances can be merged in different order,
+    eg. into one chain instead of pairs, therefore this engine has to be
+    requested explicitly.
+    """
+
+    requires_storage: ClassVar[bool] = False
+
+    def run(
+        self,
+        data: List[Cluster],
+        distance_selector: DistanceSelectorBase,
+        storage: Optional[DistanceStorageBase] = None,
+        profiler: Optional[Profiler] = None,
+    ) -> Iterator[MergeRowT]:
+        tree = self.tree(data, distance_selector, storage, profiler)
+        if profiler is not None:
+            profiler.begin()
+        sizes = np.array([len(c) for c in data], dtype=np.int64)
+        rows = single_linkage(tree, sizes)
+        if profiler is not None:
+            profiler.lap("rebuild")
+        return iter(rows)
+
+    def tree(
+        self,
+        data: List[Cluster],
+        distance_selector: DistanceSelectorBase,
+        storage: Optional[DistanceStorageBase] = None,
+        profiler: Optional[Profiler] = None,
+    ) -> TreeT:
+        """Minimum spanning tree of records as (from, to, weight) arrays."""
+        if storage is None:
+            records = to_numpy_array(
+                tuple(cast(RecordBase, c[0]) for c in data)
+            )
+
+            def row(index: int) -> NDArray[np.float64]:
+                return cast(
+                    NDArray[np.float64],
+                    distance_selector.distance.pairwise(
+                        records[index : index + 1], records
+                    )[0],
+                )
+
+        else:
+            row = storage.row
+
+        size = len(data)
+        in_tree = np.zeros(size, dtype=bool)
+        # distance to closest record already in tree and that record
+        nearest = np.full(size, np.inf)
+        parent = np.zeros(size, dtype=np.int64)
+        edges_from = np.empty(max(size - 1, 0), dtype=np.int64)
+        edges_to = np.empty(max(size - 1, 0), dtype=np.int64)
+        weights = np.empty(max(size - 1, 0))
+
+        current = 0
+        for step in range(size - 1):
+            if profiler is not None:
+                profiler.begin()
+            in_tree[current] = True
+            distances = row(current)
+            closer = (distances < nearest) & ~in_tree
+            nearest[closer] = distances[closer]
+            parent[closer] = current
+            nearest[current] = np.inf
+            if profiler is not None:
+                profiler.lap("update")
+            current = int(np.argmin(np.where(in_tree, np.inf, nearest)))
+            edges_from[step] = parent[current]
+            edges_to[step] = current
+            weights[step] = nearest[current]
+            if profiler is not None:
+                profiler.lap("search", end_step=True)
+
+        return edges_from, edges_to, weights
+
+
+def single_linkage(tree: TreeT, sizes: NDArray[np.int64]) -> List[MergeRowT]:
+    """Merges of single linkage, made from its minimum spanning tree."""
+    edges_from, edges_to, weights = tree
+    size = len(sizes)
+    root = np.arange(size)
+    label = np.arange(size)
+    count = sizes.copy()
+
+    def find(index: int) -> int:
+        while root[index] != index:
+            root[index] = root[root[index]]
+            index = root[index]
+        return index
+
+    rows = []
+    for step in np.argsort(weights, kind="stable"):
+        first = find(edges_from[step])
+        second = find(edges_to[step])
+        left, right = sorted((int(label[first]), int(label[second])))
+        merged = int(count[first] + count[second])
+        rows.append((left, right, weights[step], merged))
+        root[second] = first
+        label[first] = size + len(rows) - 1
+        count[first] = merged
+    return rows
@@ -0,0 +1,140 @@
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from ..cluster import Cluster
+from ..distance_selector import DistanceSelectorBase
+from ..profiler import Profiler
+from ..storage import DistanceStorageBase, SquareStorage
+from .engine import EngineBase, MergeRowT
+
+
+class NNChainEngine(EngineBase):
+    """Nearest-neighbor-chain engine for reducible linkages.
+
+    Follows chain of nearest neighbors until pair of reciprocal nearest
+    neighbors is found and merges it, which takes O(n^2) time in total.
+    Merges are found out of order, so they are sorted by height and
+    relabeled before being returned. Only reducible selectors (see
+    DistanceSelectorBase.reducible) are accepted. When there are no
+    ties, result is the same as the one of MatrixEngine. Equal distances
+    are resolved in different order than MatrixEngine does, which can
+    lead to different, although equally valid, hierarchy, therefore
+    this engine has to be requested explicitly.
+    """
+
+    def run(
+        self,
+        data: List[Cluster],
+        distance_selector: DistanceSelectorBase,
+        storage: Optional[DistanceStorageBase] = None,
+        profiler: Optional[Profiler] = None,
+    ) -> Iterator[MergeRowT]:
+        if not distance_selector.reducible:
+            raise ValueError(
+                f"{type(distance_selector).__name__} is not reducible, "
+                "it can not be computed with NNChainEngine."
+            )
+        if profiler is not None:
+            profiler.begin()
+        if storage is None:
+            storage = SquareStorage.from_data(data, distance_selector)
+        size = storage.size
+        active = np.ones(size, dtype=bool)
+        sizes = np.array([len(c) for c in data], dtype=storage.dtype)
+        # provisional cluster index, n+t for cluster created in t-th merge
+        label = np.arange(size)
+        # (order_height, label) orders clusters the same way as final
+        # cluster indexes do, initial clusters have lowest possible height
+        order_height = np.full(size, -np.inf)
+        merges: List[MergeRowT] = []
+        merge_order = np.empty(max(size - 1, 0))
+        chain: List[int] = []
+        if profiler is not None:
+            profiler.lap("initialize")
+
+        for step in range(size - 1):
+            if profiler is not None:
+                profiler.begin()
+            if not chain:
+                chain.append(int(np.argmax(active)))
+            first, second = self._reciprocal_pair(storage, chain)
+            if profiler is not None:
+                profiler.lap("search")
+            if (order_height[first], label[first]) < (
+                order_height[second],
+                label[second],
+            ):
+                left, right = first, second
+            else:
+                left, right = second, first
+            left_row = storage.row(left)
+            height = left_row[right]
+            with np.errstate(invalid="ignore"):
+                vector = distance_selector.update(
+                    left_row,
+                    storage.row(right),
+                    height,
+                    sizes[left],
+                    sizes[right],
+                    sizes,
+                )
+            if profiler is not None:
+                profiler.lap("update")
+            merges.append(
+                (
+                    int(label[left]),
+                    int(label[right]),
+                    height,
+                    int(sizes[left] + sizes[right]),
+                )
+            )
+            active[right] = False
+            vector[~active] = np.inf
+            vector[left] = np.inf
+            storage.set_row(right, np.inf)
+            storage.set_row(left, vector)
+            sizes[left] += sizes[right]
+            sizes[right] = 0.0
+            label[left] = size + step
+            # never lower than children, so sorting keeps parents after them
+            order_height[left] = max(
+                height, order_height[left], order_height[right]
+            )
+            merge_order[step] = order_height[left]
+            if profiler is not None:
+                profiler.lap("rebuild", end_step=True)
+
+        return iter(_relabel(merges, merge_order, size))
+
+    def _reciprocal_pair(
+        self, storage: DistanceStorageBase, chain: List[int]
+    ) -> Tuple[int, int]:
+        while True:
+            current = chain[-1]
+            row = storage.row(current)
+            nearest = int(np.argmin(row))
+            # on ties previous element of chain is preferred
+            if len(chain) > 1 and not row[nearest] < row[chain[-2]]:
+                chain.pop()
+                return current, chain.pop()
+            chain.append(nearest)
+
+
+def _relabel(
+    merges: List[MergeRowT], merge_order: NDArray[np.float64], size: int
+) -> List[MergeRowT]:
+    order = np.argsort(merge_order, kind="stable")
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+
+    def final(label: int) -> int:
+        return label if label < size else size + int(rank[label - size])
+
+    rows = []
+    for position in order:
+        left, right, height, count = merges[position]
+        left, right = sorted((final(left), final(right)))
+        rows.append((left, right, height, count))
+    return rows
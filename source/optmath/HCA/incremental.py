@@ -0,0 +1,257 @@
+import os
+from dataclasses import dataclass, field
+from os import PathLike
+from typing import Any, Dict, List, Optional, Sequence, Union, cast
+
+import numpy as np
+from numpy.typing import NDArray
+from scipy import sparse
+from scipy.sparse.csgraph import minimum_spanning_tree
+
+from .cluster import Cluster
+from .distance.distance import PAIRWISE_BLOCK_ITEMS
+from .distance_selector import DistanceSelectorBase, SingleLinkage
+from .engine.engine import MergeRowT
+from .engine.mst import MSTEngine, TreeT, single_linkage
+from .HCA import (
+    HCA,
+    _pickled,
+    _pickled_options,
+    _unpickled,
+    _unpickled_options,
+)
+from .linkage import Linkage
+from .record import RecordBase, to_numpy_array
+from .storage import CondensedStorage
+
+# bumped whenever layout of files written by IncrementalHCA.save() changes
+INCREMENTAL_VERSION: int = 1
+
+
+@dataclass
+class IncrementalHCA:
+    """HCA result into which new records can be inserted.
+
+    Only single linkage (with vectorized distance) is incremental, see
+    incremental property. It retains minimum spanning tree of records.
+    Tree of records with new ones added is spanning tree of old tree
+    edges and edges of new records, so insertion of k records into n
+    takes only k * (n + k) distances, which are processed in blocks of
+    bounded memory, and result is exact.
+
+    Other linkages are not incremental, they retain condensed distance
+    matrix of all records (n^2 / 2 memory), only distances of new
+    records are computed, but all merges are redone by HCA on every
+    insertion, so it takes as long as HCA of all records.
+    """
+
+    data: List[Cluster]
+    distance_selector: DistanceSelectorBase
+    # passed to HCA of linkages other than single, eg. engine or dtype
+    hca_options: Dict[str, Any] = field(default_factory=dict)
+    tree: Optional[TreeT] = field(init=False, default=None, repr=False)
+    distances: Optional[NDArray[np.float64]] = field(
+        init=False, default=None, repr=False
+    )
+    _linkage: Optional[Linkage] = field(init=False, default=None, repr=False)
+
+    @property
+    def incremental(self) -> bool:
+        """True when insert() updates result without redoing HCA."""
+        return (
+            isinstance(self.distance_selector, SingleLinkage)
+            and self.distance_selector.batched
+        )
+
+    def linkage(self) -> Linkage:
+        if self._linkage is None:
+            if self.incremental:
+                self.tree = MSTEngine().tree(self.data, self.distance_selector)
+            else:
+                storage = CondensedStorage.from_data(
+                    self.data,
+                    self.distance_selector,
+                    dtype=self.hca_options.get("dtype", np.float64),
+                )
+                self.distances = storage.values
+            self._linkage = self._merge()
+        return self._linkage
+
+    def insert(self, new: Sequence[Cluster]) -> Linkage:
+        """Add clusters to data and return linkage of all of them.
+
+        Unless incremental, all merges are recomputed.
+        """
+        self.linkage()
+        new = list(new)
+        ids = {c.ID for c in self.data}
+        if len(ids.union(c.ID for c in new)) != len(ids) + len(new):
+            raise ValueError("IDs of inserted clusters have to be unique.")
+        if not new:
+            return self.linkage()
+        old = len(self.data)
+        self.data = self.data + new
+        if self.tree is not None:
+            self.tree = self._insert_into_tree(old)
+        else:
+            self.distances = _extend_condensed(
+                cast(NDArray[np.float64], self.distances),
+                old,
+                self._new_distances(old, len(self.data)),
+            )
+        self._linkage = self._merge()
+        return self._linkage
+
+    def _merge(self) -> Linkage:
+        if self.tree is not None:
+            sizes = np.array([len(c) for c in self.data], dtype=np.int64)
+            return _linkage(self.data, single_linkage(self.tree, sizes))
+        return HCA(
+            self.data,
+            self.distance_selector,
+            self.distances,
+            **self.hca_options,
+        ).linkage()
+
+    def _new_distances(self, start: int, stop: int) -> NDArray[np.float64]:
+        # distances of records start..stop to records 0..stop
+        if not self.distance_selector.batched:
+            return np.array(
+                [
+                    [
+                        self.distance_selector.initial(first, second)
+                        for second in self.data[:stop]
+                    ]
+                    for first in self.data[start:stop]
+                ]
+            )
+        records = to_numpy_array(
+            tuple(cast(RecordBase, c[0]) for c in self.data[:stop])
+        )
+        return self.distance_selector.distance.pairwise(
+            records[start:stop], records
+        )
+
+    def _insert_into_tree(self, old: int) -> TreeT:
+        tree = cast(TreeT, self.tree)
+        size = len(self.data)
+        step = max(1, PAIRWISE_BLOCK_ITEMS // size)
+        for start in range(old, size, step):
+            stop = min(size, start + step)
+            distances = self._new_distances(start, stop)
+            # each new record is joined with all records before it
+            rows, columns = np.nonzero(
+                np.arange(stop) < np.arange(start, stop)[:, None]
+            )
+            tree = _minimum_spanning_tree(
+                stop,
+                np.concatenate((tree[0], rows + start)),
+                np.concatenate((tree[1], columns)),
+                np.concatenate((tree[2], distances[rows, columns])),
+            )
+        return tree
+
+    def save(self, path: Union[str, "PathLike[str]"]) -> None:
+        """Save data, retained distances and linkage to npz file."""
+        linkage = self.linkage()
+        arrays: Dict[str, Any] = {
+            "version": np.array(INCREMENTAL_VERSION),
+            "data": _pickled(self.data),
+            "distance_selector": _pickled(self.distance_selector),
+            "z": linkage.Z(),
+        }
+        arrays.update(_pickled_options("hca_options", self.hca_options))
+        if self.tree is not None:
+            arrays.update(zip(("from", "to", "weight"), self.tree))
+        else:
+            arrays["distances"] = cast(NDArray[np.float64], self.distances)
+        path = os.fspath(path)
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as file:
+            np.savez(file, **arrays)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: Union[str, "PathLike[str]"]) -> "IncrementalHCA":
+        """Restore IncrementalHCA saved with save().
+
+        Data and options are unpickled only from exact numpy, scipy and
+        pathlib classes and already imported optmath classes, same as by
+        HCA.resume(), still only trusted files should be loaded.
+        """
+        with np.load(path) as file:
+            if int(file["version"]) != INCREMENTAL_VERSION:
+                raise ValueError(
+                    f"Unsupported file version {int(file['version'])}."
+                )
+            loaded = cls(
+                _unpickled(file["data"]),
+                _unpickled(file["distance_selector"]),
+                _unpickled_options("hca_options", file),
+            )
+            if "distances" in file:
+                loaded.distances = file["distances"]
+            else:
+                loaded.tree = (file["from"], file["to"], file["weight"])
+            loaded._linkage = Linkage(tuple(loaded.data), file["z"])
+        return loaded
+
+
+def _minimum_spanning_tree(
+    size: int,
+    edges_from: NDArray[np.int64],
+    edges_to: NDArray[np.int64],
+    weights: NDArray[np.float64],
+) -> TreeT:
+    # scipy takes zero weight for missing edge, so edges are weighted by
+    # their rank, which also makes order of equal weights stable
+    order = np.argsort(weights, kind="stable")
+    rank = np.empty(len(order))
+    rank[order] = np.arange(1, len(order) + 1)
+    graph = sparse.coo_matrix((rank, (edges_from, edges_to)), (size, size))
+    ranks = minimum_spanning_tree(graph.tocsr()).tocoo().data
+    picked = order[ranks.astype(np.int64) - 1]
+    return edges_from[picked], edges_to[picked], weights[picked]
+
+
+def _extend_condensed(
+    condensed: NDArray[np.float64],
+    old: int,
+    new_rows: NDArray[np.float64],
+) -> NDArray[np.float64]:
+    # new_rows hold distances of new records to all records
+    count = len(new_rows)
+    size = old + count
+    result = np.empty(size * (size - 1) // 2, dtype=condensed.dtype)
+    source = target = 0
+    for row in range(size - 1):
+        if row < old:
+            length = old - 1 - row
+            result[target : target + length] = condensed[
+                source : source + length
+            ]
+            result[target + length : target + length + count] = new_rows[
+                :, row
+            ]
+            source += length
+            target += length + count
+        else:
+            values = new_rows[row - old, row + 1 :]
+            result[target : target + len(values)] = values
+            target += len(values)
+    return result
+
+
+def _linkage(leaves: List[Cluster], rows: List[MergeRowT]) -> Linkage:
+    # replaces cluster indexes of engine with cluster IDs
+    ids = np.array([c.ID for c in leaves], dtype=np.int64)
+    first_id = int(ids.max()) + 1
+    z = np.array(rows, dtype=np.float64).reshape(-1, 4)
+    for column in (0, 1):
+        index = z[:, column].astype(np.int64)
+        z[:, column] = np.where(
+            index < len(leaves),
+            ids[np.minimum(index, len(leaves) - 1)],
+            first_id + index - len(leaves),
+        )
+    return Linkage(tuple(leaves), z)
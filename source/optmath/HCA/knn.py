@@ -0,0 +1,134 @@
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional, cast
+
+import numpy as np
+from numpy.typing import NDArray
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components, minimum_spanning_tree
+
+from .cluster import Cluster
+from .distance import DistanceBase
+from .distance_selector import DistanceSelectorBase
+from .HCA import HCA
+from .linkage import Linkage
+from .record import RecordBase, to_numpy_array
+
+
+def knn_graph(
+    records: NDArray[np.float64],
+    k: int,
+    distance: DistanceBase,
+    block_rows: Optional[int] = None,
+) -> NDArray[np.int64]:
+    """Edges from every record to its k nearest neighbors.
+
+    Neighbors are found with exact blocked search over
+    distance.pairwise_chunks(), so full distance matrix is never
+    materialized. Edges are returned as (record, neighbor) rows.
+    """
+    if k < 1:
+        raise ValueError("k must be positive.")
+    size = len(records)
+    k = min(k, size - 1)
+    if k < 1:
+        return np.empty((0, 2), dtype=np.int64)
+    neighbors = np.empty((size, k), dtype=np.int64)
+    for rows, block in distance.pairwise_chunks(
+        records, block_rows=block_rows
+    ):
+        index = np.arange(rows.start, rows.stop)
+        block[index - rows.start, index] = np.inf
+        neighbors[rows] = np.argpartition(block, k - 1, axis=1)[:, :k]
+    return np.stack((np.repeat(np.arange(size), k), neighbors.ravel()), 1)
+
+
+def join_components(
+    records: NDArray[np.float64],
+    edges: NDArray[np.int64],
+    distance: DistanceBase,
+) -> NDArray[np.int64]:
+    """Add edges connecting all components of graph.
+
+    Every component is represented by its record closest to component
+    mean, and minimum spanning tree of representatives is added to
+    edges, which takes O(c^2) memory for c components.
+    """
+    size = len(records)
+    graph = sparse.coo_matrix(
+        (np.ones(len(edges)), (edges[:, 0], edges[:, 1])), shape=(size, size)
+    )
+    count, component = connected_components(graph, directed=False)
+    if count < 2:
+        return edges
+    means = np.zeros((count, records.shape[1]))
+    np.add.at(means, component, records)
+    means /= np.bincount(component, minlength=count)[:, None]
+    to_mean = np.linalg.norm(records - means[component], axis=1)
+    order = np.lexsort((to_mean, component))
+    first = np.flatnonzero(np.diff(component[order], prepend=-1))
+    representatives = order[first]
+    pairs = distance.pairwise(records[representatives])
+    # zero weight means missing edge to scipy, shifting all weights keeps
+    # spanning tree of complete graph minimal
+    tree = minimum_spanning_tree(pairs + 1.0).tocoo()
+    joining = np.stack(
+        (representatives[tree.row], representatives[tree.col]), 1
+    )
+    return np.concatenate((edges, joining))
+
+
+@dataclass
+class KNNHCA:
+    """Approximate HCA over k-nearest-neighbor graph of records.
+
+    Meant for SingleLinkage and AverageLinkage of data too large for
+    exact linkage. Graph is built with knn_graph(), its components are
+    joined with join_components() and linkage is computed by
+    GraphEngine, so time and memory scale with n * k. Larger k gives
+    result closer to exact one, see merge_differences().
+    """
+
+    data: List[Cluster]
+    distance_selector: DistanceSelectorBase
+    k: int = 10
+    # rows of distance blocks computed at once by neighbor search
+    block_rows: Optional[int] = None
+    # passed to HCA, eg. dtype or cache
+    hca_options: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        if not self.distance_selector.distance.vectorized:
+            raise ValueError("KNNHCA requires vectorized distance.")
+
+    def connectivity(self) -> NDArray[np.int64]:
+        records = to_numpy_array(
+            tuple(cast(RecordBase, c[0]) for c in self.data)
+        )
+        distance = self.distance_selector.distance
+        edges = knn_graph(records, self.k, distance, self.block_rows)
+        return join_components(records, edges, distance)
+
+    def linkage(self) -> Linkage:
+        return HCA(
+            self.data,
+            self.distance_selector,
+            connectivity=self.connectivity(),
+            **self.hca_options,
+        ).linkage()
+
+    def merge_differences(
+        self, sample: Optional[int] = 1000, seed: int = 0
+    ) -> int:
+        """Number of merges differing from exact HCA of sample of data.
+
+        Sample is drawn without replacement, None uses whole data, which
+        is as expensive as exact HCA. See Linkage.merge_differences().
+        """
+        data = self.data
+        if sample is not None and sample < len(data):
+            random = np.random.default_rng(seed)
+            picked = np.sort(random.choice(len(data), sample, replace=False))
+            data = [data[i] for i in picked.tolist()]
+        approximate = replace(self, data=data).linkage()
+        exact = HCA(data, self.distance_selector).linkage()
+        return approximate.merge_differences(exact)
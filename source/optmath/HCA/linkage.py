@@ -0,0 +1,284 @@
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Optional, Set, Tuple, cast
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .cluster import Cluster, ClusterOrRecord
+
+
+@dataclass(frozen=True)
+class Merge:
+    """Single merge of HCA, ID is assigned to cluster created by it."""
+
+    __slots__ = ("step", "ID", "left", "right", "height", "size")
+
+    step: int
+    ID: int
+    left: int
+    right: int
+    height: float
+    size: int
+
+
+@dataclass(frozen=True, eq=False)
+class Linkage:
+    """Result of HCA stored as flat linkage matrix.
+
+    Rows of z hold (left ID, right ID, height, size) of consecutive
+    merges, exactly as returned by Cluster.Z(), which takes 32 bytes per
+    merge. Cluster objects are only created when accessed.
+    """
+
+    leaves: Tuple[Cluster, ...]
+    z: NDArray[np.float64]
+    # ID of cluster created in first merge
+    first_id: int = field(init=False)
+    _leaves_by_id: Dict[int, Cluster] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.z.setflags(write=False)
+        leaves_by_id = {c.ID: c for c in self.leaves}
+        object.__setattr__(self, "_leaves_by_id", leaves_by_id)
+        object.__setattr__(self, "first_id", max(leaves_by_id) + 1)
+
+    @classmethod
+    def from_cluster(
+        cls, cluster: Cluster, leaves: Tuple[Cluster, ...]
+    ) -> "Linkage":
+        if len(leaves) == 1:
+            return cls(leaves, np.empty((0, 4)))
+        return cls(leaves, cluster.Z())
+
+    @property
+    def left(self) -> NDArray[np.int64]:
+        return self.z[:, 0].astype(np.int64)
+
+    @property
+    def right(self) -> NDArray[np.int64]:
+        return self.z[:, 1].astype(np.int64)
+
+    @property
+    def height(self) -> NDArray[np.float64]:
+        return self.z[:, 2]
+
+    @property
+    def size(self) -> NDArray[np.int64]:
+        return self.z[:, 3].astype(np.int64)
+
+    def Z(self) -> NDArray[np.float64]:
+        return self.z
+
+    @property
+    def root(self) -> Cluster:
+        if len(self.z) == 0:
+            return self.leaves[0]
+        return LinkageCluster(self, len(self.z) - 1)
+
+    def labels(
+        self,
+        k: Optional[int] = None,
+        height: Optional[float] = None,
+        size: Optional[int] = None,
+    ) -> NDArray[np.int32]:
+        """Flat cluster label of every leaf, in order of leaves.
+
+        Tree is cut into k clusters, into clusters whose merges are not
+        higher than height, or into clusters of at most size leaves.
+        Labels are numbered from 0 in order of first leaf of cluster.
+        """
+        if sum(c is not None for c in (k, height, size)) != 1:
+            raise ValueError("Exactly one of k, height, size is required.")
+        count = len(self.leaves)
+        if k is not None:
+            if not 1 <= k <= count:
+                raise ValueError(f"k must be between 1 and {count}.")
+            applied = np.arange(count - 1) < count - k
+        elif height is not None:
+            # merge applies only if all merges below it apply too
+            applied = self._subtree_height() <= height
+        else:
+            applied = self.z[:, 3] <= cast(int, size)
+        return self._cut(applied)
+
+    def labels_all_levels(self) -> NDArray[np.int32]:
+        """Labels of leaves after each number of merges.
+
+        Row t holds labels after t merges, same as labels(k=n - t), so
+        result takes 4 * n^2 bytes for n leaves.
+        """
+        count = len(self.leaves)
+        order, start = self._leaf_ranges()
+        node = np.arange(count)
+        result = np.empty((count, count), dtype=np.int32)
+        result[0] = np.arange(count)
+        leaf_counts = self._leaf_counts()
+        for row in range(len(self.z)):
+            begin = start[count + row]
+            size = leaf_counts[count + row]
+            node[order[begin : begin + size]] = count + row
+            result[row + 1] = _first_leaf_labels(node)
+        return result
+
+    def merge_differences(self, other: "Linkage") -> int:
+        """Number of merges creating cluster which other never creates.
+
+        Clusters are compared by sets of leaf positions, so both
+        linkages have to be built for the same leaves, in same order.
+        """
+        if len(self.leaves) != len(other.leaves):
+            raise ValueError("Linkages are built for different leaves.")
+        return len(self._merged_sets() - other._merged_sets())
+
+    def _merged_sets(self) -> Set[FrozenSet[int]]:
+        count = len(self.leaves)
+        order, start = self._leaf_ranges()
+        leaf_counts = self._leaf_counts()
+        return {
+            frozenset(order[begin : begin + size].tolist())
+            for begin, size in zip(
+                start[count:].tolist(), leaf_counts[count:].tolist()
+            )
+        }
+
+    def _nodes(self) -> Tuple[NDArray[np.int64], NDArray[np.int64]]:
+        # children of merges as node indexes, leaves are 0..n-1 and node
+        # created in merge of given row is n+row
+        count = len(self.leaves)
+        position = np.zeros(self.first_id, dtype=np.int64)
+        position[[c.ID for c in self.leaves]] = np.arange(count)
+        ids = self.z[:, :2].astype(np.int64)
+        nodes = np.where(
+            ids >= self.first_id,
+            ids - self.first_id + count,
+            position[np.minimum(ids, self.first_id - 1)],
+        )
+        return nodes[:, 0], nodes[:, 1]
+
+    def _cut(self, applied: NDArray[np.bool_]) -> NDArray[np.int32]:
+        count = len(self.leaves)
+        left, right = self._nodes()
+        parent = np.arange(count + len(self.z))
+        rows = np.flatnonzero(applied)
+        parent[left[rows]] = rows + count
+        parent[right[rows]] = rows + count
+        # pointer jumping, every pass halves remaining path to root
+        while True:
+            grandparent = parent[parent]
+            if (grandparent == parent).all():
+                break
+            parent = grandparent
+        return _first_leaf_labels(parent[:count])
+
+    def _subtree_height(self) -> NDArray[np.float64]:
+        height = self.z[:, 2]
+        count = len(self.leaves)
+        left, right = self._nodes()
+        children = np.concatenate((left, right)) - count
+        parents = np.concatenate((np.arange(len(height)),) * 2)
+        inner = children >= 0
+        if (height[parents[inner]] >= height[children[inner]]).all():
+            return height
+        # non monotone trees (centroid, median) need pass in merge order
+        result = height.copy()
+        for row in range(len(result)):
+            for child in (left[row], right[row]):
+                if child >= count:
+                    result[row] = max(result[row], result[child - count])
+        return result
+
+    def _leaf_ranges(self) -> Tuple[NDArray[np.int64], NDArray[np.int64]]:
+        # leaves ordered so that every node covers contiguous range of
+        # them, start of range of every node
+        count = len(self.leaves)
+        left, right = self._nodes()
+        sizes = self._leaf_counts()
+        start = np.zeros(count + len(self.z), dtype=np.int64)
+        for row in range(len(self.z) - 1, -1, -1):
+            begin = start[count + row]
+            start[left[row]] = begin
+            start[right[row]] = begin + sizes[left[row]]
+        order = np.empty(count, dtype=np.int64)
+        order[start[:count]] = np.arange(count)
+        return order, start
+
+    def _leaf_counts(self) -> NDArray[np.int64]:
+        # leaves under every node, size column counts records instead
+        # when leaves are weighted, eg. micro-clusters
+        count = len(self.leaves)
+        left, right = self._nodes()
+        counts = np.ones(count + len(self.z), dtype=np.int64)
+        for row in range(len(self.z)):
+            counts[count + row] = counts[left[row]] + counts[right[row]]
+        return counts
+
+    def cluster(self, ID: int) -> Cluster:
+        row = ID - self.first_id
+        if row >= 0:
+            return LinkageCluster(self, row)
+        return self._leaves_by_id[ID]
+
+
+def _first_leaf_labels(nodes: NDArray[np.int64]) -> NDArray[np.int32]:
+    # consecutive labels of nodes, in order of their first occurrence
+    count = len(nodes)
+    first = np.full(nodes.max() + 1, count)
+    np.minimum.at(first, nodes, np.arange(count))
+    first_of_leaf = first[nodes]
+    label_of_first = np.cumsum(first_of_leaf == np.arange(count)) - 1
+    return label_of_first[first_of_leaf].astype(np.int32)
+
+
+class LinkageCluster(Cluster):
+    """Cluster node materialized on access from Linkage."""
+
+    linkage: Linkage
+    row: int
+
+    def __init__(self, linkage: Linkage, row: int) -> None:
+        object.__setattr__(self, "linkage", linkage)
+        object.__setattr__(self, "row", row)
+
+    @property  # type: ignore[override]
+    def ID(self) -> int:
+        return self.linkage.first_id + self.row
+
+    @property  # type: ignore[override]
+    def ob_list(self) -> Tuple[ClusterOrRecord, ...]:
+        left, right = self.linkage.z[self.row, :2]
+        return (
+            self.linkage.cluster(int(left)),
+            self.linkage.cluster(int(right)),
+        )
+
+    @property  # type: ignore[override]
+    def height(self) -> float:
+        return cast(float, self.linkage.z[self.row, 2])
+
+    def __len__(self) -> int:
+        return int(self.linkage.z[self.row, 3])
+
+    # generated dataclass methods would recurse through whole subtree
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, LinkageCluster):
+            return NotImplemented
+        return self.linkage is other.linkage and self.row == other.row
+
+    def __hash__(self) -> int:
+        return hash((id(self.linkage), self.row))
+
+    def __repr__(self) -> str:
+        return (
+            f"LinkageCluster(ID={self.ID}, size={len(self)}, "
+            f"height={self.height})"
+        )
+
+    def Z(self) -> NDArray[np.float64]:
+        if self.row == len(self.linkage.z) - 1:
+            return self.linkage.Z()
+        return super().Z()
+
+    def _as_linkage(self) -> Linkage:
+        if self.row == len(self.linkage.z) - 1:
+            return self.linkage
+        return super()._as_linkage()
@@ -0,0 +1,144 @@
+import json
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from os import PathLike
+from types import TracebackType
+from typing import Any, Callable, Dict, List, Optional, Type, Union
+
+# phases reported by engines, any other name is accepted too
+PHASES = ("initialize", "search", "update", "rebuild")
+
+# called with phase, its seconds and bytes allocated after each phase
+CallbackT = Callable[[str, float, Optional[int]], None]
+
+# tracemalloc.reset_peak() was added in Python 3.9, without it peak of
+# phase can not be measured and allocations are reported as None
+RESETTABLE_PEAK: bool = hasattr(tracemalloc, "reset_peak")
+
+
+@dataclass
+class PhaseStats:
+    calls: int = 0
+    seconds: float = 0.0
+    # sum of peak traced memory above memory traced at phase start,
+    # only counted while tracemalloc is tracing, None when peak can not
+    # be measured (Python < 3.9)
+    allocated: Optional[int] = 0
+
+
+@dataclass
+class Profiler:
+    """Cumulative time, calls and allocations of phases of HCA.
+
+    Passed to HCA, which hands it to engine. Engine calls begin() before
+    each step and lap(phase) after each of its phases, time since last
+    call is attributed to phase. Engines only touch profiler when it is
+    given, so disabled profiling costs nothing but None checks.
+
+    Allocations are measured with tracemalloc, when profiler is used as
+    context manager with trace_memory, it starts and stops tracing. On
+    Python < 3.9 peak of phase can not be measured, so allocations of
+    traced phases are None.
+    """
+
+    trace_memory: bool = False
+    # keep time of each phase of every step in steps
+    samples: bool = True
+    callback: Optional[CallbackT] = field(default=None, repr=False)
+    phases: Dict[str, PhaseStats] = field(init=False, default_factory=dict)
+    steps: List[Dict[str, float]] = field(init=False, default_factory=list)
+    _last: float = field(init=False, default=0.0, repr=False)
+    _memory: int = field(init=False, default=0, repr=False)
+    _step: Dict[str, float] = field(
+        init=False, default_factory=dict, repr=False
+    )
+    _started_tracing: bool = field(init=False, default=False, repr=False)
+
+    def __enter__(self) -> "Profiler":
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def begin(self) -> None:
+        """Start timing phases, time since last lap is not counted.
+
+        Step sample holds phases lapped since begin(), until lap() with
+        end_step, phases of unfinished sample (eg. initialize) are only
+        counted in cumulative stats.
+        """
+        self._step = {}
+        if RESETTABLE_PEAK and tracemalloc.is_tracing():
+            self._memory = _reset_peak()
+        self._last = time.perf_counter()
+
+    def lap(self, phase: str, end_step: bool = False) -> None:
+        """Attribute time since last begin() or lap() to phase."""
+        seconds = time.perf_counter() - self._last
+        allocated: Optional[int] = 0
+        if tracemalloc.is_tracing():
+            if RESETTABLE_PEAK:
+                _, peak = tracemalloc.get_traced_memory()
+                allocated = max(0, peak - self._memory)
+                self._memory = _reset_peak()
+            else:
+                allocated = None
+        stats = self.phases.get(phase)
+        if stats is None:
+            stats = self.phases[phase] = PhaseStats()
+        stats.calls += 1
+        stats.seconds += seconds
+        if allocated is None or stats.allocated is None:
+            stats.allocated = None
+        else:
+            stats.allocated += allocated
+        if self.samples:
+            self._step[phase] = self._step.get(phase, 0.0) + seconds
+            if end_step:
+                self.steps.append(self._step)
+                self._step = {}
+        if self.callback is not None:
+            self.callback(phase, seconds, allocated)
+        # time spent here is not counted to next phase
+        self._last = time.perf_counter()
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(stats.seconds for stats in self.phases.values())
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "total_seconds": self.total_seconds,
+            "phases": {
+                name: asdict(stats) for name, stats in self.phases.items()
+            },
+            "steps": list(self.steps),
+        }
+
+    def to_json(
+        self, path: Optional[Union[str, "PathLike[str]"]] = None
+    ) -> str:
+        """Serialize as_dict() to JSON, written to path when given."""
+        text = json.dumps(self.as_dict(), indent=2)
+        if path is not None:
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(text)
+        return text
+
+
+def _reset_peak() -> int:
+    # returns currently traced memory, which is new peak
+    getattr(tracemalloc, "reset_peak")()
+    current, _ = tracemalloc.get_traced_memory()
+    return current
@@ -1,10 +1,25 @@
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
 from inspect import isclass
-from numbers import Number
-from typing import Any, Iterable, List, Tuple, Type, TypeVar
+from numbers import Integral, Number
+from os import PathLike
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    cast,
+)
 
 import numpy as np
+import pandas as pd
 from numpy.typing import NDArray
 
 T = TypeVar("T", bound="RecordBase")
@@ -12,6 +27,10 @@ T = TypeVar("T", bound="RecordBase")
 
 _CAMEL_CASE_REGEX: re.Pattern = re.compile(r"([A-Z0-9][a-z0-9]+)")
 
+# numeric field names of record classes, inspecting fields on every
+# numeric() call dominated conversion of records to arrays
+_NUMERIC_FIELDS: Dict[type, Tuple[str, ...]] = {}
+
 
 @dataclass(frozen=True)
 class RecordBase:
@@ -19,20 +38,57 @@ class RecordBase:
 
     def numeric(self) -> NDArray[np.float64]:
         return np.array(
-            [
-                self.__dict__[k]
-                for k, v in self.__dataclass_fields__.items()
-                if isclass(v.type) and issubclass(v.type, Number) and k != "ID"
-            ],
+            [self.__dict__[k] for k in self.numeric_fields()],
             dtype=np.float64,
         )
 
+    @classmethod
+    def numeric_fields(cls) -> Tuple[str, ...]:
+        try:
+            return _NUMERIC_FIELDS[cls]
+        except KeyError:
+            pass
+        names = tuple(
+            k
+            for k, v in cls.__dataclass_fields__.items()
+            if isclass(v.type) and issubclass(v.type, Number) and k != "ID"
+        )
+        _NUMERIC_FIELDS[cls] = names
+        return names
+
     @classmethod
     def new(cls: Type[T], data: Iterable[Iterable[Any]]) -> Tuple[T, ...]:
         return tuple(
             cls(index, *(e for e in row)) for index, row in enumerate(data)
         )
 
+    @classmethod
+    def from_array(
+        cls, data: NDArray[Any], first_id: int = 0
+    ) -> "RecordBatch":
+        data = np.asarray(data)
+        if data.ndim != 2:
+            raise ValueError(f"Expected 2D array, got {data.ndim}D.")
+        return RecordBatch.from_columns(cls, list(data.T), first_id)
+
+    @classmethod
+    def read_csv(
+        cls,
+        path: Union[str, "PathLike[str]"],
+        chunksize: Optional[int] = None,
+        **kwargs: Any,
+    ) -> Union["RecordBatch", Iterator["RecordBatch"]]:
+        """Read CSV file, columns are matched with fields by position.
+
+        With chunksize, returns iterator of batches of at most chunksize
+        records, with IDs continuing between batches.
+        """
+        if chunksize is None:
+            frame = pd.read_csv(path, **kwargs)
+            return RecordBatch.from_frame(cls, frame)
+        reader = pd.read_csv(path, chunksize=chunksize, **kwargs)
+        return _read_chunks(cls, reader)
+
     @classmethod
     def class_name(cls) -> str:
         return " ".join(_CAMEL_CASE_REGEX.findall(cls.__qualname__)).lower()
@@ -47,10 +103,260 @@ class RecordBase:
         return [
             k
             for k, v in self.__dataclass_fields__.items()
-            if issubclass(v.type, Number)
+            if issubclass(cast(type, v.type), Number)
         ]
 
 
+class RecordView:
+    """Lightweight view of single row of RecordBatch."""
+
+    __slots__ = ("batch", "index")
+
+    def __init__(self, batch: "RecordBatch", index: int) -> None:
+        self.batch = batch
+        self.index = index
+
+    @property
+    def ID(self) -> int:
+        return int(self.batch.ids[self.index])
+
+    def numeric(self) -> NDArray[np.float64]:
+        return cast(NDArray[np.float64], self.batch.numeric[self.index])
+
+    def record(self) -> RecordBase:
+        return self.batch.record(self.index)
+
+    def class_name(self) -> str:
+        return self.batch.record_type.class_name()
+
+    def columns(self) -> List[str]:
+        return self.batch.columns()
+
+    def columns_numeric(self) -> List[str]:
+        return ["ID", *self.batch.record_type.numeric_fields()]
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__") or name in RecordView.__slots__:
+            raise AttributeError(name)
+        return self.batch.value(name, self.index)
+
+    def __len__(self) -> int:
+        return 1
+
+    def __repr__(self) -> str:
+        return f"RecordView(ID={self.ID}, index={self.index})"
+
+
+@dataclass(frozen=True, eq=False)
+class RecordBatch:
+    """Columnar storage of records of single RecordBase subclass.
+
+    Numeric fields are kept in one Fortran ordered matrix, so each field
+    is a contiguous column and to_numpy_array() returns it without copy.
+    Remaining fields are kept as object arrays. Records are created only
+    when requested, indexing yields RecordView objects.
+    """
+
+    record_type: Type[RecordBase]
+    ids: NDArray[np.int64]
+    numeric: NDArray[np.float64]
+    other: Dict[str, NDArray[np.object_]] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        numeric = np.asfortranarray(self.numeric, dtype=np.float64)
+        shape = (len(self.ids), len(self.record_type.numeric_fields()))
+        if numeric.shape != shape:
+            raise ValueError(
+                f"Expected numeric matrix of shape {shape}, "
+                f"got {numeric.shape}."
+            )
+        numeric.setflags(write=False)
+        object.__setattr__(self, "numeric", numeric)
+        object.__setattr__(self, "ids", np.asarray(self.ids, np.int64))
+
+    @classmethod
+    def from_records(cls, records: Sequence[RecordBase]) -> "RecordBatch":
+        if not records:
+            raise ValueError("Can't create RecordBatch without records.")
+        record_type = type(records[0])
+        if any(type(r) is not record_type for r in records):
+            raise TypeError("RecordBatch requires records of single type.")
+        numeric_fields = record_type.numeric_fields()
+        numeric = np.empty((len(records), len(numeric_fields)), order="F")
+        for column, name in enumerate(numeric_fields):
+            numeric[:, column] = [r.__dict__[name] for r in records]
+        other = {}
+        for name in _other_fields(record_type):
+            values = np.empty(len(records), dtype=object)
+            values[:] = [r.__dict__[name] for r in records]
+            other[name] = values
+        ids = np.fromiter((r.ID for r in records), np.int64, len(records))
+        return cls(record_type, ids, numeric, other)
+
+    @classmethod
+    def from_frame(
+        cls,
+        record_type: Type[RecordBase],
+        frame: pd.DataFrame,
+        first_id: int = 0,
+    ) -> "RecordBatch":
+        columns = [frame.iloc[:, i].to_numpy() for i in range(frame.shape[1])]
+        return cls.from_columns(record_type, columns, first_id)
+
+    @classmethod
+    def from_columns(
+        cls,
+        record_type: Type[RecordBase],
+        columns: Sequence[NDArray[Any]],
+        first_id: int = 0,
+    ) -> "RecordBatch":
+        """Create batch from columns given in order of fields, without ID.
+
+        Types are validated once per column, not per value.
+        """
+        names = [f.name for f in fields(record_type) if f.name != "ID"]
+        if len(columns) != len(names):
+            raise ValueError(
+                f"{record_type.__qualname__} has {len(names)} fields, "
+                f"got {len(columns)} columns."
+            )
+        length = len(columns[0]) if columns else 0
+        by_name = dict(zip(names, columns))
+        numeric_fields = record_type.numeric_fields()
+        numeric = np.empty((length, len(numeric_fields)), order="F")
+        for index, name in enumerate(numeric_fields):
+            field_type = cast(
+                type, record_type.__dataclass_fields__[name].type
+            )
+            numeric[:, index] = _numeric_column(
+                name, field_type, by_name[name]
+            )
+        other = {
+            name: _other_column(
+                name,
+                record_type.__dataclass_fields__[name].type,
+                by_name[name],
+            )
+            for name in _other_fields(record_type)
+        }
+        ids = np.arange(first_id, first_id + length, dtype=np.int64)
+        return cls(record_type, ids, numeric, other)
+
+    def column(self, name: str) -> NDArray[Any]:
+        if name == "ID":
+            return self.ids
+        if name in self.other:
+            return self.other[name]
+        numeric_fields = self.record_type.numeric_fields()
+        if name not in numeric_fields:
+            raise KeyError(name)
+        return self.numeric[:, numeric_fields.index(name)]
+
+    def value(self, name: str, index: int) -> Any:
+        try:
+            return self.column(name)[index]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def columns(self) -> List[str]:
+        return [f.name for f in fields(self.record_type)]
+
+    def record(self, index: int) -> RecordBase:
+        return self.record_type(
+            **{name: self.value(name, index) for name in self.columns()}
+        )
+
+    def records(self) -> Tuple[RecordBase, ...]:
+        return tuple(self.record(i) for i in range(len(self)))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: int) -> RecordView:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return RecordView(self, index)
+
+    def __iter__(self) -> Iterator[RecordView]:
+        return (RecordView(self, i) for i in range(len(self)))
+
+
+def _numeric_column(
+    name: str, field_type: type, column: NDArray[Any]
+) -> NDArray[np.float64]:
+    try:
+        values = np.asarray(column, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise TypeError(f"Column of field {name!r} is not numeric.") from None
+    if issubclass(field_type, Integral):
+        if np.isnan(values).any():
+            raise ValueError(f"Column of field {name!r} has missing values.")
+        if not np.all(np.mod(values, 1) == 0):
+            raise TypeError(f"Column of field {name!r} is not integral.")
+    return values
+
+
+# types of values of column of given pandas.api.types.infer_dtype() kind
+_INFERRED_TYPES: Dict[str, type] = {
+    "string": str,
+    "bytes": bytes,
+    "boolean": bool,
+    "integer": int,
+    "floating": float,
+    "complex": complex,
+}
+
+
+def _other_column(
+    name: str, field_type: Any, column: NDArray[Any]
+) -> NDArray[np.object_]:
+    values = np.empty(len(column), dtype=object)
+    values[:] = column
+    # annotations which are not classes, eg. Optional[str], are not checked
+    if not isclass(field_type) or field_type is object:
+        return values
+    column = np.asarray(column)
+    if column.dtype.kind == "U" and issubclass(np.str_, field_type):
+        return values
+    if pd.isna(values).any():
+        raise ValueError(f"Column of field {name!r} has missing values.")
+    # type of whole column is inferred at once, only columns of other
+    # types, eg. enums or mixed ones, are checked value by value
+    inferred = _INFERRED_TYPES.get(
+        pd.api.types.infer_dtype(values, skipna=False)
+    )
+    if inferred is not None:
+        valid = issubclass(inferred, field_type)
+    else:
+        valid = all(isinstance(value, field_type) for value in values)
+    if not valid:
+        raise TypeError(
+            f"Column of field {name!r} is not {field_type.__qualname__}."
+        )
+    return values
+
+
+def _read_chunks(
+    record_type: Type[RecordBase], reader: Iterable[pd.DataFrame]
+) -> Iterator[RecordBatch]:
+    first_id = 0
+    for frame in reader:
+        batch = RecordBatch.from_frame(record_type, frame, first_id)
+        first_id += len(batch)
+        yield batch
+
+
+def _other_fields(record_type: Type[RecordBase]) -> List[str]:
+    numeric_fields = record_type.numeric_fields()
+    return [
+        f.name
+        for f in fields(record_type)
+        if f.name != "ID" and f.name not in numeric_fields
+    ]
+
+
 def autoscale(data: NDArray[np.float64]) -> NDArray[np.float64]:
     return np.array(
         [
@@ -62,8 +368,109 @@ def autoscale(data: NDArray[np.float64]) -> NDArray[np.float64]:
     ).T
 
 
-def to_numpy_array(data: Tuple[RecordBase, ...]) -> NDArray[np.float64]:
+@dataclass
+class Autoscaler:
+    """Incremental version of autoscale(), fitted chunk by chunk.
+
+    Mean and variance of chunks are merged with Chan et al. formula, so
+    data never has to be in memory at once. As in autoscale(), standard
+    deviation is computed with ddof=0.
+    """
+
+    count: int = field(default=0, init=False)
+    mean: Optional[NDArray[np.float64]] = field(default=None, init=False)
+    # sum of squared differences from mean
+    m2: Optional[NDArray[np.float64]] = field(default=None, init=False)
+
+    def partial_fit(
+        self, chunk: Union[NDArray[np.float64], RecordBatch]
+    ) -> "Autoscaler":
+        data = _as_matrix(chunk)
+        count = len(data)
+        if count == 0:
+            return self
+        mean = data.mean(axis=0)
+        m2 = ((data - mean) ** 2).sum(axis=0)
+        if self.mean is None or self.m2 is None:
+            self.count, self.mean, self.m2 = count, mean, m2
+            return self
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / total)
+        self.m2 = self.m2 + m2 + delta**2 * (self.count * count / total)
+        self.count = total
+        return self
+
+    def fit(
+        self, chunks: Iterable[Union[NDArray[np.float64], RecordBatch]]
+    ) -> "Autoscaler":
+        for chunk in chunks:
+            self.partial_fit(chunk)
+        return self
+
+    @property
+    def std(self) -> NDArray[np.float64]:
+        if self.m2 is None:
+            raise ValueError("Autoscaler was not fitted.")
+        return cast(NDArray[np.float64], np.sqrt(self.m2 / self.count))
+
+    def transform(
+        self,
+        chunk: Union[NDArray[np.float64], RecordBatch],
+        out: Optional[NDArray[np.float64]] = None,
+        inplace: bool = False,
+    ) -> NDArray[np.float64]:
+        """Scale chunk with fitted mean and std.
+
+        With inplace=True chunk itself is overwritten, which requires
+        writable float64 array, ValueError is raised otherwise.
+        """
+        std = self.std
+        mean = cast(NDArray[np.float64], self.mean)
+        data = _as_matrix(chunk)
+        if inplace:
+            if data is not chunk or not data.flags.writeable:
+                raise ValueError(
+                    "Only writable float64 array can be scaled in place."
+                )
+            out = data
+        out = np.subtract(data, mean, out=out)
+        return cast(NDArray[np.float64], np.divide(out, std, out=out))
+
+    def fit_transform(
+        self, data: Union[NDArray[np.float64], RecordBatch]
+    ) -> NDArray[np.float64]:
+        return self.partial_fit(data).transform(data)
+
+
+def _as_matrix(
+    data: Union[NDArray[np.float64], RecordBatch]
+) -> NDArray[np.float64]:
+    if isinstance(data, RecordBatch):
+        return data.numeric
+    return np.asarray(data, dtype=np.float64)
+
+
+RecordsT = Union[RecordBatch, Sequence[RecordBase], Sequence[RecordView]]
+
+
+def to_numpy_array(data: RecordsT) -> NDArray[np.float64]:
+    if isinstance(data, RecordBatch):
+        return data.numeric
+    batch = _common_batch(data)
+    if batch is not None:
+        return batch.numeric[[cast(RecordView, d).index for d in data]]
     return np.array(
         [d.numeric() for d in data],
         dtype=np.float64,
     )
+
+
+def _common_batch(data: Sequence[Any]) -> Optional[RecordBatch]:
+    if not data or not isinstance(data[0], RecordView):
+        return None
+    batch = data[0].batch
+    for d in data:
+        if not isinstance(d, RecordView) or d.batch is not batch:
+            return None
+    return batch
@@ -0,0 +1,352 @@
+import tempfile
+from abc import ABC, abstractmethod
+from os import PathLike
+from types import TracebackType
+from typing import IO, List, Optional, Tuple, Type, TypeVar, Union, cast
+
+import numpy as np
+from numpy.typing import DTypeLike, NDArray
+
+from .builder import TileBuilder
+from .cluster import Cluster
+from .distance.distance import PAIRWISE_BLOCK_ITEMS
+from .distance_selector import DistanceSelectorBase
+from .record import RecordBase, to_numpy_array
+
+T = TypeVar("T", bound="DistanceStorageBase")
+
+ValuesT = Union[float, NDArray[np.float64]]
+
+# directory in which memory mapped storage file is created
+BackingT = Optional[Union[str, "PathLike[str]"]]
+
+
+class DistanceStorageBase(ABC):
+    """Symmetric distance matrix with infinite diagonal used by engines."""
+
+    def __init__(self, size: int, dtype: DTypeLike = np.float64) -> None:
+        self.size = size
+        # float32 halves memory, distances are computed in float64 anyway
+        self.dtype = floating_dtype(dtype)
+        # anonymous file behind memory map, removed when closed
+        self._file: Optional[IO[bytes]] = None
+
+    @classmethod
+    @abstractmethod
+    def allocate(
+        cls: Type[T],
+        size: int,
+        backing: BackingT = None,
+        dtype: DTypeLike = np.float64,
+    ) -> T:
+        """Allocate storage, in memory mapped file in backing directory."""
+
+    @classmethod
+    @abstractmethod
+    def from_matrix(
+        cls: Type[T],
+        matrix: NDArray[np.float64],
+        backing: BackingT = None,
+        dtype: DTypeLike = np.float64,
+    ) -> T:
+        """Copy square matrix or condensed (scipy pdist) vector."""
+
+    @classmethod
+    @abstractmethod
+    def from_values(
+        cls: Type[T], values: NDArray[np.float64], backing: BackingT = None
+    ) -> T:
+        """Create storage holding given values, see values property."""
+
+    @property
+    @abstractmethod
+    def values(self) -> NDArray[np.float64]:
+        """Array in which distances are kept."""
+
+    @classmethod
+    def from_data(
+        cls: Type[T],
+        data: List[Cluster],
+        distance_selector: DistanceSelectorBase,
+        backing: BackingT = None,
+        builder: Optional[TileBuilder] = None,
+        dtype: DTypeLike = np.float64,
+    ) -> T:
+        if not distance_selector.batched:
+            return cls.from_matrix(
+                distance_selector.initial_distance_matrix(data),
+                backing,
+                dtype,
+            )
+        records = to_numpy_array(tuple(cast(RecordBase, c[0]) for c in data))
+        storage = cls.allocate(len(records), backing, dtype)
+        (builder or TileBuilder()).fill(
+            storage, records, distance_selector.distance
+        )
+        return storage
+
+    @classmethod
+    def _copy_matrix(
+        cls: Type[T],
+        matrix: NDArray[np.float64],
+        backing: BackingT,
+        dtype: DTypeLike,
+    ) -> T:
+        # copied in row blocks, so source is never expanded in memory
+        if matrix.ndim == 1:
+            size = condensed_size(len(matrix))
+            rows = CondensedStorage(matrix).rows
+        else:
+            size = len(matrix)
+            rows = matrix.__getitem__
+        storage = cls.allocate(size, backing, dtype)
+        step = max(1, PAIRWISE_BLOCK_ITEMS // max(1, size))
+        for start in range(0, size, step):
+            block = np.arange(start, min(size, start + step))
+            storage.set_tile(start, start, rows(block)[:, start:])
+        return storage
+
+    def close(self) -> None:
+        """Release memory mapped file, storage can't be used afterwards."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self: T) -> T:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    @abstractmethod
+    def set_tile(
+        self, row: int, column: int, values: NDArray[np.float64]
+    ) -> None:
+        """Store tile of distances with top left corner at (row, column).
+
+        Only part of tile above diagonal of matrix is used, column is
+        expected not to be lower than row.
+        """
+
+    @abstractmethod
+    def distance(self, first: int, second: int) -> float:
+        ...
+
+    @abstractmethod
+    def row(self, index: int) -> NDArray[np.float64]:
+        """Distances from index to all clusters, may be view of storage."""
+
+    def rows(self, indexes: NDArray[np.int64]) -> NDArray[np.float64]:
+        if len(indexes) == 0:
+            return np.empty((0, self.size), dtype=self.dtype)
+        return np.stack([self.row(i) for i in indexes])
+
+    @abstractmethod
+    def set_row(self, index: int, values: ValuesT) -> None:
+        """Set both row and column of index, diagonal stays infinite."""
+
+
+class SquareStorage(DistanceStorageBase):
+    def __init__(self, matrix: NDArray[np.float64]) -> None:
+        super().__init__(len(matrix), matrix.dtype)
+        self.matrix = matrix
+        np.fill_diagonal(self.matrix, np.inf)
+
+    @classmethod
+    def allocate(
+        cls,
+        size: int,
+        backing: BackingT = None,
+        dtype: DTypeLike = np.float64,
+    ) -> "SquareStorage":
+        matrix, file = _buffer((size, size), backing, dtype)
+        storage = cls(matrix)
+        storage._file = file
+        return storage
+
+    @classmethod
+    def from_matrix(
+        cls,
+        matrix: NDArray[np.float64],
+        backing: BackingT = None,
+        dtype: DTypeLike = np.float64,
+    ) -> "SquareStorage":
+        matrix = np.asarray(matrix)
+        if backing is not None:
+            return cls._copy_matrix(matrix, backing, dtype)
+        if matrix.ndim == 1:
+            return cls(square_matrix(matrix.astype(dtype)))
+        return cls(matrix.astype(dtype))
+
+    @classmethod
+    def from_values(
+        cls, values: NDArray[np.float64], backing: BackingT = None
+    ) -> "SquareStorage":
+        if backing is None:
+            return cls(values)
+        storage = cls.allocate(len(values), backing, values.dtype)
+        storage.matrix[...] = values
+        return storage
+
+    @property
+    def values(self) -> NDArray[np.float64]:
+        return self.matrix
+
+    def set_tile(
+        self, row: int, column: int, values: NDArray[np.float64]
+    ) -> None:
+        rows, columns = values.shape
+        self.matrix[row : row + rows, column : column + columns] = values
+        self.matrix[column : column + columns, row : row + rows] = values.T
+        # only diagonal cells inside of tile are restored
+        diagonal = np.arange(
+            max(row, column), min(row + rows, column + columns)
+        )
+        self.matrix[diagonal, diagonal] = np.inf
+
+    def distance(self, first: int, second: int) -> float:
+        return cast(float, self.matrix[first, second])
+
+    def row(self, index: int) -> NDArray[np.float64]:
+        return cast(NDArray[np.float64], self.matrix[index])
+
+    def rows(self, indexes: NDArray[np.int64]) -> NDArray[np.float64]:
+        return self.matrix[indexes]
+
+    def set_row(self, index: int, values: ValuesT) -> None:
+        self.matrix[index, :] = values
+        self.matrix[:, index] = values
+        self.matrix[index, index] = np.inf
+
+
+class CondensedStorage(DistanceStorageBase):
+    """Upper triangle of matrix stored row by row, same as scipy pdist."""
+
+    def __init__(self, condensed: NDArray[np.float64]) -> None:
+        super().__init__(condensed_size(len(condensed)), condensed.dtype)
+        self.condensed = condensed
+        index = np.arange(self.size, dtype=np.int64)
+        # position of (i, j), i < j, is _offsets[i] + j
+        self._offsets = (
+            self.size * index - index * (index + 1) // 2 - index - 1
+        )
+
+    @classmethod
+    def allocate(
+        cls,
+        size: int,
+        backing: BackingT = None,
+        dtype: DTypeLike = np.float64,
+    ) -> "CondensedStorage":
+        condensed, file = _buffer((size * (size - 1) // 2,), backing, dtype)
+        storage = cls(condensed)
+        storage._file = file
+        return storage
+
+    @classmethod
+    def from_matrix(
+        cls,
+        matrix: NDArray[np.float64],
+        backing: BackingT = None,
+        dtype: DTypeLike = np.float64,
+    ) -> "CondensedStorage":
+        matrix = np.asarray(matrix)
+        if backing is not None:
+            return cls._copy_matrix(matrix, backing, dtype)
+        if matrix.ndim == 1:
+            return cls(matrix.astype(dtype))
+        return cls(matrix[np.triu_indices(len(matrix), 1)].astype(dtype))
+
+    @classmethod
+    def from_values(
+        cls, values: NDArray[np.float64], backing: BackingT = None
+    ) -> "CondensedStorage":
+        if backing is None:
+            return cls(values)
+        size = condensed_size(len(values))
+        storage = cls.allocate(size, backing, values.dtype)
+        storage.condensed[...] = values
+        return storage
+
+    @property
+    def values(self) -> NDArray[np.float64]:
+        return self.condensed
+
+    def set_tile(
+        self, row: int, column: int, values: NDArray[np.float64]
+    ) -> None:
+        columns = values.shape[1]
+        for i, row_values in enumerate(values, start=row):
+            first = max(column, i + 1)
+            last = column + columns
+            if first < last:
+                start = self._offsets[i] + first
+                self.condensed[start : start + last - first] = row_values[
+                    first - column :
+                ]
+
+    def distance(self, first: int, second: int) -> float:
+        if first == second:
+            return np.inf
+        first, second = min(first, second), max(first, second)
+        return cast(float, self.condensed[self._offsets[first] + second])
+
+    def row(self, index: int) -> NDArray[np.float64]:
+        result = np.empty(self.size, dtype=self.condensed.dtype)
+        result[:index] = self.condensed[self._offsets[:index] + index]
+        result[index] = np.inf
+        start = self._offsets[index] + index + 1
+        result[index + 1 :] = self.condensed[
+            start : start + self.size - index - 1
+        ]
+        return result
+
+    def set_row(self, index: int, values: ValuesT) -> None:
+        values = np.broadcast_to(values, (self.size,))
+        self.condensed[self._offsets[:index] + index] = values[:index]
+        start = self._offsets[index] + index + 1
+        self.condensed[start : start + self.size - index - 1] = values[
+            index + 1 :
+        ]
+
+
+def _buffer(
+    shape: Tuple[int, ...], backing: BackingT, dtype: DTypeLike
+) -> Tuple[NDArray[np.float64], Optional[IO[bytes]]]:
+    if backing is None:
+        return np.empty(shape, dtype=dtype), None
+    # temporary file has no name (or is deleted on close on Windows), so
+    # it is removed when closed, even if process is killed
+    file = tempfile.TemporaryFile(dir=backing)
+    return np.memmap(file, dtype=dtype, mode="w+", shape=shape), file
+
+
+def floating_dtype(dtype: DTypeLike) -> np.dtype:
+    # infinity marks diagonal and merged clusters, integers can't hold it
+    result = np.dtype(dtype)
+    if not np.issubdtype(result, np.floating):
+        raise ValueError(f"Distance dtype has to be floating, got {result}.")
+    return result
+
+
+def condensed_size(length: int) -> int:
+    size = int(round((1 + np.sqrt(1 + 8 * length)) / 2))
+    if size * (size - 1) // 2 != length:
+        raise ValueError(
+            f"Vector of length {length} is not a condensed distance matrix."
+        )
+    return size
+
+
+def square_matrix(condensed: NDArray[np.float64]) -> NDArray[np.float64]:
+    size = condensed_size(len(condensed))
+    matrix = np.zeros((size, size), dtype=condensed.dtype)
+    upper = np.triu_indices(size, 1)
+    matrix[upper] = condensed
+    matrix.T[upper] = condensed
+    return matrix
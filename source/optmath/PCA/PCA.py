@@ -8,15 +8,36 @@ from matplotlib.figure import Figure
 from numpy.typing import NDArray
 
 from .. import RecordBase, to_numpy_array
+from ..common.cache import ResultCache
 
 TableOfFloatAndNDArray = Tuple[Tuple[float, NDArray[np.float64]], ...]
 
 
-def PCA(autoscaled_data: Tuple[RecordBase, ...]) -> "PCAResutsView":
+def PCA(
+    autoscaled_data: Tuple[RecordBase, ...],
+    cache: Optional[ResultCache] = None,
+) -> "PCAResutsView":
     nd_data = to_numpy_array(autoscaled_data)
-    correlation_matrix = (nd_data.T @ nd_data) / (nd_data.shape[0])
-
-    eigenvalues, vectors = np.linalg.eig(correlation_matrix)
+    key = None
+    cached = None
+    if cache is not None:
+        key = ResultCache.key("PCA", nd_data)
+        cached = cache.get(key)
+    if cached is not None:
+        correlation_matrix = cached["correlation_matrix"]
+        eigenvalues, vectors = cached["eigenvalues"], cached["vectors"]
+    else:
+        correlation_matrix = (nd_data.T @ nd_data) / (nd_data.shape[0])
+        eigenvalues, vectors = np.linalg.eig(correlation_matrix)
+        if cache is not None and key is not None:
+            cache.put(
+                key,
+                {
+                    "correlation_matrix": correlation_matrix,
+                    "eigenvalues": eigenvalues,
+                    "vectors": vectors,
+                },
+            )
 
     sorted_eigenvalue_vector_pairs: TableOfFloatAndNDArray = tuple(
         sorted(
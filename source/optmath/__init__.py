@@ -1,4 +1,10 @@
-from .HCA import RecordBase, autoscale, to_numpy_array
+from .HCA import (
+    Autoscaler,
+    RecordBase,
+    RecordBatch,
+    autoscale,
+    to_numpy_array,
+)
 from .PCA import PCA, PCAResutsView
 
 __version__ = "1.1.7"
@@ -6,6 +12,8 @@ __version__ = "1.1.7"
 
 __all__ = [
     "RecordBase",
+    "RecordBatch",
+    "Autoscaler",
     "autoscale",
     "to_numpy_array",
     "PCA",
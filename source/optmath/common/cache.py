@@ -0,0 +1,192 @@
+"""On-disk cache of computation results stored as arrays."""
+
+import hashlib
+import os
+import tempfile
+from dataclasses import fields, is_dataclass
+from inspect import isroutine
+from os import PathLike
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union, cast
+
+import numpy as np
+from numpy.typing import NDArray
+
+ArraysT = Dict[str, NDArray[Any]]
+
+# bumped whenever hashing of key parts or layout of entries changes
+CACHE_FORMAT: int = 1
+
+
+class ResultCache:
+    """Directory of npz files keyed by content hash of inputs.
+
+    Least recently used entries are removed when total size of cache
+    exceeds max_bytes. Entries are written atomically, so cache can be
+    shared between processes.
+    """
+
+    SUFFIX = ".npz"
+
+    def __init__(
+        self,
+        directory: Union[str, "PathLike[str]"],
+        max_bytes: int = 1 << 30,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        """Compute key from arrays and configuration objects.
+
+        Parameters
+        ----------
+        *parts : Any
+            numpy arrays are hashed by dtype, shape and content, other
+            objects by their type and dataclass fields, slots or
+            instance attributes.
+
+        Returns
+        -------
+        str
+            Hex digest of BLAKE2b hash, which depends also on optmath
+            version and CACHE_FORMAT, so entries of other versions miss.
+
+        Raises
+        ------
+        TypeError
+            When part is function or object without attributes which
+            could identify it.
+        """
+        # imported here, optmath package imports this module
+        from optmath import __version__
+
+        digest = hashlib.blake2b(digest_size=20)
+        _update(digest, ("optmath", __version__, CACHE_FORMAT))
+        for part in parts:
+            _update(digest, part)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[ArraysT]:
+        """Load arrays stored under key, None when missing.
+
+        Parameters
+        ----------
+        key : str
+            key returned by ResultCache.key().
+
+        Returns
+        -------
+        Optional[Dict[str, NDArray]]
+            Stored arrays or None.
+        """
+        path = self._path(key)
+        try:
+            with np.load(path) as file:
+                arrays = {name: file[name] for name in file.files}
+        except (OSError, ValueError):
+            return None
+        try:
+            # modification time orders entries for eviction
+            os.utime(path)
+        except OSError:
+            pass
+        return arrays
+
+    def put(self, key: str, arrays: ArraysT) -> None:
+        """Store arrays under key and evict least recently used entries.
+
+        Parameters
+        ----------
+        key : str
+            key returned by ResultCache.key().
+        arrays : Dict[str, NDArray]
+            arrays to store, saved with numpy.savez().
+        """
+        handle, temporary = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(handle, "wb") as file:
+                np.savez(file, **cast(Dict[str, Any], arrays))
+            os.replace(temporary, self._path(key))
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove least recently used entries until cache fits max_bytes."""
+        entries = []
+        for path in self.directory.glob(f"*{self.SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        for path in self.directory.glob(f"*{self.SUFFIX}"):
+            path.unlink()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.SUFFIX}"
+
+
+def _update(digest: Any, part: Any) -> None:
+    if isinstance(part, np.ndarray):
+        array = np.ascontiguousarray(part)
+        digest.update(f"array:{array.dtype.str}:{array.shape}".encode())
+        digest.update(array.data)
+    elif isinstance(part, (list, tuple)):
+        digest.update(f"{type(part).__name__}:{len(part)}".encode())
+        for element in part:
+            _update(digest, element)
+    elif isinstance(part, (np.generic, np.dtype)):
+        digest.update(f"numpy:{part!r}".encode())
+    elif part is None or isinstance(part, (bool, int, float, str, bytes)):
+        digest.update(f"{type(part).__name__}:{part!r}".encode())
+    elif isinstance(part, type):
+        digest.update(f"type:{part.__module__}.{part.__qualname__}".encode())
+    else:
+        # configuration objects, eg. distance selectors, are identified
+        # by type and attributes, their repr may contain memory address
+        _update(digest, type(part))
+        for name in _attribute_names(part):
+            _update(digest, name)
+            _update(digest, getattr(part, name))
+
+
+def _attribute_names(part: Any) -> List[str]:
+    if isroutine(part):
+        raise TypeError(f"Can not compute cache key of {part!r}.")
+    if is_dataclass(part):
+        return [f.name for f in fields(part)]
+    names = set(getattr(part, "__dict__", ()))
+    slotted = False
+    for cls in type(part).__mro__:
+        slots = cls.__dict__.get("__slots__", ())
+        slotted |= "__slots__" in cls.__dict__ and cls is not object
+        if isinstance(slots, str):
+            slots = (slots,)
+        names.update(
+            name
+            for name in slots
+            if name not in ("__dict__", "__weakref__") and hasattr(part, name)
+        )
+    if not slotted and not hasattr(part, "__dict__"):
+        raise TypeError(
+            f"Can not compute cache key of {type(part).__qualname__}."
+        )
+    return sorted(names)
@@ -0,0 +1,96 @@
+from dataclasses import dataclass
+
+import numpy
+import pytest
+
+from optmath.HCA import (
+    HCA,
+    ApproximateHCA,
+    AverageLinkage,
+    Cluster,
+    Euclidean,
+    MicroCluster,
+    MicroClustering,
+    RecordBase,
+    Ward,
+)
+
+
+@dataclass(frozen=True)
+class Point(RecordBase):
+    x: float
+    y: float
+
+
+def canonical(labels: numpy.ndarray) -> list:
+    mapping: dict = {}
+    return [mapping.setdefault(label, len(mapping)) for label in labels]
+
+
+@pytest.fixture(scope="module")
+def blobs() -> numpy.ndarray:
+    random = numpy.random.default_rng(0)
+    centers = numpy.array([[0.0, 0.0], [10.0, 0.0], [0.0, 10.0]])
+    return numpy.concatenate(
+        [center + random.normal(size=(200, 2)) for center in centers]
+    )
+
+
+def chunks_of(raw: numpy.ndarray, size: int) -> list:
+    return [
+        Point.from_array(raw[start : start + size], start)
+        for start in range(0, len(raw), size)
+    ]
+
+
+def test_micro_clustering_counts(blobs: numpy.ndarray):
+    clustering = MicroClustering(20).fit(numpy.array_split(blobs, 7))
+    assert clustering.centroids.shape == (20, 2)
+    assert clustering.counts.sum() == len(blobs)
+    labels, distances = clustering.assign(blobs)
+    assert labels.shape == distances.shape == (len(blobs),)
+    assert (distances >= 0).all()
+
+
+def test_micro_clustering_not_fitted():
+    with pytest.raises(ValueError):
+        MicroClustering(3).assign(numpy.zeros((2, 2)))
+
+
+def test_micro_cluster_weight_is_size():
+    cluster = MicroCluster(0, (Point(0, 1.0, 2.0),), weight=7)
+    assert len(cluster) == 7
+
+
+def test_approximate_recovers_blobs(blobs: numpy.ndarray):
+    chunks = chunks_of(blobs, 128)
+    result = ApproximateHCA(
+        chunks, Ward(Euclidean()), max_clusters=30
+    ).result()
+    assert result.assignment.shape == (len(blobs),)
+    assert result.linkage.Z()[-1, 3] == len(blobs)
+    assert result.error.micro_clusters <= 30
+    assert result.error.max_distance < 3.0
+    levels = result.linkage.labels_all_levels()
+    micro = result.error.micro_clusters
+    assert list(levels[micro - 3]) == list(result.linkage.labels(k=3))
+    labels = result.labels(k=3)
+    assert canonical(labels) == [0] * 200 + [1] * 200 + [2] * 200
+
+
+def test_approximate_rejects_iterators(blobs: numpy.ndarray):
+    chunks = iter(chunks_of(blobs, 128))
+    with pytest.raises(TypeError, match="iterator"):
+        ApproximateHCA(chunks, Ward(Euclidean())).result()
+
+
+def test_approximate_exact_when_no_compression(blobs: numpy.ndarray):
+    raw = blobs[::20]
+    batch = Point.from_array(raw)
+    result = ApproximateHCA(
+        batch, AverageLinkage(Euclidean()), max_clusters=len(raw)
+    ).result()
+    assert result.error.max_distance < 1e-6
+    exact = HCA(Cluster.new(batch), AverageLinkage(Euclidean())).linkage()
+    for k in (2, 4, 7):
+        assert canonical(result.labels(k=k)) == canonical(exact.labels(k=k))
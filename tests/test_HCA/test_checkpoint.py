@@ -0,0 +1,248 @@
+import pickle
+from dataclasses import dataclass
+
+import numpy
+import pytest
+from scipy import sparse
+
+from optmath.common.cache import ResultCache
+from optmath.HCA import (
+    HCA,
+    AverageLinkage,
+    Cluster,
+    CompleteLinkage,
+    CondensedStorage,
+    DistanceSelectorBase,
+    Euclidean,
+    MatrixEngine,
+    NNChainEngine,
+    RecordBase,
+    SingleLinkage,
+)
+
+
+@dataclass(frozen=True)
+class Point(RecordBase):
+    x: float
+    y: float
+    z: float
+
+
+class CustomSingleLinkage(DistanceSelectorBase):
+    def new_distance_vector(
+        self,
+        to_reduce: tuple,
+        distance_matrix: numpy.ndarray,
+        new_cluster: Cluster,
+        old_data: list,
+    ) -> numpy.ndarray:
+        others = numpy.ones(len(distance_matrix), dtype=bool)
+        others[list(to_reduce)] = False
+        return numpy.minimum(
+            distance_matrix[to_reduce[0], others],
+            distance_matrix[to_reduce[1], others],
+        )
+
+
+@pytest.fixture(scope="module")
+def data() -> list:
+    raw = numpy.random.default_rng(0).normal(size=(50, 3))
+    return Cluster.new(Point.new(raw))
+
+
+def interrupted(algorithm: HCA, steps: int) -> None:
+    # simulates job killed after given number of merges
+    for merge in algorithm.merges():
+        if merge.step + 1 == steps:
+            break
+
+
+def test_resume_from_automatic_checkpoint(tmp_path, data: list):
+    path = tmp_path / "hca.npz"
+    selector = AverageLinkage(Euclidean())
+    algorithm = HCA(data, selector, checkpoint=path, checkpoint_every=10)
+    interrupted(algorithm, 25)
+    resumed = HCA.resume(path)
+    assert resumed._state is not None and resumed._state.step == 20
+    merges = list(resumed.merges())
+    assert merges[0].step == 20
+    expected = HCA(data, selector, engine=MatrixEngine()).result().Z()
+    assert (resumed.linkage().Z() == expected).all()
+    assert not (tmp_path / "hca.npz.tmp").exists()
+
+
+def test_checkpoint_interval(tmp_path, data: list):
+    path = tmp_path / "hca.npz"
+    algorithm = HCA(
+        data,
+        CompleteLinkage(Euclidean()),
+        checkpoint=path,
+        checkpoint_interval=0.0,
+    )
+    interrupted(algorithm, 3)
+    assert HCA.resume(path)._state.step == 3
+
+
+def test_resume_memory_mapped_float32_condensed(tmp_path, data: list):
+    path = tmp_path / "hca.npz"
+    options = dict(
+        storage=CondensedStorage, dtype=numpy.float32, backing=tmp_path
+    )
+    selector = CompleteLinkage(Euclidean())
+    algorithm = HCA(data, selector, engine=MatrixEngine(), **options)
+    interrupted(algorithm, 30)
+    algorithm.save_checkpoint(path)
+    resumed = HCA.resume(path)
+    assert resumed._state.storage.values.dtype == numpy.float32
+    assert resumed._state.storage._file is not None
+    expected = HCA(data, selector, engine=MatrixEngine(), **options)
+    assert (resumed.result().Z() == expected.result().Z()).all()
+
+
+def test_resume_legacy_steps(tmp_path, data: list):
+    path = tmp_path / "hca.npz"
+    algorithm = HCA(data, CustomSingleLinkage(Euclidean()))
+    for _ in range(12):
+        algorithm.reduce()
+    algorithm.save_checkpoint(path)
+    resumed = HCA.resume(path)
+    assert len(resumed.step.data) == len(data) - 12
+    expected = HCA(data, CustomSingleLinkage(Euclidean())).result().Z()
+    assert (resumed.result().Z() == expected).all()
+
+
+def test_resume_finished_run(tmp_path, data: list):
+    path = tmp_path / "hca.npz"
+    algorithm = HCA(data, SingleLinkage(Euclidean()))
+    expected = algorithm.result().Z()
+    algorithm.save_checkpoint(path)
+    assert (HCA.resume(path).result().Z() == expected).all()
+
+
+def test_checkpoint_requires_matrix_engine(tmp_path, data: list):
+    algorithm = HCA(
+        data,
+        CompleteLinkage(Euclidean()),
+        engine=NNChainEngine(),
+        checkpoint=tmp_path / "hca.npz",
+        checkpoint_every=1,
+    )
+    with pytest.raises(ValueError, match="MatrixEngine"):
+        algorithm.result()
+
+
+def test_checkpoints_save_changed_rows(tmp_path, data: list):
+    path = tmp_path / "hca.npz"
+    selector = AverageLinkage(Euclidean())
+    algorithm = HCA(data, selector, checkpoint=path, checkpoint_every=3)
+    interrupted(algorithm, 4)
+    bases = list(tmp_path.glob("hca.npz.*.npy"))
+    assert len(bases) == 1
+    interrupted(algorithm, 7)
+    # later checkpoint only holds rows changed since base was written
+    assert list(tmp_path.glob("hca.npz.*.npy")) == bases
+    with numpy.load(path) as file:
+        step = int(file["step"])
+        assert int(file["base_step"]) == 3 and step > 3
+        assert 0 < len(file["changed_rows"]) <= step - 3
+    resumed = HCA.resume(path)
+    assert resumed._state.step == step
+    expected = HCA(data, selector, engine=MatrixEngine()).result().Z()
+    assert (resumed.result().Z() == expected).all()
+
+
+def test_outdated_checkpoint_base_is_replaced(tmp_path, data: list):
+    path = tmp_path / "hca.npz"
+    algorithm = HCA(data, AverageLinkage(Euclidean()), engine=MatrixEngine())
+    interrupted(algorithm, 2)
+    algorithm.save_checkpoint(path)
+    (first,) = tmp_path.glob("hca.npz.*.npy")
+    interrupted(algorithm, 30)
+    algorithm.save_checkpoint(path)
+    (second,) = tmp_path.glob("hca.npz.*.npy")
+    assert first != second
+    assert HCA.resume(path)._state.step == 30
+
+
+def test_resume_rejects_unknown_classes(tmp_path, data: list):
+    path = tmp_path / "hca.npz"
+    HCA(data, SingleLinkage(Euclidean())).save_checkpoint(path)
+
+    class Exploit:
+        def __reduce__(self):
+            return (print, ("exploited",))
+
+    with numpy.load(path) as file:
+        arrays = dict(file)
+    arrays["options"] = numpy.frombuffer(
+        pickle.dumps({"data": Exploit()}), dtype=numpy.uint8
+    )
+    numpy.savez(path, **arrays)
+    with pytest.raises(pickle.UnpicklingError, match="builtins.print"):
+        HCA.resume(path)
+
+
+class Truncate:
+    def __init__(self, path) -> None:
+        self.path = str(path)
+
+    def __reduce__(self):
+        return (numpy.memmap, (self.path, "uint8", "w+", 0, (1,)))
+
+
+def test_resume_rejects_ndarray_subclasses(tmp_path, data: list):
+    path = tmp_path / "hca.npz"
+    victim = tmp_path / "victim.txt"
+    victim.write_text("important")
+    HCA(data, SingleLinkage(Euclidean())).save_checkpoint(path)
+    with numpy.load(path) as file:
+        arrays = dict(file)
+    arrays["options"] = numpy.frombuffer(
+        pickle.dumps({"data": Truncate(victim)}), dtype=numpy.uint8
+    )
+    numpy.savez(path, **arrays)
+    with pytest.raises(pickle.UnpicklingError, match="memmap"):
+        HCA.resume(path)
+    assert victim.read_text() == "important"
+
+
+def test_legacy_steps_are_checkpointed(tmp_path, data: list):
+    path = tmp_path / "hca.npz"
+    selector = CustomSingleLinkage(Euclidean())
+    algorithm = HCA(data, selector, checkpoint=path, checkpoint_every=4)
+    interrupted(algorithm, 10)
+    resumed = HCA.resume(path)
+    assert len(resumed.step.data) == len(data) - 8
+    expected = HCA(data, CustomSingleLinkage(Euclidean())).result().Z()
+    assert (resumed.result().Z() == expected).all()
+
+
+def test_finished_run_removes_checkpoint_base(tmp_path, data: list):
+    path = tmp_path / "hca.npz"
+    selector = AverageLinkage(Euclidean())
+    algorithm = HCA(data, selector, checkpoint=path, checkpoint_every=5)
+    expected = algorithm.result().Z()
+    assert list(tmp_path.glob("hca.npz.*.npy")) == []
+    with numpy.load(path) as file:
+        assert "storage_base" not in file
+    assert (HCA.resume(path).result().Z() == expected).all()
+
+
+def test_resume_restores_cache_and_sparse_connectivity(tmp_path, data: list):
+    path = tmp_path / "hca.npz"
+    cache = ResultCache(tmp_path / "cache", max_bytes=1 << 20)
+    edges = numpy.array([(i, i + 1) for i in range(len(data) - 1)])
+    connectivity = sparse.coo_matrix(
+        (numpy.ones(len(edges)), (edges[:, 0], edges[:, 1])),
+        shape=(len(data),) * 2,
+    ).tocsr()
+    HCA(
+        data,
+        CompleteLinkage(Euclidean()),
+        cache=cache,
+        connectivity=connectivity,
+    ).save_checkpoint(path)
+    resumed = HCA.resume(path)
+    assert resumed.cache.directory == cache.directory
+    assert resumed.cache.max_bytes == 1 << 20
+    assert (resumed.connectivity != connectivity).nnz == 0
@@ -0,0 +1,140 @@
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy
+import pandas as pd
+import pytest
+
+from optmath.HCA import (
+    Chebyshev,
+    Cluster,
+    CompleteLinkage,
+    Euclidean,
+    Manhattan,
+    RecordBase,
+)
+from optmath.HCA.distance import DistanceBase
+from optmath.HCA.record import autoscale
+
+
+@dataclass(frozen=True)
+class PumpkinSeed(RecordBase):
+    Area: float
+    Perimeter: float
+    Major_Axis_Length: float
+    Minor_Axis_Length: float
+    Solidity: float
+    Roundness: float
+
+
+TEST_HCA_DIR = Path(__file__).parent
+
+
+@pytest.fixture(scope="module")
+def seeds() -> list:
+    raw = pd.read_csv(TEST_HCA_DIR / "data" / "test_seeds.csv").to_numpy()
+    return Cluster.new(PumpkinSeed.new(autoscale(raw)))
+
+
+@pytest.mark.parametrize("distance", [Euclidean(), Manhattan(), Chebyshev()])
+def test_pairwise_matches_per_pair_distance(
+    seeds: list, distance: DistanceBase
+):
+    selector = CompleteLinkage(distance)
+    expected = numpy.array(
+        [[selector.initial(ob1, ob2) for ob1 in seeds] for ob2 in seeds]
+    )
+    assert (selector.initial_distance_matrix(seeds) == expected).all()
+
+
+class CountingEuclidean(DistanceBase):
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __call__(self, first: RecordBase, second: RecordBase) -> float:
+        self.calls += 1
+        return Euclidean()(first, second)
+
+
+def test_custom_distance_falls_back_to_per_pair(seeds: list):
+    distance = CountingEuclidean()
+    matrix = CompleteLinkage(distance).initial_distance_matrix(seeds)
+    assert distance.calls == len(seeds) ** 2
+    assert numpy.allclose(
+        matrix, CompleteLinkage(Euclidean()).initial_distance_matrix(seeds)
+    )
+
+
+class ScaledEuclidean(Euclidean):
+    def __call__(self, first: RecordBase, second: RecordBase) -> float:
+        return 10.0 * super().__call__(first, second)
+
+
+class FastEuclidean(Euclidean):
+    def _pairwise_block(
+        self, X: numpy.ndarray, Y: numpy.ndarray
+    ) -> numpy.ndarray:
+        return super()._pairwise_block(X, Y)
+
+
+def test_subclass_overriding_call_falls_back_to_per_pair(seeds: list):
+    assert not ScaledEuclidean().vectorized
+    assert FastEuclidean().vectorized
+    matrix = CompleteLinkage(ScaledEuclidean()).initial_distance_matrix(
+        seeds[:20]
+    )
+    expected = CompleteLinkage(Euclidean()).initial_distance_matrix(
+        seeds[:20]
+    )
+    numpy.testing.assert_allclose(matrix, 10.0 * expected)
+
+
+@pytest.mark.parametrize("distance", [Euclidean(), Manhattan(), Chebyshev()])
+def test_pairwise_chunks_cover_matrix(distance: DistanceBase):
+    rng = numpy.random.default_rng(0)
+    X, Y = rng.normal(size=(50, 4)), rng.normal(size=(30, 4))
+    for other in (None, Y):
+        expected = distance.pairwise(X, other)
+        chunks = list(distance.pairwise_chunks(X, other, block_rows=7))
+        assert [rows.stop - rows.start for rows, _ in chunks] == [7] * 7 + [1]
+        result = numpy.concatenate([block for _, block in chunks])
+        assert numpy.allclose(result, expected, rtol=1e-12, atol=1e-12)
+        for rows, block in chunks:
+            assert block.shape == (rows.stop - rows.start, len(expected[0]))
+
+
+@pytest.mark.parametrize("distance", [Euclidean(), Manhattan()])
+def test_pairwise_chunks_memory_limit(distance: DistanceBase):
+    X = numpy.random.default_rng(1).normal(size=(100, 8))
+    chunks = list(distance.pairwise_chunks(X, memory_limit=64 * 1024))
+    assert len(chunks) > 1
+    assert max(block.nbytes for _, block in chunks) <= 64 * 1024
+    assert (numpy.concatenate([b for _, b in chunks]).diagonal() == 0).all()
+
+
+@pytest.mark.parametrize("distance", [Euclidean(), Manhattan(), Chebyshev()])
+def test_pairwise_chunks_temporaries_fit_memory_limit(distance: DistanceBase):
+    X = numpy.random.default_rng(1).normal(size=(2000, 8))
+    limit = 2 * 1024 * 1024
+    tracemalloc.start()
+    try:
+        peak = 0
+        for _, block in distance.pairwise_chunks(X, memory_limit=limit):
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            del block
+    finally:
+        tracemalloc.stop()
+    # numpy ufunc buffers take some memory on top of counted arrays
+    assert peak <= 1.1 * limit
+
+
+def test_pairwise_chunks_nearest_neighbor(seeds: list):
+    records = numpy.array([c[0].numeric() for c in seeds])
+    nearest = numpy.empty(len(records), dtype=int)
+    for rows, block in Euclidean().pairwise_chunks(records, block_rows=64):
+        numpy.fill_diagonal(block[:, rows], numpy.inf)
+        nearest[rows] = block.argmin(axis=1)
+    matrix = Euclidean().pairwise(records)
+    numpy.fill_diagonal(matrix, numpy.inf)
+    assert (nearest == matrix.argmin(axis=1)).all()
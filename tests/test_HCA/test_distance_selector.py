@@ -0,0 +1,86 @@
+from dataclasses import dataclass
+
+import numpy
+import pytest
+from scipy.cluster import hierarchy
+
+from optmath.HCA import (
+    HCA,
+    AverageLinkage,
+    CentroidLinkage,
+    Cluster,
+    CompleteLinkage,
+    DistanceSelectorBase,
+    Euclidean,
+    MatrixEngine,
+    MedianLinkage,
+    NNChainEngine,
+    RecordBase,
+    SingleLinkage,
+    WeightedLinkage,
+)
+
+
+@dataclass(frozen=True)
+class Point(RecordBase):
+    x: float
+    y: float
+    z: float
+
+
+@pytest.fixture(scope="module")
+def raw() -> numpy.ndarray:
+    return numpy.random.default_rng(1).normal(size=(80, 3))
+
+
+@pytest.fixture(scope="module")
+def data(raw: numpy.ndarray) -> list:
+    return Cluster.new(Point.new(raw))
+
+
+@pytest.mark.parametrize(
+    ("selector", "method"),
+    [
+        (SingleLinkage(Euclidean()), "single"),
+        (CompleteLinkage(Euclidean()), "complete"),
+        (AverageLinkage(Euclidean()), "average"),
+        (WeightedLinkage(Euclidean()), "weighted"),
+        (CentroidLinkage(Euclidean()), "centroid"),
+        (MedianLinkage(Euclidean()), "median"),
+    ],
+)
+def test_lance_williams_linkage_matches_scipy(
+    raw: numpy.ndarray,
+    data: list,
+    selector: DistanceSelectorBase,
+    method: str,
+):
+    z_custom = HCA(data, selector, engine=MatrixEngine()).result().Z()
+    z_scipy = hierarchy.linkage(raw, method=method, metric="euclidean")
+    assert numpy.allclose(z_custom, z_scipy)
+
+
+@pytest.mark.parametrize(
+    "selector", [AverageLinkage(Euclidean()), WeightedLinkage(Euclidean())]
+)
+def test_reducible_linkage_nn_chain_matches_matrix_engine(
+    data: list, selector: DistanceSelectorBase
+):
+    z_chain = HCA(data, selector, engine=NNChainEngine()).result().Z()
+    z_matrix = HCA(data, selector, engine=MatrixEngine()).result().Z()
+    assert (z_chain[:, [0, 1, 3]] == z_matrix[:, [0, 1, 3]]).all()
+    assert numpy.allclose(z_chain[:, 2], z_matrix[:, 2])
+
+
+@pytest.mark.parametrize(
+    "selector", [AverageLinkage(Euclidean()), CentroidLinkage(Euclidean())]
+)
+def test_new_distance_vector_matches_engine(
+    data: list, selector: DistanceSelectorBase
+):
+    algorithm = HCA(data, selector)
+    for _ in algorithm:
+        pass
+    z_legacy = algorithm.last.data[0].Z()
+    z_matrix = HCA(data, selector, engine=MatrixEngine()).result().Z()
+    assert (z_legacy == z_matrix).all()
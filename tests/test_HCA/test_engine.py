@@ -0,0 +1,422 @@
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy
+import pandas as pd
+import pytest
+
+from optmath.common.cache import ResultCache
+from optmath.HCA import (
+    HCA,
+    CentroidLinkage,
+    Cluster,
+    CompleteLinkage,
+    DistanceSelectorBase,
+    EngineBase,
+    Euclidean,
+    HCAStep,
+    Linkage,
+    LinkageCluster,
+    Manhattan,
+    MatrixEngine,
+    MedianLinkage,
+    MSTEngine,
+    NNChainEngine,
+    RecordBase,
+    SingleLinkage,
+    SquareStorage,
+    Ward,
+)
+from optmath.HCA.record import autoscale
+
+
+@dataclass(frozen=True)
+class PumpkinSeed(RecordBase):
+    Area: float
+    Perimeter: float
+    Major_Axis_Length: float
+    Minor_Axis_Length: float
+    Solidity: float
+    Roundness: float
+
+
+@dataclass(frozen=True)
+class Seed(RecordBase):
+    size: float
+    quality: float
+
+
+TEST_HCA_DIR = Path(__file__).parent
+
+SELECTORS = [
+    SingleLinkage(Euclidean()),
+    CompleteLinkage(Euclidean()),
+    Ward(Euclidean()),
+    CompleteLinkage(Manhattan()),
+]
+
+
+@pytest.fixture(scope="module")
+def seeds() -> list:
+    raw = pd.read_csv(TEST_HCA_DIR / "data" / "test_seeds.csv").to_numpy()
+    return Cluster.new(PumpkinSeed.new(autoscale(raw)))
+
+
+@pytest.fixture(scope="module")
+def grid() -> list:
+    # integer grid is full of equal distances, which exercises tie breaking
+    raw = [[x, y] for x in range(4) for y in range(3)]
+    return Cluster.new(Seed.new(raw))
+
+
+class CustomSingleLinkage(DistanceSelectorBase):
+    def new_distance_vector(
+        self,
+        to_reduce: tuple,
+        distance_matrix: numpy.ndarray,
+        _: Cluster,
+        __: list,
+    ) -> numpy.ndarray:
+        others = numpy.ones(len(distance_matrix), dtype=bool)
+        others[list(to_reduce)] = False
+        return distance_matrix[list(to_reduce)].min(axis=0)[others]
+
+
+def legacy_root(data: list, selector: DistanceSelectorBase) -> Cluster:
+    algorithm = HCA(data, selector)
+    for _ in algorithm:
+        pass
+    return algorithm.last.data[0]
+
+
+def legacy_z(data: list, selector: DistanceSelectorBase) -> numpy.ndarray:
+    return legacy_root(data, selector).Z()
+
+
+def test_indexes_to_reduce_takes_first_minimum_in_lower_triangle(grid: list):
+    matrix = numpy.array(
+        [
+            [0.0, 1.0, 2.0, 1.0],
+            [1.0, 0.0, 1.0, 3.0],
+            [2.0, 1.0, 0.0, 1.0],
+            [1.0, 3.0, 1.0, 0.0],
+        ]
+    )
+    step = HCAStep(grid[:4], SingleLinkage(Euclidean()), matrix)
+    assert step._indexes_to_reduce() == ((1, 0), 1.0)
+
+
+@pytest.mark.parametrize("selector", SELECTORS)
+def test_row_minima_are_updated_after_reduce(
+    grid: list, selector: DistanceSelectorBase
+):
+    algorithm = HCA(grid, selector)
+    for step in algorithm:
+        if len(step.data) == 1:
+            break
+        step._indexes_to_reduce()
+        minima, columns = step.row_minima
+        fresh = HCAStep(step.data, selector, step.distance_matrix)
+        fresh._indexes_to_reduce()
+        assert (minima == fresh.row_minima[0]).all()
+        assert (columns == fresh.row_minima[1]).all()
+
+
+@pytest.mark.parametrize("selector", SELECTORS)
+def test_matrix_engine_matches_legacy(
+    seeds: list, selector: DistanceSelectorBase
+):
+    z_engine = HCA(seeds, selector, engine=MatrixEngine()).result().Z()
+    assert (z_engine == legacy_z(seeds, selector)).all()
+
+
+@pytest.mark.parametrize("selector", SELECTORS)
+def test_matrix_engine_tie_breaking(
+    grid: list, selector: DistanceSelectorBase
+):
+    z_engine = HCA(grid, selector, engine=MatrixEngine()).result().Z()
+    assert (z_engine == legacy_z(grid, selector)).all()
+
+
+def test_matrix_engine_keeps_initial_matrix(seeds: list):
+    selector = SingleLinkage(Euclidean())
+    matrix = selector.initial_distance_matrix(seeds)
+    copy = matrix.copy()
+    HCA(seeds, selector, matrix, engine=MatrixEngine()).result()
+    assert (matrix == copy).all()
+
+
+@pytest.mark.parametrize("selector", SELECTORS)
+def test_nn_chain_engine_matches_legacy(
+    seeds: list, selector: DistanceSelectorBase
+):
+    z_engine = HCA(seeds, selector, engine=NNChainEngine()).result().Z()
+    z_legacy = legacy_z(seeds, selector)
+    assert (z_engine[:, [0, 1, 3]] == z_legacy[:, [0, 1, 3]]).all()
+    assert numpy.allclose(z_engine[:, 2], z_legacy[:, 2])
+
+
+@pytest.mark.parametrize("selector", SELECTORS)
+def test_nn_chain_engine_random_data(selector: DistanceSelectorBase):
+    raw = numpy.random.default_rng(0).normal(size=(120, 2))
+    data = Cluster.new(Seed.new(raw))
+    z_engine = HCA(data, selector, engine=NNChainEngine()).result().Z()
+    z_legacy = legacy_z(data, selector)
+    assert (z_engine[:, [0, 1, 3]] == z_legacy[:, [0, 1, 3]]).all()
+    assert numpy.allclose(z_engine[:, 2], z_legacy[:, 2])
+
+
+def assert_greedy(
+    data: list, selector: DistanceSelectorBase, z: numpy.ndarray
+) -> None:
+    # replays merges, each of them has to join closest pair of clusters
+    matrix = selector.initial_distance_matrix(data)
+    numpy.fill_diagonal(matrix, numpy.inf)
+    sizes = numpy.ones(len(data))
+    rows = {c.ID: index for index, c in enumerate(data)}
+    first_id = max(rows) + 1
+    for step, (left, right, height, _) in enumerate(z):
+        left, right = rows.pop(int(left)), rows.pop(int(right))
+        assert numpy.isclose(matrix[left, right], height)
+        assert numpy.isclose(matrix.min(), height)
+        with numpy.errstate(invalid="ignore"):
+            vector = selector.update(
+                matrix[left],
+                matrix[right],
+                height,
+                sizes[left],
+                sizes[right],
+                sizes,
+            )
+        sizes[left] += sizes[right]
+        sizes[right] = 0.0
+        vector[sizes == 0.0] = numpy.inf
+        vector[left] = numpy.inf
+        matrix[right] = matrix[:, right] = numpy.inf
+        matrix[left] = matrix[:, left] = vector
+        rows[first_id + step] = left
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("selector", SELECTORS)
+def test_nn_chain_engine_ties(selector: DistanceSelectorBase, seed: int):
+    # equal distances may be merged in other order than by MatrixEngine,
+    # but every merge still joins closest pair of clusters
+    raw = numpy.random.default_rng(seed).integers(0, 4, (14, 2))
+    data = Cluster.new(Seed.new(raw.astype(float)))
+    z_engine = HCA(data, selector, engine=NNChainEngine()).result().Z()
+    assert_greedy(data, selector, z_engine)
+
+
+@pytest.mark.parametrize("selector", SELECTORS)
+def test_nn_chain_engine_grid(grid: list, selector: DistanceSelectorBase):
+    z_engine = HCA(grid, selector, engine=NNChainEngine()).result().Z()
+    assert_greedy(grid, selector, z_engine)
+
+
+@pytest.mark.parametrize(
+    "selector", [CentroidLinkage(Euclidean()), MedianLinkage(Euclidean())]
+)
+def test_nn_chain_engine_rejects_irreducible_selectors(
+    seeds: list, selector: DistanceSelectorBase
+):
+    with pytest.raises(ValueError, match="not reducible"):
+        HCA(seeds, selector, engine=NNChainEngine()).result()
+
+
+@pytest.mark.parametrize("selector", SELECTORS)
+def test_default_engine_breaks_ties_like_legacy(
+    grid: list, selector: DistanceSelectorBase
+):
+    algorithm = HCA(grid, selector)
+    assert isinstance(algorithm._default_engine(), MatrixEngine)
+    assert (algorithm.result().Z() == legacy_z(grid, selector)).all()
+    assert algorithm.initial_distance_matrix is None
+    assert list(algorithm) == []
+
+
+def test_default_single_linkage_keeps_legacy_ties():
+    raw = [[x, y] for x in range(6) for y in range(6)]
+    data = Cluster.new(Seed.new(raw))
+    selector = SingleLinkage(Euclidean())
+    z = HCA(data, selector).result().Z()
+    assert (z == legacy_z(data, selector)).all()
+    # legacy order builds pairs at height 1 first
+    assert (z[:18, 3] == 2).all()
+
+
+@pytest.mark.parametrize(
+    "selector", [SingleLinkage(Euclidean()), SingleLinkage(Manhattan())]
+)
+def test_mst_engine_matches_legacy(seeds: list, selector: SingleLinkage):
+    z_engine = HCA(seeds, selector, engine=MSTEngine()).result().Z()
+    assert (z_engine == legacy_z(seeds, selector)).all()
+
+
+def test_mst_engine_with_distance_matrix(seeds: list):
+    selector = SingleLinkage(Euclidean())
+    matrix = selector.initial_distance_matrix(seeds)
+    z_engine = HCA(seeds, selector, matrix, engine=MSTEngine()).result().Z()
+    assert (z_engine == legacy_z(seeds, selector)).all()
+
+
+def test_mst_engine_does_not_allocate_matrix():
+    raw = numpy.random.default_rng(0).normal(size=(1500, 2))
+    data = Cluster.new(Seed.new(raw))
+    algorithm = HCA(data, SingleLinkage(Euclidean()), engine=MSTEngine())
+    tracemalloc.start()
+    algorithm.result()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert peak < len(data) ** 2 * 8 / 4
+
+
+def test_linkage_result_is_array_backed(seeds: list):
+    algorithm = HCA(seeds, CompleteLinkage(Euclidean()))
+    root = algorithm.result()
+    linkage = algorithm.linkage()
+    assert isinstance(root, LinkageCluster)
+    assert root.Z() is linkage.Z()
+    assert len(root) == len(seeds)
+    assert str(root) == str(legacy_root(seeds, CompleteLinkage(Euclidean())))
+    assert (linkage.size == linkage.Z()[:, 3]).all()
+    left = root.left
+    assert left.ID == linkage.left[-1]
+    assert len(left) + len(root.right) == len(root)
+    assert (
+        left.Z() == legacy_root(seeds, CompleteLinkage(Euclidean())).left.Z()
+    ).all()
+
+
+def test_linkage_of_legacy_result(seeds: list):
+    selector = CustomSingleLinkage(Euclidean())
+    algorithm = HCA(seeds, selector)
+    linkage = algorithm.linkage()
+    assert (linkage.Z() == legacy_z(seeds, SingleLinkage(Euclidean()))).all()
+    assert linkage.root.height == algorithm.result().height
+
+
+def test_cluster_Z_deep_chain():
+    leaves = Cluster.new(Seed.new([[i, 0] for i in range(3000)]))
+    root = leaves[0]
+    for ID, leaf in enumerate(leaves[1:], start=len(leaves)):
+        root = Cluster(ID, (root, leaf), float(ID))
+    assert len(root) == len(leaves)
+    z = root.Z()
+    assert z.shape == (len(leaves) - 1, 4)
+    assert (z[:, 3] == numpy.arange(2, len(leaves) + 1)).all()
+
+
+def test_linkage_cluster_deep_chain():
+    leaves = tuple(Cluster.new(Seed.new([[i, 0] for i in range(5000)])))
+    size = len(leaves)
+    z = numpy.array(
+        [
+            (size + step - 1 if step else 0, step + 1, float(step), step + 2)
+            for step in range(size - 1)
+        ],
+        dtype=numpy.float64,
+    )
+    root = Linkage(leaves, z).root
+    assert isinstance(root, LinkageCluster)
+    assert repr(root) == "LinkageCluster(ID=9998, size=5000, height=4998.0)"
+    assert hash(root) == hash(root.linkage.cluster(root.ID))
+    assert root == root.linkage.cluster(root.ID)
+    assert root != root.left
+
+
+def test_merges_stream_matches_linkage(seeds: list):
+    algorithm = HCA(seeds, Ward(Euclidean()), engine=MatrixEngine())
+    merges = list(algorithm.merges())
+    z = algorithm.linkage().Z()
+    assert [m.step for m in merges] == list(range(len(seeds) - 1))
+    assert [m.ID for m in merges] == list(
+        range(len(seeds), 2 * len(seeds) - 1)
+    )
+    assert (
+        numpy.array([(m.left, m.right, m.height, m.size) for m in merges]) == z
+    ).all()
+    with pytest.raises(AttributeError):
+        merges[0].height = 0.0
+
+
+def test_merges_of_legacy_path(seeds: list):
+    selector = SingleLinkage(Euclidean())
+    algorithm = HCA(seeds, CustomSingleLinkage(Euclidean()))
+    algorithm.reduce()
+    merges = list(algorithm.merges())
+    z = legacy_z(seeds, selector)
+    assert merges[0].step == 1
+    assert (
+        numpy.array([(m.left, m.right, m.height, m.size) for m in merges])
+        == z[1:]
+    ).all()
+
+
+def test_abandoned_merges_do_not_break_result(seeds: list):
+    algorithm = HCA(seeds, CompleteLinkage(Euclidean()), engine=MatrixEngine())
+    for merge in algorithm.merges():
+        if merge.step == 3:
+            break
+    assert (
+        algorithm.result().Z() == legacy_z(seeds, CompleteLinkage(Euclidean()))
+    ).all()
+
+
+# float32 has 24 bit mantissa (relative rounding error about 6e-8),
+# errors of distance updates accumulate over merges, on seeds dataset
+# heights differ by less than 3e-7, while merged clusters are the same
+FLOAT32_HEIGHT_RTOL = 1e-5
+
+
+@pytest.mark.parametrize("selector", SELECTORS)
+@pytest.mark.parametrize("engine", [MatrixEngine(), NNChainEngine(), None])
+def test_float32_linkage_agrees_with_float64(
+    seeds: list, selector: DistanceSelectorBase, engine: Optional[EngineBase]
+):
+    z64 = HCA(seeds, selector, engine=engine).result().Z()
+    algorithm = HCA(seeds, selector, engine=engine, dtype=numpy.float32)
+    z32 = algorithm.result().Z()
+    assert (z64[:, [0, 1, 3]] == z32[:, [0, 1, 3]]).all()
+    assert numpy.allclose(z64[:, 2], z32[:, 2], rtol=FLOAT32_HEIGHT_RTOL)
+
+
+def test_float32_storage_and_legacy_path(seeds: list):
+    algorithm = HCA(seeds, CompleteLinkage(Euclidean()), dtype=numpy.float32)
+    assert algorithm._storage().dtype == numpy.float32
+    legacy = HCA(seeds, CustomSingleLinkage(Euclidean()), dtype="float32")
+    assert legacy.step.distance_matrix.dtype == numpy.float32
+    z = legacy.linkage().Z()
+    expected = legacy_z(seeds, SingleLinkage(Euclidean()))
+    assert (z[:, [0, 1, 3]] == expected[:, [0, 1, 3]]).all()
+    assert numpy.allclose(z[:, 2], expected[:, 2], rtol=FLOAT32_HEIGHT_RTOL)
+
+
+@pytest.mark.parametrize("dtype", [numpy.int64, "int32", bool])
+def test_non_floating_dtype_is_rejected(seeds: list, dtype: type):
+    with pytest.raises(ValueError, match="has to be floating"):
+        HCA(seeds, CompleteLinkage(Euclidean()), dtype=dtype)
+    with pytest.raises(ValueError, match="has to be floating"):
+        SquareStorage.from_data(
+            seeds, CompleteLinkage(Euclidean()), None, None, dtype
+        )
+
+
+def test_result_cache(tmp_path, seeds: list, monkeypatch):
+    cache = ResultCache(tmp_path)
+    selector = Ward(Euclidean())
+    expected = HCA(seeds, selector, cache=cache).linkage().Z()
+    assert len(list(tmp_path.iterdir())) == 1
+
+    def fail(*_):
+        raise AssertionError("cached result should be used")
+
+    monkeypatch.setattr(MatrixEngine, "start", fail)
+    algorithm = HCA(seeds, selector, cache=cache)
+    merges = list(algorithm.merges())
+    assert (algorithm.linkage().Z() == expected).all()
+    assert merges[-1].ID == algorithm.result().ID
+    with pytest.raises(AssertionError):
+        HCA(seeds, Ward(Manhattan()), cache=cache).result()
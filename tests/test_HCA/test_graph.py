@@ -0,0 +1,219 @@
+from dataclasses import dataclass
+
+import numpy
+import pytest
+from scipy import sparse
+from scipy.cluster.hierarchy import linkage as scipy_linkage
+
+from optmath.HCA import (
+    HCA,
+    AverageLinkage,
+    CentroidLinkage,
+    Cluster,
+    CompleteLinkage,
+    Euclidean,
+    GraphEngine,
+    Manhattan,
+    MatrixEngine,
+    MedianLinkage,
+    RecordBase,
+    SingleLinkage,
+    Ward,
+)
+
+SELECTORS = [
+    SingleLinkage(Euclidean()),
+    CompleteLinkage(Euclidean()),
+    AverageLinkage(Euclidean()),
+    Ward(Euclidean()),
+]
+# selectors defined by distances along edges
+EDGE_SELECTORS = SELECTORS[:3]
+# selectors computed from centroids, which match MatrixEngine
+CENTROID_SELECTORS = [CentroidLinkage(Euclidean()), MedianLinkage(Euclidean())]
+
+
+@dataclass(frozen=True)
+class Point(RecordBase):
+    x: float
+    y: float
+
+
+@pytest.fixture(scope="module")
+def points() -> list:
+    raw = numpy.random.default_rng(0).normal(size=(30, 2))
+    return Cluster.new(Point.new(raw))
+
+
+def chain_edges(size: int) -> list:
+    return [(i, i + 1) for i in range(size - 1)]
+
+
+@pytest.mark.parametrize("selector", EDGE_SELECTORS + CENTROID_SELECTORS)
+def test_complete_graph_matches_matrix_engine(points: list, selector):
+    adjacency = sparse.csr_matrix(numpy.ones((len(points),) * 2))
+    graph = HCA(points, selector, connectivity=adjacency).linkage().Z()
+    matrix = HCA(points, selector, engine=MatrixEngine()).linkage().Z()
+    numpy.testing.assert_allclose(graph, matrix)
+
+
+def merged_members(z: numpy.ndarray, size: int) -> list:
+    # (records of merged cluster, height) of every merge
+    members = {i: frozenset([i]) for i in range(size)}
+    merges = []
+    for step, (left, right, height, _) in enumerate(z):
+        new = size + step
+        members[new] = members[int(left)] | members[int(right)]
+        merges.append((members[new], height))
+    return merges
+
+
+def assert_same_merges(actual: list, expected: list) -> None:
+    assert [m for m, _ in actual] == [m for m, _ in expected]
+    numpy.testing.assert_allclose(
+        [h for _, h in actual], [h for _, h in expected]
+    )
+
+
+def test_complete_graph_ward_matches_scipy():
+    raw = numpy.random.default_rng(0).normal(size=(30, 2))
+    adjacency = sparse.csr_matrix(numpy.ones((len(raw),) * 2))
+    data = Cluster.new(Point.new(raw))
+    z = HCA(data, Ward(Euclidean()), connectivity=adjacency).linkage().Z()
+    assert_same_merges(
+        merged_members(z, len(raw)),
+        merged_members(scipy_linkage(raw, "ward"), len(raw)),
+    )
+
+
+@pytest.mark.parametrize("selector", SELECTORS + CENTROID_SELECTORS)
+def test_chain_merges_only_neighbours(points: list, selector):
+    linkage = HCA(
+        points, selector, connectivity=chain_edges(len(points))
+    ).linkage()
+    for k in range(1, len(points) + 1):
+        labels = linkage.labels(k=k)
+        # every cluster is contiguous range of chain
+        assert (numpy.diff(labels) >= 0).all()
+
+
+def test_edge_list_and_matrix_agree(points: list):
+    edges = numpy.array(chain_edges(len(points)))
+    adjacency = sparse.coo_matrix(
+        (numpy.ones(len(edges)), (edges[:, 1], edges[:, 0])),
+        shape=(len(points),) * 2,
+    ).tocsr()
+    selector = AverageLinkage(Euclidean())
+    from_list = HCA(points, selector, engine=GraphEngine(edges)).linkage()
+    from_matrix = HCA(points, selector, connectivity=adjacency).linkage()
+    numpy.testing.assert_array_equal(from_list.Z(), from_matrix.Z())
+
+
+def test_initial_distance_matrix_is_used(points: list):
+    selector = CompleteLinkage(Euclidean())
+    matrix = selector.initial_distance_matrix(points)
+    edges = chain_edges(len(points))
+    given = HCA(points, selector, matrix, engine=GraphEngine(edges)).linkage()
+    computed = HCA(points, selector, engine=GraphEngine(edges)).linkage()
+    numpy.testing.assert_array_equal(given.Z(), computed.Z())
+
+
+def test_disconnected_graph_raises(points: list):
+    edges = chain_edges(len(points))
+    del edges[10]
+    with pytest.raises(ValueError, match="2 connected components"):
+        HCA(points, SingleLinkage(Euclidean()), connectivity=edges).result()
+
+
+def test_matrix_of_wrong_size_raises(points: list):
+    adjacency = sparse.identity(len(points) + 1, format="csr")
+    with pytest.raises(ValueError, match="expected"):
+        HCA(points, Ward(Euclidean()), connectivity=adjacency).result()
+
+
+def grid_edges(side: int) -> list:
+    index = numpy.arange(side * side).reshape(side, side)
+    return list(
+        zip(index[:, :-1].ravel().tolist(), index[:, 1:].ravel().tolist())
+    ) + list(
+        zip(index[:-1, :].ravel().tolist(), index[1:, :].ravel().tolist())
+    )
+
+
+def single(first, second, lengths: list) -> float:
+    return min(lengths)
+
+
+def complete(first, second, lengths: list) -> float:
+    return max(lengths)
+
+
+def centroid(first: numpy.ndarray, second: numpy.ndarray, _) -> float:
+    return float(numpy.linalg.norm(first.mean(0) - second.mean(0)))
+
+
+def ward(first: numpy.ndarray, second: numpy.ndarray, _) -> float:
+    scale = 2 * len(first) * len(second) / (len(first) + len(second))
+    return numpy.sqrt(scale) * centroid(first, second, _)
+
+
+def brute_force(raw: numpy.ndarray, edges: list, height) -> list:
+    # merges pair of connected clusters with lowest height, computed
+    # from their records and lengths of edges between them
+    label = numpy.arange(len(raw))
+    members = {i: frozenset([i]) for i in range(len(raw))}
+    lengths = {
+        (i, j): float(numpy.linalg.norm(raw[i] - raw[j])) for i, j in edges
+    }
+    merges = []
+    for step in range(len(raw) - 1):
+        between: dict = {}
+        for (i, j), length in lengths.items():
+            pair = tuple(sorted((label[i], label[j])))
+            if pair[0] != pair[1]:
+                between.setdefault(pair, []).append(length)
+        (first, second), lowest = min(
+            (
+                (
+                    pair,
+                    height(
+                        raw[list(members[pair[0]])],
+                        raw[list(members[pair[1]])],
+                        lengths,
+                    ),
+                )
+                for pair, lengths in between.items()
+            ),
+            key=lambda item: item[1],
+        )
+        new = len(raw) + step
+        members[new] = members.pop(first) | members.pop(second)
+        label[list(members[new])] = new
+        merges.append((members[new], lowest))
+    return merges
+
+
+@pytest.mark.parametrize(
+    "selector, height",
+    [
+        (SingleLinkage(Euclidean()), single),
+        (CompleteLinkage(Euclidean()), complete),
+        (Ward(Euclidean()), ward),
+        (CentroidLinkage(Euclidean()), centroid),
+    ],
+)
+def test_grid_matches_brute_force(selector, height):
+    raw = numpy.random.default_rng(0).normal(size=(64, 2))
+    edges = grid_edges(8)
+    data = Cluster.new(Point.new(raw))
+    z = HCA(data, selector, connectivity=edges).linkage().Z()
+    assert_same_merges(
+        merged_members(z, len(raw)), brute_force(raw, edges, height)
+    )
+
+
+@pytest.mark.parametrize("selector", [Ward, CentroidLinkage, MedianLinkage])
+def test_centroid_selectors_require_euclidean_distance(points: list, selector):
+    edges = chain_edges(len(points))
+    with pytest.raises(ValueError, match="requires Euclidean distance"):
+        HCA(points, selector(Manhattan()), connectivity=edges).result()
@@ -0,0 +1,103 @@
+import pickle
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy
+import pytest
+
+from optmath.HCA import (
+    HCA,
+    AverageLinkage,
+    Cluster,
+    Euclidean,
+    IncrementalHCA,
+    RecordBase,
+    SingleLinkage,
+)
+
+
+@dataclass(frozen=True)
+class Point(RecordBase):
+    x: float
+    y: float
+
+
+@pytest.fixture(scope="module")
+def points() -> numpy.ndarray:
+    return numpy.random.default_rng(0).normal(size=(60, 2))
+
+
+def clusters(points: numpy.ndarray) -> list:
+    return Cluster.new(tuple(Point.from_array(points)))
+
+
+@pytest.mark.parametrize("selector", [SingleLinkage, AverageLinkage])
+def test_insert_matches_full_HCA(selector, points: numpy.ndarray):
+    data = clusters(points)
+    incremental = IncrementalHCA(data[:45], selector(Euclidean()))
+    incremental.linkage()
+    incremental.insert(data[45:50])
+    result = incremental.insert(data[50:])
+    expected = HCA(data, selector(Euclidean())).linkage()
+    assert result.merge_differences(expected) == 0
+    numpy.testing.assert_allclose(
+        numpy.sort(result.Z()[:, 2]), numpy.sort(expected.Z()[:, 2])
+    )
+
+
+def test_insert_in_blocks(points: numpy.ndarray, monkeypatch):
+    # two new records per distance block
+    monkeypatch.setattr(
+        "optmath.HCA.incremental.PAIRWISE_BLOCK_ITEMS", 2 * len(points)
+    )
+    data = clusters(points)
+    incremental = IncrementalHCA(data[:30], SingleLinkage(Euclidean()))
+    result = incremental.insert(data[30:])
+    expected = HCA(data, SingleLinkage(Euclidean())).linkage()
+    assert result.merge_differences(expected) == 0
+
+
+@pytest.mark.parametrize("selector", [SingleLinkage, AverageLinkage])
+def test_save_and_load(selector, points: numpy.ndarray, tmp_path: Path):
+    data = clusters(points)
+    incremental = IncrementalHCA(data[:40], selector(Euclidean()))
+    incremental.save(tmp_path / "hca.npz")
+    loaded = IncrementalHCA.load(tmp_path / "hca.npz")
+    numpy.testing.assert_array_equal(
+        loaded.linkage().Z(), incremental.linkage().Z()
+    )
+    numpy.testing.assert_array_equal(
+        loaded.insert(data[40:]).Z(), incremental.insert(data[40:]).Z()
+    )
+
+
+def test_only_single_linkage_is_incremental(points: numpy.ndarray):
+    data = clusters(points)
+    assert IncrementalHCA(data, SingleLinkage(Euclidean())).incremental
+    assert not IncrementalHCA(data, AverageLinkage(Euclidean())).incremental
+
+
+def test_load_rejects_unknown_classes(points: numpy.ndarray, tmp_path: Path):
+    path = tmp_path / "hca.npz"
+    IncrementalHCA(clusters(points), SingleLinkage(Euclidean())).save(path)
+    with numpy.load(path) as file:
+        arrays = dict(file)
+    arrays["hca_options"] = numpy.frombuffer(
+        pickle.dumps({"engine": print}), dtype=numpy.uint8
+    )
+    numpy.savez(path, **arrays)
+    with pytest.raises(pickle.UnpicklingError):
+        IncrementalHCA.load(path)
+    arrays["hca_options"] = numpy.frombuffer(
+        pickle.dumps({"engine": numpy.memmap}), dtype=numpy.uint8
+    )
+    numpy.savez(path, **arrays)
+    with pytest.raises(pickle.UnpicklingError, match="memmap"):
+        IncrementalHCA.load(path)
+
+
+def test_insert_duplicate_IDs(points: numpy.ndarray):
+    data = clusters(points)
+    incremental = IncrementalHCA(data[:40], SingleLinkage(Euclidean()))
+    with pytest.raises(ValueError):
+        incremental.insert(data[39:])
@@ -0,0 +1,91 @@
+from dataclasses import dataclass
+
+import numpy
+import pytest
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from optmath.HCA import (
+    HCA,
+    KNNHCA,
+    AverageLinkage,
+    Cluster,
+    Euclidean,
+    RecordBase,
+    SingleLinkage,
+    join_components,
+    knn_graph,
+)
+
+
+@dataclass(frozen=True)
+class Point(RecordBase):
+    x: float
+    y: float
+
+
+@pytest.fixture(scope="module")
+def blobs() -> numpy.ndarray:
+    random = numpy.random.default_rng(0)
+    centers = numpy.array([[0.0, 0.0], [20.0, 0.0], [0.0, 20.0]])
+    return numpy.concatenate(
+        [center + random.normal(size=(50, 2)) for center in centers]
+    )
+
+
+def canonical(labels: numpy.ndarray) -> list:
+    mapping: dict = {}
+    return [mapping.setdefault(label, len(mapping)) for label in labels]
+
+
+def components(edges: numpy.ndarray, size: int) -> int:
+    graph = sparse.coo_matrix(
+        (numpy.ones(len(edges)), (edges[:, 0], edges[:, 1])),
+        shape=(size, size),
+    )
+    return connected_components(graph, directed=False)[0]
+
+
+def test_knn_graph_finds_nearest(blobs: numpy.ndarray):
+    edges = knn_graph(blobs, 3, Euclidean(), block_rows=7)
+    assert edges.shape == (3 * len(blobs), 2)
+    matrix = Euclidean().pairwise(blobs)
+    numpy.fill_diagonal(matrix, numpy.inf)
+    for record in (0, 42, 149):
+        expected = numpy.argsort(matrix[record])[:3]
+        found = edges[edges[:, 0] == record, 1]
+        assert sorted(found) == sorted(expected)
+
+
+def test_join_components_connects_blobs(blobs: numpy.ndarray):
+    edges = knn_graph(blobs, 2, Euclidean())
+    before = components(edges, len(blobs))
+    assert before > 1
+    joined = join_components(blobs, edges, Euclidean())
+    assert len(joined) == len(edges) + before - 1
+    assert components(joined, len(blobs)) == 1
+
+
+@pytest.mark.parametrize("selector", [SingleLinkage, AverageLinkage])
+def test_all_neighbors_is_exact(blobs: numpy.ndarray, selector: type):
+    data = Cluster.new(Point.new(blobs[::3]))
+    approximate = KNNHCA(data, selector(Euclidean()), k=len(data))
+    assert approximate.merge_differences(sample=None) == 0
+
+
+@pytest.mark.parametrize("selector", [SingleLinkage, AverageLinkage])
+def test_small_k_recovers_blobs(blobs: numpy.ndarray, selector: type):
+    data = Cluster.new(Point.new(blobs))
+    linkage = KNNHCA(data, selector(Euclidean()), k=4).linkage()
+    assert linkage.Z()[-1, 3] == len(blobs)
+    assert canonical(linkage.labels(k=3)) == [0] * 50 + [1] * 50 + [2] * 50
+
+
+def test_merge_differences(blobs: numpy.ndarray):
+    data = Cluster.new(Point.new(blobs))
+    single = HCA(data, SingleLinkage(Euclidean())).linkage()
+    average = HCA(data, AverageLinkage(Euclidean())).linkage()
+    assert single.merge_differences(single) == 0
+    assert 0 < single.merge_differences(average) < len(data)
+    approximate = KNNHCA(data, AverageLinkage(Euclidean()), k=2)
+    assert 0 <= approximate.merge_differences(sample=60) < 60
@@ -0,0 +1,86 @@
+from dataclasses import dataclass
+
+import numpy
+import pytest
+from scipy.cluster.hierarchy import fcluster
+
+from optmath.HCA import (
+    HCA,
+    AverageLinkage,
+    CentroidLinkage,
+    Cluster,
+    Euclidean,
+    RecordBase,
+    Ward,
+)
+
+
+@dataclass(frozen=True)
+class Point(RecordBase):
+    x: float
+    y: float
+
+
+@pytest.fixture(scope="module")
+def data() -> list:
+    raw = numpy.random.default_rng(0).normal(size=(40, 2))
+    return Cluster.new(Point.new(raw))
+
+
+def canonical(labels: numpy.ndarray) -> list:
+    # number labels in order of first occurrence
+    mapping: dict = {}
+    return [mapping.setdefault(label, len(mapping)) for label in labels]
+
+
+@pytest.mark.parametrize("k", [1, 2, 5, 17, 40])
+def test_labels_k_match_scipy(data: list, k: int):
+    linkage = HCA(data, AverageLinkage(Euclidean())).linkage()
+    labels = linkage.labels(k=k)
+    assert labels.dtype == numpy.int32
+    assert labels.max() == k - 1
+    expected = fcluster(linkage.Z(), k, "maxclust")
+    assert list(labels) == canonical(expected)
+
+
+@pytest.mark.parametrize("selector", [Ward, CentroidLinkage])
+def test_labels_height_match_scipy(data: list, selector: type):
+    linkage = HCA(data, selector(Euclidean())).linkage()
+    for height in numpy.quantile(linkage.Z()[:, 2], [0.1, 0.5, 0.9]):
+        expected = fcluster(linkage.Z(), height, "distance")
+        assert list(linkage.labels(height=height)) == canonical(expected)
+
+
+def test_labels_size(data: list):
+    linkage = HCA(data, AverageLinkage(Euclidean())).linkage()
+    labels = linkage.labels(size=5)
+    assert numpy.bincount(labels).max() <= 5
+    # clusters are children of merges creating clusters bigger than 5
+    z = linkage.Z()
+    big = z[:, 3] > 5
+    children = z[big, :2].ravel().astype(int)
+    maximal = (children < len(data)) | (z[children - len(data), 3] <= 5)
+    assert labels.max() + 1 == maximal.sum()
+    with pytest.raises(ValueError):
+        linkage.labels(k=2, size=5)
+    with pytest.raises(ValueError):
+        linkage.labels(k=0)
+
+
+def test_labels_all_levels(data: list):
+    root = HCA(data, AverageLinkage(Euclidean())).result()
+    levels = root.labels_all_levels()
+    assert levels.shape == (len(data), len(data))
+    assert levels.dtype == numpy.int32
+    for merges in (0, 1, 20, len(data) - 1):
+        assert (levels[merges] == root.labels(k=len(data) - merges)).all()
+
+
+def test_labels_of_legacy_cluster(data: list):
+    algorithm = HCA(data, AverageLinkage(Euclidean()))
+    for _ in algorithm:
+        pass
+    legacy_root = algorithm.last.data[0]
+    expected = HCA(data, AverageLinkage(Euclidean())).linkage()
+    assert (legacy_root.labels(k=6) == expected.labels(k=6)).all()
+    assert len(legacy_root.leaves()) == len(data)
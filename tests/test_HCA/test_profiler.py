@@ -0,0 +1,146 @@
+import json
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy
+import pytest
+
+from optmath.HCA import (
+    HCA,
+    Cluster,
+    CompleteLinkage,
+    DistanceSelectorBase,
+    Euclidean,
+    GraphEngine,
+    MatrixEngine,
+    MSTEngine,
+    NNChainEngine,
+    Profiler,
+    RecordBase,
+    SingleLinkage,
+    Ward,
+)
+
+
+@dataclass(frozen=True)
+class Point(RecordBase):
+    x: float
+    y: float
+
+
+class LegacyCompleteLinkage(DistanceSelectorBase):
+    def new_distance_vector(
+        self,
+        to_reduce: tuple,
+        distance_matrix: numpy.ndarray,
+        _: Cluster,
+        __: list,
+    ) -> numpy.ndarray:
+        others = numpy.ones(len(distance_matrix), dtype=bool)
+        others[list(to_reduce)] = False
+        return distance_matrix[list(to_reduce)].max(axis=0)[others]
+
+
+@pytest.fixture(scope="module")
+def points() -> list:
+    raw = numpy.random.default_rng(0).normal(size=(40, 2))
+    return Cluster.new(Point.new(raw))
+
+
+def complete_graph(size: int) -> GraphEngine:
+    return GraphEngine([(i, j) for i in range(size) for j in range(i)])
+
+
+@pytest.mark.parametrize(
+    ("selector", "engine"),
+    [
+        (Ward(Euclidean()), lambda _: MatrixEngine()),
+        (Ward(Euclidean()), lambda _: NNChainEngine()),
+        (CompleteLinkage(Euclidean()), complete_graph),
+        (LegacyCompleteLinkage(Euclidean()), lambda _: None),
+    ],
+)
+def test_phases_of_every_step(points: list, selector, engine):
+    engine = engine(len(points))
+    profiler = Profiler()
+    HCA(points, selector, engine=engine, profiler=profiler).result()
+    phases = profiler.phases
+    assert set(phases) == {"initialize", "search", "update", "rebuild"}
+    for name in ("search", "update", "rebuild"):
+        assert phases[name].calls == len(points) - 1
+    assert len(profiler.steps) == len(points) - 1
+    assert set(profiler.steps[0]) == {"search", "update", "rebuild"}
+    assert profiler.total_seconds > 0
+
+
+def test_mst_engine_phases(points: list):
+    profiler = Profiler(samples=False)
+    HCA(
+        points,
+        SingleLinkage(Euclidean()),
+        engine=MSTEngine(),
+        profiler=profiler,
+    ).result()
+    assert profiler.phases["search"].calls == len(points) - 1
+    assert profiler.phases["rebuild"].calls == 1
+    assert profiler.steps == []
+
+
+def test_result_does_not_depend_on_profiler(points: list):
+    selector = Ward(Euclidean())
+    plain = HCA(points, selector).result().Z()
+    profiled = HCA(points, selector, profiler=Profiler()).result().Z()
+    assert (plain == profiled).all()
+
+
+def test_allocations_traced(points: list):
+    assert not tracemalloc.is_tracing()
+    with Profiler(trace_memory=True) as profiler:
+        HCA(points, Ward(Euclidean()), profiler=profiler).result()
+    assert not tracemalloc.is_tracing()
+    # storage of 40x40 float64 distances
+    assert profiler.phases["initialize"].allocated >= 40 * 40 * 8
+
+
+def test_allocations_unknown_without_reset_peak(points: list, monkeypatch):
+    monkeypatch.setattr("optmath.HCA.profiler.RESETTABLE_PEAK", False)
+    with Profiler(trace_memory=True) as profiler:
+        HCA(points, Ward(Euclidean()), profiler=profiler).result()
+    assert all(s.allocated is None for s in profiler.phases.values())
+    untraced = Profiler()
+    HCA(points, Ward(Euclidean()), profiler=untraced).result()
+    assert all(s.allocated == 0 for s in untraced.phases.values())
+
+
+def test_callback(points: list):
+    calls = []
+    profiler = Profiler(callback=lambda *args: calls.append(args))
+    HCA(points, Ward(Euclidean()), profiler=profiler).result()
+    assert len(calls) == sum(s.calls for s in profiler.phases.values())
+    assert {phase for phase, _, _ in calls} == set(profiler.phases)
+
+
+def test_json_export(points: list, tmp_path: Path):
+    profiler = Profiler()
+    HCA(points, Ward(Euclidean()), profiler=profiler).result()
+    text = profiler.to_json(tmp_path / "profile.json")
+    assert json.loads((tmp_path / "profile.json").read_text()) == json.loads(
+        text
+    )
+    exported = profiler.as_dict()
+    assert exported["phases"]["search"]["calls"] == len(points) - 1
+    assert len(exported["steps"]) == len(points) - 1
+
+
+def test_checkpoint_without_profiler(points: list, tmp_path: Path):
+    profiler = Profiler(callback=lambda *_: None)
+    algorithm = HCA(
+        points,
+        Ward(Euclidean()),
+        profiler=profiler,
+        checkpoint=tmp_path / "run.npz",
+        checkpoint_every=10,
+    )
+    algorithm.result()
+    assert HCA.resume(tmp_path / "run.npz").profiler is None
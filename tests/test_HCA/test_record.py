@@ -1,7 +1,19 @@
 from dataclasses import dataclass
+from pathlib import Path
 from typing import ClassVar
 
-from optmath.HCA.record import RecordBase
+import numpy
+import pandas as pd
+import pytest
+
+from optmath.HCA import HCA, Cluster, Euclidean, SingleLinkage
+from optmath.HCA.record import (
+    Autoscaler,
+    RecordBase,
+    RecordBatch,
+    autoscale,
+    to_numpy_array,
+)
 
 
 @dataclass(frozen=True)
@@ -12,6 +24,175 @@ class ExampleRecord(RecordBase):
     attr4: ClassVar[str] = "sth"
 
 
+@dataclass(frozen=True)
+class PumpkinSeed(RecordBase):
+    Area: float
+    Perimeter: float
+    Major_Axis_Length: float
+    Minor_Axis_Length: float
+    Solidity: float
+    Roundness: float
+
+
+TEST_HCA_DIR = Path(__file__).parent
+
+
 def test_record_numeric():
     ob = ExampleRecord(0, 1, 3.14, "name")
     assert len(ob.numeric()) == 2
+
+
+def example_records():
+    return ExampleRecord.new(
+        [(1, 3.14, "a"), (2, 2.71, "b"), (3, 1.41, "c"), (4, 1.73, "d")]
+    )
+
+
+def test_record_numeric_fields_cached():
+    assert ExampleRecord.numeric_fields() == ("attr", "attr2")
+    assert ExampleRecord.numeric_fields() is ExampleRecord.numeric_fields()
+
+
+def test_record_batch_columns():
+    records = example_records()
+    batch = RecordBatch.from_records(records)
+    assert len(batch) == 4
+    assert batch.numeric.flags.f_contiguous
+    assert batch.column("attr").flags.c_contiguous
+    assert list(batch.column("attr3")) == ["a", "b", "c", "d"]
+    assert batch.records() == records
+
+
+def test_record_batch_to_numpy_array_zero_copy():
+    records = example_records()
+    batch = RecordBatch.from_records(records)
+    array = to_numpy_array(batch)
+    assert array is batch.numeric
+    assert not array.flags.writeable
+    assert (array == to_numpy_array(records)).all()
+
+
+def test_record_batch_views():
+    records = example_records()
+    batch = RecordBatch.from_records(records)
+    view = batch[-1]
+    assert view.ID == 3
+    assert view.attr3 == "d"
+    assert (view.numeric() == records[3].numeric()).all()
+    assert view.record() == records[3]
+    with pytest.raises(AttributeError):
+        view.missing
+    with pytest.raises(IndexError):
+        batch[4]
+    views = list(batch)[::-1]
+    assert (to_numpy_array(views) == to_numpy_array(records[::-1])).all()
+
+
+def test_record_batch_hca():
+    records = example_records()
+    batch = RecordBatch.from_records(records)
+    expected = HCA(Cluster.new(records), SingleLinkage(Euclidean())).result()
+    result = HCA(Cluster.new(batch), SingleLinkage(Euclidean())).result()
+    assert (expected.Z() == result.Z()).all()
+
+
+@dataclass(frozen=True)
+class Point(RecordBase):
+    x: float
+    y: float
+    weight: int
+
+
+def test_record_from_array():
+    raw = numpy.array([[0.5, 1.0, 1], [2.0, -1.0, 3]])
+    batch = Point.from_array(raw, first_id=10)
+    assert list(batch.ids) == [10, 11]
+    assert (to_numpy_array(batch) == raw).all()
+    assert batch.records() == tuple(
+        Point(i + 10, *r) for i, r in enumerate(raw)
+    )
+
+
+def test_record_from_array_validates_columns():
+    with pytest.raises(ValueError):
+        Point.from_array(numpy.zeros((2, 2)))
+    with pytest.raises(TypeError):
+        Point.from_array(numpy.array([[0.5, 1.0, 1.5]]))
+    with pytest.raises(TypeError):
+        ExampleRecord.from_array(numpy.array([["a", 1.0, "b"]], dtype=object))
+    with pytest.raises(TypeError, match="'attr3' is not str"):
+        ExampleRecord.from_array(numpy.array([[1, 1.0, 2]], dtype=object))
+    with pytest.raises(ValueError, match="'weight' has missing values"):
+        Point.from_array(numpy.array([[0.5, 1.0, numpy.nan]]))
+    with pytest.raises(ValueError, match="'attr3' has missing values"):
+        ExampleRecord.from_array(
+            numpy.array([[1, 1.0, "a"], [2, 2.0, None]], dtype=object)
+        )
+
+
+def test_record_string_column_validated_at_once(monkeypatch):
+    def fail(_):
+        raise AssertionError("column should not be checked per value")
+
+    monkeypatch.setattr("optmath.HCA.record.all", fail, raising=False)
+    raw = numpy.array([[1, 1.0, "a"], [2, 2.0, "b"]], dtype=object)
+    batch = ExampleRecord.from_array(raw)
+    assert list(batch.column("attr3")) == ["a", "b"]
+    with pytest.raises(TypeError, match="'attr3' is not str"):
+        ExampleRecord.from_array(numpy.array([[1, 1.0, 2.5]], dtype=object))
+    monkeypatch.undo()
+    mixed = numpy.array([[1, 1.0, "a"], [2, 2.0, 3]], dtype=object)
+    with pytest.raises(TypeError, match="'attr3' is not str"):
+        ExampleRecord.from_array(mixed)
+
+
+def test_record_read_csv(tmp_path):
+    path = tmp_path / "records.csv"
+    path.write_text("a,b,c\n1,0.5,x\n2,1.5,y\n3,2.5,z\n")
+    batch = ExampleRecord.read_csv(path)
+    assert batch.records() == ExampleRecord.new(
+        [(1, 0.5, "x"), (2, 1.5, "y"), (3, 2.5, "z")]
+    )
+    chunks = list(ExampleRecord.read_csv(path, chunksize=2))
+    assert [len(c) for c in chunks] == [2, 1]
+    assert list(chunks[1].ids) == [2]
+    assert list(chunks[1].column("attr3")) == ["z"]
+
+
+def test_record_read_csv_seeds():
+    raw = pd.read_csv(TEST_HCA_DIR / "data" / "test_seeds.csv").to_numpy()
+    batch = PumpkinSeed.read_csv(TEST_HCA_DIR / "data" / "test_seeds.csv")
+    assert (to_numpy_array(batch) == raw).all()
+
+
+def test_autoscaler_matches_autoscale():
+    raw = pd.read_csv(TEST_HCA_DIR / "data" / "test_seeds.csv").to_numpy()
+    scaler = Autoscaler().fit(numpy.array_split(raw, 7))
+    assert scaler.count == len(raw)
+    assert numpy.allclose(scaler.transform(raw), autoscale(raw))
+
+
+def test_autoscaler_transform_out_and_inplace():
+    raw = numpy.random.default_rng(0).normal(5.0, 3.0, (100, 3))
+    scaler = Autoscaler().fit([raw[:30], raw[30:]])
+    expected = scaler.transform(raw)
+    out = numpy.empty_like(raw)
+    assert scaler.transform(raw, out=out) is out
+    assert (out == expected).all()
+    assert scaler.transform(raw, inplace=True) is raw
+    assert (raw == expected).all()
+    integers = raw.astype(numpy.int64)
+    with pytest.raises(ValueError, match="in place"):
+        scaler.transform(integers, inplace=True)
+    with pytest.raises(ValueError, match="in place"):
+        scaler.transform(Point.from_array(numpy.round(raw)), inplace=True)
+
+
+def test_autoscaler_record_batch():
+    raw = numpy.array([[0.5, 1.0, 1], [2.0, -1.0, 3], [1.0, 4.0, 2]])
+    scaler = Autoscaler()
+    assert (
+        scaler.fit_transform(Point.from_array(raw)) == autoscale(raw)
+    ).all()
+    with pytest.raises(ValueError):
+        Autoscaler().transform(raw)
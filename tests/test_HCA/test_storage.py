@@ -0,0 +1,187 @@
+from dataclasses import dataclass
+
+import numpy
+import pytest
+from scipy.spatial.distance import pdist, squareform
+
+from optmath.HCA import (
+    HCA,
+    Cluster,
+    CompleteLinkage,
+    CondensedStorage,
+    DistanceSelectorBase,
+    Euclidean,
+    MatrixEngine,
+    MSTEngine,
+    NNChainEngine,
+    RecordBase,
+    SingleLinkage,
+    SquareStorage,
+    TileBuilder,
+    Ward,
+)
+from optmath.HCA.engine import EngineBase
+
+
+@dataclass(frozen=True)
+class Point(RecordBase):
+    x: float
+    y: float
+    z: float
+
+
+@pytest.fixture(scope="module")
+def raw() -> numpy.ndarray:
+    return numpy.random.default_rng(0).normal(size=(60, 3))
+
+
+@pytest.fixture(scope="module")
+def data(raw: numpy.ndarray) -> list:
+    return Cluster.new(Point.new(raw))
+
+
+def test_condensed_storage_from_data(raw: numpy.ndarray, data: list):
+    storage = CondensedStorage.from_data(data, SingleLinkage(Euclidean()))
+    assert numpy.allclose(storage.condensed, pdist(raw))
+
+
+def test_condensed_storage_rows_match_square(data: list):
+    selector = SingleLinkage(Euclidean())
+    square = SquareStorage.from_data(data, selector)
+    condensed = CondensedStorage.from_data(data, selector)
+    for index in (0, 17, len(data) - 1):
+        assert (square.row(index) == condensed.row(index)).all()
+    values = numpy.arange(len(data), dtype=numpy.float64)
+    square.set_row(17, values)
+    condensed.set_row(17, values)
+    assert (
+        square.rows(numpy.arange(len(data)))
+        == condensed.rows(numpy.arange(len(data)))
+    ).all()
+    assert condensed.distance(17, 3) == condensed.distance(3, 17) == 3.0
+
+
+def test_square_storage_set_tile_keeps_diagonal():
+    storage = SquareStorage.allocate(6)
+    storage.matrix[...] = 1.0
+    # tile crossing diagonal only restores its own diagonal cells
+    storage.set_tile(1, 2, numpy.zeros((3, 2)))
+    assert numpy.isinf(storage.matrix[[2, 3], [2, 3]]).all()
+    assert (storage.matrix[[0, 1, 4, 5], [0, 1, 4, 5]] == 1.0).all()
+    assert storage.matrix[1, 2] == storage.matrix[2, 1] == 0.0
+
+
+def test_condensed_storage_rejects_invalid_length():
+    with pytest.raises(ValueError, match="not a condensed"):
+        CondensedStorage(numpy.zeros(4))
+
+
+@pytest.mark.parametrize(
+    ("selector", "engine"),
+    [
+        (SingleLinkage(Euclidean()), MSTEngine()),
+        (CompleteLinkage(Euclidean()), MatrixEngine()),
+        (Ward(Euclidean()), NNChainEngine()),
+    ],
+)
+def test_HCA_accepts_condensed_matrix(
+    raw: numpy.ndarray,
+    data: list,
+    selector: DistanceSelectorBase,
+    engine: EngineBase,
+):
+    z_condensed = HCA(data, selector, pdist(raw), engine=engine).result().Z()
+    z_square = HCA(data, selector, engine=engine).result().Z()
+    assert (z_condensed[:, [0, 1, 3]] == z_square[:, [0, 1, 3]]).all()
+    assert numpy.allclose(z_condensed[:, 2], z_square[:, 2])
+
+
+def test_HCA_condensed_storage_option(data: list):
+    selector = CompleteLinkage(Euclidean())
+    z_condensed = HCA(data, selector, storage=CondensedStorage).result().Z()
+    z_square = HCA(data, selector).result().Z()
+    assert (z_condensed == z_square).all()
+
+
+def test_HCA_legacy_steps_from_condensed_matrix(
+    raw: numpy.ndarray, data: list
+):
+    algorithm = HCA(data, CompleteLinkage(Euclidean()), pdist(raw))
+    for _ in algorithm:
+        pass
+    z_square = HCA(data, CompleteLinkage(Euclidean())).result().Z()
+    assert (
+        algorithm.last.data[0].Z()[:, [0, 1, 3]] == z_square[:, [0, 1, 3]]
+    ).all()
+
+
+@pytest.mark.parametrize("storage", [SquareStorage, CondensedStorage])
+def test_memory_mapped_storage(tmp_path, data: list, storage: type):
+    selector = CompleteLinkage(Euclidean())
+    expected = storage.from_data(data, selector)
+    with storage.from_data(data, selector, tmp_path) as mapped:
+        indexes = numpy.arange(len(data))
+        assert (mapped.rows(indexes) == expected.rows(indexes)).all()
+        assert mapped._file is not None
+    assert mapped._file is None
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("storage", [SquareStorage, CondensedStorage])
+def test_memory_mapped_storage_from_matrix(
+    tmp_path, raw: numpy.ndarray, storage: type
+):
+    matrix = numpy.ascontiguousarray(squareform(pdist(raw)))
+    indexes = numpy.arange(len(raw))
+    expected = storage.from_matrix(matrix).rows(indexes)
+    for source in (matrix, pdist(raw)):
+        with storage.from_matrix(source, tmp_path) as mapped:
+            assert (mapped.rows(indexes) == expected).all()
+    assert matrix[0, 0] == 0.0
+
+
+@pytest.mark.parametrize("storage", [SquareStorage, CondensedStorage])
+def test_HCA_memory_mapped_backing(tmp_path, data: list, storage: type):
+    selector = CompleteLinkage(Euclidean())
+    z_mapped = (
+        HCA(data, selector, storage=storage, backing=tmp_path).result().Z()
+    )
+    assert (z_mapped == HCA(data, selector).result().Z()).all()
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize(
+    "builder",
+    [
+        TileBuilder(tile_size=7),
+        TileBuilder(workers=3, tile_size=16),
+        TileBuilder(workers=2, tile_size=25, processes=True),
+    ],
+)
+@pytest.mark.parametrize("storage", [SquareStorage, CondensedStorage])
+def test_tile_builder_is_bit_identical(
+    data: list, builder: TileBuilder, storage: type
+):
+    selector = CompleteLinkage(Euclidean())
+    indexes = numpy.arange(len(data))
+    expected = storage.from_data(data, selector).rows(indexes)
+    built = storage.from_data(data, selector, builder=builder)
+    assert (built.rows(indexes) == expected).all()
+
+
+def test_tile_builder_covers_upper_triangle():
+    tiles = list(TileBuilder(tile_size=4).tiles(10, 3))
+    covered = numpy.zeros((10, 10), dtype=int)
+    for row, row_stop, column, column_stop in tiles:
+        assert column >= row
+        covered[row:row_stop, column:column_stop] += 1
+    assert (numpy.triu(covered) == numpy.triu(numpy.ones((10, 10)))).all()
+    with pytest.raises(ValueError):
+        TileBuilder(workers=0)
+
+
+def test_HCA_parallel_builder(data: list):
+    selector = CompleteLinkage(Euclidean())
+    builder = TileBuilder(workers=2, tile_size=8)
+    algorithm = HCA(data, selector, builder=builder)
+    assert (algorithm.result().Z() == HCA(data, selector).result().Z()).all()
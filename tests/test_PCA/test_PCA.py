@@ -1,10 +1,12 @@
 from dataclasses import dataclass
 from pathlib import Path
 
+import numpy
 import pandas
 import pytest
 
 from optmath import RecordBase, autoscale
+from optmath.common.cache import ResultCache
 from optmath.PCA import PCA, PCAResutsView
 
 
@@ -108,3 +110,21 @@ class TestPCAResultView:
         fig, _ = view.show_loads_grid(limit=0.5)
         fig.set_size_inches(5, 10)
         fig.set_dpi(80)
+
+
+def test_pca_result_cache(tmp_path, monkeypatch):
+    raw = pandas.read_csv(TEST_PCA_DIR / "data" / "test_seeds.csv").to_numpy()
+    data = PumpkinSeed.new(autoscale(raw))
+    cache = ResultCache(tmp_path)
+    expected = PCA(data, cache)
+
+    def fail(*_):
+        raise AssertionError("cached result should be used")
+
+    monkeypatch.setattr(numpy.linalg, "eig", fail)
+    result = PCA(data, cache)
+    assert result.eigenvalues == expected.eigenvalues
+    assert all(
+        (a == b).all() for a, b in zip(result.vectors, expected.vectors)
+    )
+    assert (result.correlation_matrix == expected.correlation_matrix).all()
@@ -0,0 +1,62 @@
+from pathlib import Path
+
+import pytest
+from benchmarks import Grid, Report, Result, cases, measure
+
+GRID = Grid((20,), (30,), (3,))
+
+
+def run(only: str) -> Report:
+    report = Report()
+    for case in cases(GRID, ["average", "ward"], None, only):
+        report.results.append(
+            Result(
+                case.name,
+                case.params,
+                measure(case.setup, case.run, 1, isolated=False),
+                measure(case.setup, case.baseline, 1, isolated=False)
+                if case.baseline is not None
+                else None,
+                case.baseline_name,
+            )
+        )
+    return report
+
+
+def test_cases_cover_grid():
+    keys = [Result(c.name, c.params, None).key for c in cases(GRID)]
+    assert len(keys) == len(set(keys)) == 7 * 3 + 1
+    ward = [c for c in cases(GRID, ["ward"]) if c.name == "HCA"]
+    # scipy computes ward linkage only for euclidean distance
+    assert [c.baseline is not None for c in ward] == [True, False, False]
+
+
+def test_measurement():
+    report = run("PCA")
+    (result,) = report.results
+    assert result.optmath.wall_time > 0
+    assert result.optmath.peak_traced > 0
+    assert result.baseline_name == "numpy.linalg.eigh"
+    assert result.speedup is not None
+
+
+def test_isolated_measurement():
+    (case,) = cases(GRID, only="PCA")
+    measurement = measure(case.setup, case.run, 1)
+    assert measurement.repeat == 1
+    assert measurement.wall_time > 0
+
+
+def test_report_round_trip(tmp_path: Path):
+    report = run("HCA")
+    report.dump(tmp_path / "report.json")
+    loaded = Report.load(tmp_path / "report.json")
+    assert loaded == report
+    assert loaded.regressions(report, threshold=1.0001) == []
+    assert len(loaded.regressions(report, threshold=0.0)) == 6
+
+
+def test_report_version(tmp_path: Path):
+    (tmp_path / "report.json").write_text('{"version": 0}')
+    with pytest.raises(ValueError, match="version"):
+        Report.load(tmp_path / "report.json")
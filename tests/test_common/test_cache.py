@@ -0,0 +1,89 @@
+import os
+
+import numpy
+import pytest
+
+from optmath.common.cache import ResultCache
+from optmath.HCA import CompleteLinkage, Euclidean, Manhattan, Ward
+
+
+def test_key_depends_on_content_and_configuration():
+    data = numpy.arange(12.0).reshape(4, 3)
+    key = ResultCache.key(data, Ward(Euclidean()))
+    assert key == ResultCache.key(data.copy(), Ward(Euclidean()))
+    assert key != ResultCache.key(data + 1e-12, Ward(Euclidean()))
+    assert key != ResultCache.key(data.reshape(3, 4), Ward(Euclidean()))
+    assert key != ResultCache.key(
+        data.astype(numpy.float32), Ward(Euclidean())
+    )
+    assert key != ResultCache.key(data, Ward(Manhattan()))
+    assert key != ResultCache.key(data, CompleteLinkage(Euclidean()))
+    assert ResultCache.key(numpy.dtype("float32")) != ResultCache.key(
+        numpy.dtype("float64")
+    )
+
+
+def test_get_put(tmp_path):
+    cache = ResultCache(tmp_path / "cache")
+    assert cache.get("missing") is None
+    cache.put("key", {"a": numpy.arange(3), "b": numpy.eye(2)})
+    arrays = cache.get("key")
+    assert arrays is not None
+    assert (arrays["a"] == numpy.arange(3)).all()
+    assert (arrays["b"] == numpy.eye(2)).all()
+    assert not list((tmp_path / "cache").glob("*.tmp"))
+    cache.clear()
+    assert cache.get("key") is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    entry = {"a": numpy.zeros(1000)}
+    cache = ResultCache(tmp_path, max_bytes=3 * 8500)
+    for index, key in enumerate(("first", "second", "third")):
+        cache.put(key, entry)
+        os.utime(cache._path(key), (index, index))
+    assert cache.get("first") is not None
+    cache.put("fourth", entry)
+    assert cache.get("second") is None
+    assert all(cache.get(k) is not None for k in ("first", "third", "fourth"))
+
+
+def test_corrupted_entry_is_a_miss(tmp_path):
+    cache = ResultCache(tmp_path)
+    cache._path("key").write_bytes(b"not npz")
+    assert cache.get("key") is None
+
+
+def test_entries_bigger_than_cache_are_not_kept(tmp_path):
+    cache = ResultCache(tmp_path, max_bytes=0)
+    cache.put("key", {"a": numpy.zeros(10)})
+    assert cache.get("key") is None
+
+
+class Slotted:
+    __slots__ = ("value",)
+
+    def __init__(self, value: float) -> None:
+        self.value = value
+
+
+def test_key_of_slotted_objects():
+    assert ResultCache.key(Slotted(1.0)) == ResultCache.key(Slotted(1.0))
+    assert ResultCache.key(Slotted(1.0)) != ResultCache.key(Slotted(2.0))
+
+
+def test_key_of_unknown_objects_is_rejected():
+    with pytest.raises(TypeError):
+        ResultCache.key(object())
+    with pytest.raises(TypeError):
+        ResultCache.key(len)
+
+
+def test_key_depends_on_version(monkeypatch):
+    data = numpy.zeros((0, 3))
+    key = ResultCache.key(data)
+    monkeypatch.setattr("optmath.__version__", "0.0.0")
+    assert ResultCache.key(data) != key
+    monkeypatch.undo()
+    monkeypatch.setattr("optmath.common.cache.CACHE_FORMAT", -1)
+    assert ResultCache.key(data) != key